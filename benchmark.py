@@ -0,0 +1,391 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark for the scrape pipeline.
+
+Every stage runs against a synthetic agenda served by a local ReplayServer,
+or against pages recorded with `scrape_amsterdam_events.py --record DIR`.
+No live site or translation service is involved. Each (stage, size) pair
+runs in a fresh process, so the peak RSS reported belongs to that stage.
+
+    python benchmark.py                         # 100, 1000 and 10000 events
+    python benchmark.py --sizes 100 --stages scrape,render --latency-ms 50
+    python benchmark.py --startup               # CLI startup-time regression check
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+DEFAULT_SIZES = (100, 1000, 10000)
+STAGES = ("crawl", "scrape", "parse", "dedup", "images", "render")
+
+# Modules the CLI must not load before a stage needs them
+HEAVY_MODULES = ("playwright", "translators", "markitdown", "bs4", "feedgen", "markdown", "requests")
+DEFAULT_STARTUP_BUDGET_MS = 500
+STARTUP_RUNS = 5
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _percentile(values, fraction):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def _timed_iter(items, latencies):
+    """Yield items, recording the time the consumer spends on each one"""
+    for item in items:
+        started = time.perf_counter()
+        yield item
+        latencies.append(time.perf_counter() - started)
+
+
+def _site(size, fixtures_dir):
+    """Pages to serve and event paths to scrape: recorded fixtures, or a synthetic agenda"""
+    from fixtures import FixtureStore, synthetic_site
+    from crawler import DETAIL, classify_url
+
+    if not fixtures_dir:
+        return synthetic_site(size)
+    pages = FixtureStore(fixtures_dir).load_pages()
+    event_paths = sorted(path for path in pages if classify_url("https://iamsterdam.com" + path) == DETAIL)
+    if not event_paths:
+        raise SystemExit(f"No event pages recorded in {fixtures_dir}")
+    # Recordings are usually smaller than the requested size; cycle through them
+    return pages, [event_paths[i % len(event_paths)] for i in range(size)]
+
+
+def _snapshots(size, fixtures_dir):
+    from event_extractor import snapshot_from_static_html
+
+    pages, event_paths = _site(size, fixtures_dir)
+    cache = {}
+    snapshots = []
+    for path in event_paths:
+        if path not in cache:
+            cache[path] = snapshot_from_static_html(pages[path][2].decode("utf-8"), "https://www.iamsterdam.com" + path)
+        snapshots.append(cache[path])
+    return [s for s in snapshots if s]
+
+
+def _events(size, fixtures_dir):
+    from event_extractor import parse_event_html
+    from models import Event
+
+    events = []
+    pub_date = datetime.now(timezone.utc)
+    for index, snapshot in enumerate(_snapshots(size, fixtures_dir)):
+        parsed = parse_event_html(snapshot["main_html"])
+        events.append(Event(
+            title=snapshot["title"].strip(),
+            link=f"{snapshot['url']}?n={index}",
+            description=parsed.get("description"),
+            source="I Amsterdam Official",
+            date_text=parsed.get("date_text"),
+            price_text=parsed.get("price_text"),
+            pub_date=pub_date,
+            image=next((i for i in snapshot["images"] if i), None),
+        ))
+    return events
+
+
+def _bench_crawl(size, options):
+    import requests
+    from crawler import AgendaCrawler, HostRateLimiter
+    from fixtures import ReplayServer
+    from http_fetcher import HttpFetcher
+
+    pages, _ = _site(size, options.fixtures)
+    server = ReplayServer(pages, latency=options.latency_ms / 1000).start()
+    latencies = []
+
+    async def crawl():
+        fetcher = HttpFetcher(requests.Session(), options.concurrency)
+
+        async def fetch(url):
+            started = time.perf_counter()
+            response = await fetcher.fetch(url)
+            latencies.append(time.perf_counter() - started)
+            return response.text if response and response.status == 200 else None
+
+        crawler = AgendaCrawler([fetch], concurrency=options.concurrency, max_pages=10 ** 6,
+                                rate_limiter=HostRateLimiter(0))
+        return await crawler.crawl(server.url + "/uit/agenda")
+
+    try:
+        started = time.perf_counter()
+        urls = asyncio.run(crawl())
+        elapsed = time.perf_counter() - started
+    finally:
+        server.stop()
+    return len(urls), elapsed, latencies
+
+
+def _bench_scrape(size, options):
+    import requests
+    from fixtures import ReplayServer
+    from governor import OutboundGovernor
+    from http_fetcher import HttpFetcher
+    from scrape_amsterdam_events import AmsterdamEventsScraper
+    from translation import StubBackend, Translator
+
+    pages, event_paths = _site(size, options.fixtures)
+    server = ReplayServer(pages, latency=options.latency_ms / 1000).start()
+    urls = [server.url + path for path in event_paths]
+    latencies = []
+
+    async def scrape():
+        governor = OutboundGovernor() if options.governor else None
+        scraper = AmsterdamEventsScraper(
+            concurrency=options.concurrency,
+            translator=Translator(StubBackend(delay=options.translate_latency_ms / 1000)),
+            parse_workers=options.parse_workers,
+            governor=governor,
+        )
+        scraper.http_fetcher = HttpFetcher(requests.Session(), options.concurrency, governor=governor)
+        scrape_one = scraper._scrape_event
+
+        async def timed_scrape(context, url):
+            started = time.perf_counter()
+            try:
+                return await scrape_one(context, url)
+            finally:
+                latencies.append(time.perf_counter() - started)
+
+        scraper._scrape_event = timed_scrape
+        if options.parse_workers > 0:
+            scraper.parse_pool = ProcessPoolExecutor(
+                max_workers=options.parse_workers, mp_context=multiprocessing.get_context("spawn")
+            )
+            scraper._parse_slots = asyncio.Semaphore(2 * options.parse_workers)
+        try:
+            # No browser context: pages the HTTP path cannot handle count as failures
+            return await scraper._scrape_event_pages(None, urls)
+        finally:
+            if scraper.parse_pool:
+                scraper.parse_pool.shutdown()
+
+    try:
+        started = time.perf_counter()
+        results = asyncio.run(scrape())
+        elapsed = time.perf_counter() - started
+    finally:
+        server.stop()
+    return sum(1 for r in results if r), elapsed, latencies
+
+
+def _bench_parse(size, options):
+    from event_extractor import parse_event_html
+
+    snapshots = _snapshots(size, options.fixtures)
+    latencies = []
+    started = time.perf_counter()
+    for snapshot in _timed_iter(snapshots, latencies):
+        parse_event_html(snapshot["main_html"], markdown_parser=options.markdown_parser)
+    return len(snapshots), time.perf_counter() - started, latencies
+
+
+def _bench_dedup(size, options):
+    from dedup import DedupIndex
+
+    events = _events(size, options.fixtures)
+    index = DedupIndex()
+    latencies = []
+    started = time.perf_counter()
+    for event in _timed_iter(events, latencies):
+        index.add(event)
+    return len(events), time.perf_counter() - started, latencies
+
+
+def _bench_images(size, options):
+    """Probe synthetic images from a local server; only correctly identified images are counted"""
+    from fixtures import ReplayServer, synthetic_images
+    from image_probe import ImageProber
+
+    pages, expected = synthetic_images(size)
+    server = ReplayServer(pages, latency=options.latency_ms / 1000).start()
+    latencies = []
+
+    async def probe():
+        prober = ImageProber(concurrency=options.concurrency)
+
+        async def timed_probe(url):
+            started = time.perf_counter()
+            try:
+                return await prober.probe(url)
+            finally:
+                latencies.append(time.perf_counter() - started)
+
+        urls = [server.url + path for path in expected]
+        return dict(zip(expected, await asyncio.gather(*(timed_probe(url) for url in urls))))
+
+    try:
+        started = time.perf_counter()
+        results = asyncio.run(probe())
+        elapsed = time.perf_counter() - started
+    finally:
+        server.stop()
+    correct = sum(
+        1 for path, info in results.items()
+        if info and (info["mime_type"], info["length"], info["width"], info["height"]) == expected[path]
+    )
+    return correct, elapsed, latencies
+
+
+def _bench_render(size, options):
+    from scrape_amsterdam_events import AmsterdamEventsScraper
+
+    events = _events(size, options.fixtures)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # The whole render command: every feed format, the shards, compression and the manifest
+        scraper = AmsterdamEventsScraper(output_dir=tmp_dir)
+        scraper.events = events
+        started = time.perf_counter()
+        scraper.render_outputs(prune=False, force=True)
+        elapsed = time.perf_counter() - started
+    return len(events), elapsed, []
+
+
+def _run_stage(stage, size, options) -> dict:
+    """Run one benchmark in the current (fresh) process"""
+    import logging
+
+    logging.disable(logging.WARNING)
+    count, elapsed, latencies = globals()[f"_bench_{stage}"](size, options)
+    return {
+        "stage": stage,
+        "size": size,
+        "events": count,
+        "seconds": elapsed,
+        "events_per_second": count / elapsed if elapsed else 0.0,
+        "p50_ms": _percentile(latencies, 0.5) * 1000 if latencies else None,
+        "p95_ms": _percentile(latencies, 0.95) * 1000 if latencies else None,
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def _format_row(result) -> str:
+    def ms(value):
+        return f"{value:9.2f}" if value is not None else f"{'-':>9}"
+
+    return (
+        f"{result['stage']:<8}{result['size']:>7}{result['events']:>8}{result['seconds']:>9.2f}"
+        f"{result['events_per_second']:>11.1f}{ms(result['p50_ms'])}{ms(result['p95_ms'])}"
+        f"{result['peak_rss_mb']:>10.1f}"
+    )
+
+
+def check_startup(budget_ms: float) -> bool:
+    """Time importing the scraper CLI in fresh interpreters and check it loads no heavy modules"""
+    script = (
+        "import json, sys, time; started = time.perf_counter(); import scrape_amsterdam_events; "
+        "elapsed = time.perf_counter() - started; "
+        f"print(json.dumps([elapsed, [m for m in {HEAVY_MODULES!r} if m in sys.modules]]))"
+    )
+    here = os.path.dirname(os.path.abspath(__file__))
+    timings, loaded = [], set()
+    for _ in range(STARTUP_RUNS):
+        output = subprocess.run(
+            [sys.executable, "-c", script], cwd=here, capture_output=True, text=True, check=True
+        ).stdout
+        elapsed, modules = json.loads(output.strip().splitlines()[-1])
+        timings.append(elapsed * 1000)
+        loaded.update(modules)
+
+    median = statistics.median(timings)
+    print(f"CLI import: median {median:.0f} ms over {STARTUP_RUNS} runs (budget {budget_ms:.0f} ms)")
+    ok = median <= budget_ms
+    if loaded:
+        print(f"Heavy modules loaded at import: {', '.join(sorted(loaded))}")
+        ok = False
+    print("OK" if ok else "REGRESSION")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the scrape pipeline offline.")
+    parser.add_argument(
+        "--sizes",
+        default=",".join(str(s) for s in DEFAULT_SIZES),
+        help="Comma-separated numbers of synthetic events (default: 100,1000,10000).",
+    )
+    parser.add_argument(
+        "--stages",
+        default=",".join(STAGES),
+        help=f"Comma-separated stages to run (default: {','.join(STAGES)}).",
+    )
+    parser.add_argument(
+        "--fixtures",
+        metavar="DIR",
+        help="Use pages recorded with scrape_amsterdam_events.py --record instead of a synthetic agenda.",
+    )
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Latency added by the replay server (default: 0).")
+    parser.add_argument(
+        "--translate-latency-ms",
+        type=float,
+        default=0.0,
+        help="Simulated latency of each translation batch (default: 0).",
+    )
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent fetches (default: 16).")
+    parser.add_argument(
+        "--parse-workers",
+        type=int,
+        default=0,
+        help="Parse worker processes for the scrape stage; 0 parses inline (default: 0).",
+    )
+    parser.add_argument("--markdown-parser", action="store_true", help="Benchmark the markitdown parser.")
+    parser.add_argument(
+        "--governor",
+        action="store_true",
+        help="Put fetches under the production rate limiter (measures the limiter, not the pipeline).",
+    )
+    parser.add_argument(
+        "--startup",
+        action="store_true",
+        help="Only check CLI startup time and lazy imports; exits with status 1 on a regression.",
+    )
+    parser.add_argument(
+        "--startup-budget-ms",
+        type=float,
+        default=DEFAULT_STARTUP_BUDGET_MS,
+        help=f"Maximum median import time of the CLI (default: {DEFAULT_STARTUP_BUDGET_MS}).",
+    )
+    options = parser.parse_args()
+
+    if options.startup:
+        raise SystemExit(0 if check_startup(options.startup_budget_ms) else 1)
+
+    sizes = [int(s) for s in options.sizes.split(",") if s.strip()]
+    stages = [s.strip() for s in options.stages.split(",") if s.strip()]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        parser.error(f"unknown stages: {', '.join(sorted(unknown))}")
+
+    print(f"{'stage':<8}{'size':>7}{'events':>8}{'seconds':>9}{'events/s':>11}{'p50 ms':>9}{'p95 ms':>9}{'peak MB':>10}")
+    context = multiprocessing.get_context("spawn")
+    for stage in stages:
+        for size in sizes:
+            # A fresh process per run keeps peak RSS and warm caches from leaking between runs
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                result = pool.submit(_run_stage, stage, size, options).result()
+            print(_format_row(result), flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""
+Full-agenda crawler for iamsterdam.com.
+
+Starting from the agenda, the crawler follows pagination (?page=N) and
+category sub-listings and collects every event detail URL it finds. A URL
+frontier keeps a seen-set of canonical URLs, so no page is fetched twice.
+Listing pages are fetched concurrently under a per-host rate limit.
+"""
+
+import asyncio
+import logging
+import re
+import time
+from urllib.parse import urljoin, urlsplit, parse_qs
+
+from dedup import canonical_link
+
+logger = logging.getLogger(__name__)
+
+AGENDA_URL = "https://www.iamsterdam.com/uit/agenda"
+AGENDA_PATH = "/uit/agenda"
+SITE_HOST = "iamsterdam.com"
+
+DEFAULT_MAX_LISTING_PAGES = 200
+DEFAULT_REQUESTS_PER_SECOND = 2.0
+
+LISTING = "listing"
+DETAIL = "detail"
+
+_AGENDA_HREF_PATTERN = re.compile(r"/uit/agenda")
+
+
+class CrawlError(Exception):
+    """No listing page could be crawled, so the listing is unknown rather than empty."""
+
+
+def classify_url(url: str, site_host: str = SITE_HOST):
+    """Return LISTING, DETAIL or None (not part of the agenda).
+
+    /uit/agenda, /uit/agenda/<category> and /uit/agenda/<category>/<sub> are
+    listings (with optional ?page=N); anything deeper is an event page.
+    """
+    parts = urlsplit(url)
+    host = (parts.hostname or "").lower()
+    if host != site_host and not host.endswith("." + site_host):
+        return None
+    path = parts.path.rstrip("/")
+    if path != AGENDA_PATH and not path.startswith(AGENDA_PATH + "/"):
+        return None
+    depth = len([segment for segment in path[len(AGENDA_PATH):].split("/") if segment])
+    return DETAIL if depth >= 3 else LISTING
+
+
+def agenda_category(url: str):
+    """Category slug of an agenda URL (/uit/agenda/<category>/...), or None"""
+    path = urlsplit(url).path.rstrip("/")
+    if not path.startswith(AGENDA_PATH + "/"):
+        return None
+    return path[len(AGENDA_PATH) + 1:].split("/", 1)[0] or None
+
+
+def _listing_sort_key(url: str) -> tuple:
+    """Deterministic order of listing pages: the main agenda first, then categories, each by page"""
+    parts = urlsplit(url)
+    try:
+        page = int(parse_qs(parts.query).get("page", ["1"])[0])
+    except ValueError:
+        page = 0
+    path = parts.path.rstrip("/")
+    return (path != AGENDA_PATH, path, page)
+
+
+def extract_agenda_links(html: str, base_url: str) -> list[str]:
+    """Absolute URLs of all agenda links on a page, in document order"""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    links = []
+    for anchor in soup.find_all("a", href=_AGENDA_HREF_PATTERN):
+        links.append(urljoin(base_url, anchor["href"]).split("#", 1)[0])
+    return links
+
+
+class HostRateLimiter:
+    """Spaces out requests to the same host to at most `requests_per_second`."""
+
+    def __init__(self, requests_per_second: float = DEFAULT_REQUESTS_PER_SECOND):
+        self.interval = 1.0 / requests_per_second if requests_per_second > 0 else 0.0
+        self._next_slot: dict[str, float] = {}
+
+    async def wait(self, url: str):
+        if not self.interval:
+            return
+        host = urlsplit(url).hostname or ""
+        now = time.monotonic()
+        slot = max(now, self._next_slot.get(host, now))
+        self._next_slot[host] = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+class AgendaCrawler:
+    """Crawls listing pages and collects event detail URLs.
+
+    `fetchers` are async callables url -> html (or None), tried in order
+    until one returns a page with agenda links. This lets a cheap HTTP
+    fetch be backed by a browser render.
+    """
+
+    def __init__(
+        self,
+        fetchers,
+        concurrency: int = 4,
+        max_pages: int = DEFAULT_MAX_LISTING_PAGES,
+        rate_limiter: HostRateLimiter | None = None,
+    ):
+        self.fetchers = list(fetchers)
+        self.concurrency = max(1, concurrency)
+        self.max_pages = max_pages
+        self.rate_limiter = rate_limiter or HostRateLimiter()
+        self._seen: set[str] = set()
+        self._queue: asyncio.Queue = asyncio.Queue()
+        # canonical detail URL -> (listing sort key, position on that listing, URL)
+        self._details: dict[str, tuple] = {}
+        # Taken from the start URL, so a local replay server can stand in for the site
+        self._site_host = SITE_HOST
+        self.pages_fetched = 0
+        self.pages_failed = 0
+
+    def _enqueue(self, url: str) -> bool:
+        key = canonical_link(url)
+        if key in self._seen or len(self._seen) >= self.max_pages:
+            return False
+        self._seen.add(key)
+        self._queue.put_nowait(url)
+        return True
+
+    async def _fetch_links(self, url: str) -> list[str]:
+        for fetch in self.fetchers:
+            await self.rate_limiter.wait(url)
+            html = await fetch(url)
+            if html:
+                links = extract_agenda_links(html, url)
+                if links:
+                    return links
+        return []
+
+    async def _process(self, url: str):
+        try:
+            links = await self._fetch_links(url)
+        except Exception as e:
+            logger.warning(f"Could not crawl listing page {url}: {e}")
+            links = []
+        if not links:
+            self.pages_failed += 1
+            return
+        self.pages_fetched += 1
+
+        listing_key = _listing_sort_key(url)
+        for position, link in enumerate(links):
+            kind = classify_url(link, self._site_host)
+            if kind == LISTING:
+                self._enqueue(link)
+            elif kind == DETAIL:
+                key = canonical_link(link)
+                order = (listing_key, position, link)
+                if key not in self._details or order < self._details[key]:
+                    self._details[key] = order
+
+    async def _worker(self):
+        while True:
+            url = await self._queue.get()
+            try:
+                await self._process(url)
+            finally:
+                self._queue.task_done()
+
+    async def crawl(self, start_url: str = AGENDA_URL, target: int | None = None) -> list[str]:
+        """Crawl from `start_url` and return event URLs in a stable listing order.
+
+        With `target`, crawling stops after the first page if it already
+        yields that many event URLs. Raises CrawlError when listing pages
+        failed and no event URL was found, so a site outage is not taken
+        for an agenda without events.
+        """
+        host = (urlsplit(start_url).hostname or "").lower()
+        self._site_host = host[4:] if host.startswith("www.") else host
+        self._enqueue(start_url)
+        await self._process(await self._queue.get())
+        self._queue.task_done()
+
+        if target is None or len(self._details) < target:
+            workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+            await self._queue.join()
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+        logger.info(
+            f"Crawled {self.pages_fetched} listing pages ({self.pages_failed} failed), "
+            f"found {len(self._details)} event URLs."
+        )
+        if self.pages_failed and not self._details:
+            raise CrawlError(f"no event URLs found; {self.pages_failed} listing pages could not be crawled")
+        return [url for _, _, url in sorted(self._details.values())]
@@ -0,0 +1,392 @@
+"""
+Long-running scraper daemon with a priority refresh schedule.
+
+The daily cron run starts Python, Chromium and the translator from scratch
+and re-scrapes every event at the same priority. The daemon keeps one
+browser, HTTP connection pool, parse pool and translator warm instead, and
+re-checks each event on its own schedule:
+
+- URLs that newly appear on a listing are scraped right away;
+- events starting soon are re-checked often, later ones less often, and
+  past or undated ones rarely (REFRESH_TIERS and the intervals below);
+- the listings themselves are re-crawled every listing interval, which
+  also drops events that are no longer listed.
+
+Refreshed events are upserted into the event store. When something
+changed, the feeds are rendered from the store (and published), at most
+once per render interval. Memory stays bounded over days of uptime: the
+schedule only holds listed URLs (up to max_tracked), events live in the
+store, the browser context is recycled every CONTEXT_RECYCLE_PAGES pages,
+parse workers are replaced after PARSE_WORKER_MAX_TASKS jobs, and the
+translation, page and image caches evict old entries whenever they are
+saved.
+"""
+
+import asyncio
+import heapq
+import itertools
+import json
+import logging
+import os
+import random
+import signal
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from metrics import METRICS
+from occurrences import AMSTERDAM, event_reference_date, parse_occurrences
+from sources import scrape_bounded
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SCHEDULE_FILE = ".cache/daemon-schedule.json"
+DEFAULT_LISTING_INTERVAL = 60 * 60
+DEFAULT_RENDER_INTERVAL = 10 * 60
+DEFAULT_BATCH_SIZE = 50
+DEFAULT_MAX_TRACKED = 20000
+
+HOUR = 60 * 60
+DAY = 24 * HOUR
+# (events starting within, re-check every); the first tier that fits wins
+REFRESH_TIERS = (
+    (timedelta(days=1), HOUR),
+    (timedelta(days=7), 6 * HOUR),
+    (timedelta(days=30), DAY),
+)
+FAR_FUTURE_INTERVAL = 3 * DAY
+PAST_INTERVAL = 7 * DAY
+UNDATED_INTERVAL = DAY
+FAILED_RETRY_INTERVAL = HOUR
+# Intervals are spread by up to this fraction so refreshes do not bunch up
+JITTER = 0.1
+# The feeds are rendered at least this often, so time-window feeds and pruning keep up
+MAX_RENDER_INTERVAL = HOUR
+
+CONTEXT_RECYCLE_PAGES = 500
+PARSE_WORKER_MAX_TASKS = 200
+
+
+def refresh_interval(event, now: datetime) -> float:
+    """Seconds until an event should be re-checked, from how soon its next occurrence starts"""
+    occurrences = parse_occurrences(event.date_text, event_reference_date(event))
+    if not occurrences:
+        return UNDATED_INTERVAL
+    upcoming = [occurrence for occurrence in occurrences if occurrence.end > now]
+    if not upcoming:
+        return PAST_INTERVAL
+    starts_in = upcoming[0].start - now
+    for within, interval in REFRESH_TIERS:
+        if starts_in <= within:
+            return interval
+    return FAR_FUTURE_INTERVAL
+
+
+class RefreshScheduler:
+    """URLs to re-check, ordered by due time (a heap with lazy deletion).
+
+    A URL handed out by pop_due() stays tracked until it is scheduled
+    again or discarded, so a listing crawl does not mistake it for new.
+    """
+
+    def __init__(self, max_tracked: int = DEFAULT_MAX_TRACKED):
+        self.max_tracked = max_tracked
+        self._heap: list[tuple[float, int, str]] = []
+        # url -> (due time or None while being refreshed, heap sequence number, source name)
+        self._entries: dict[str, tuple] = {}
+        self._sequence = itertools.count()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, url):
+        return url in self._entries
+
+    def schedule(self, url: str, source: str, due: float):
+        """(Re)schedule a URL; due 0 puts it ahead of everything else"""
+        if url not in self._entries and len(self._entries) >= self.max_tracked:
+            self._drop_latest()
+        sequence = next(self._sequence)
+        self._entries[url] = (due, sequence, source)
+        heapq.heappush(self._heap, (due, sequence, url))
+        if len(self._heap) > 2 * len(self._entries) + 64:
+            self._compact()
+
+    def discard(self, url: str):
+        self._entries.pop(url, None)
+
+    def retain(self, source: str, urls) -> int:
+        """Stop tracking URLs of `source` that are not in `urls`; returns how many were dropped"""
+        keep = set(urls)
+        dropped = [url for url, (_, _, name) in self._entries.items() if name == source and url not in keep]
+        for url in dropped:
+            del self._entries[url]
+        return len(dropped)
+
+    def pop_due(self, now: float, limit: int) -> list[tuple[str, str]]:
+        """Up to `limit` (url, source) pairs whose due time has come, earliest first"""
+        batch = []
+        while self._heap and self._heap[0][0] <= now and len(batch) < limit:
+            due, sequence, url = heapq.heappop(self._heap)
+            entry = self._entries.get(url)
+            if entry is None or entry[1] != sequence:
+                # Rescheduled or discarded since this heap entry was pushed
+                continue
+            self._entries[url] = (None, sequence, entry[2])
+            batch.append((url, entry[2]))
+        return batch
+
+    def next_due(self):
+        """Due time of the earliest scheduled URL, or None"""
+        while self._heap:
+            due, sequence, url = self._heap[0]
+            entry = self._entries.get(url)
+            if entry is not None and entry[1] == sequence:
+                return due
+            heapq.heappop(self._heap)
+        return None
+
+    def _compact(self):
+        self._heap = [(due, sequence, url) for url, (due, sequence, _) in self._entries.items() if due is not None]
+        heapq.heapify(self._heap)
+
+    def _drop_latest(self):
+        url = max(
+            (url for url, entry in self._entries.items() if entry[0] is not None),
+            key=lambda url: self._entries[url][0],
+            default=None,
+        )
+        if url is not None:
+            del self._entries[url]
+
+    def save(self, path):
+        """Write the schedule; URLs being refreshed are saved as due now"""
+        state = {url: [due or 0, source] for url, (due, _, source) in self._entries.items()}
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, path)
+
+    def load(self, path, sources):
+        """Restore a saved schedule, keeping only URLs of the given source names"""
+        try:
+            with open(path, encoding="utf-8") as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable daemon schedule {path}: {e}")
+            return
+        for url, (due, source) in state.items():
+            if source in sources:
+                self.schedule(url, source, due)
+        logger.info(f"Restored the schedule of {len(self)} event URLs from {path}")
+
+
+class ScraperDaemon:
+    """Keeps the scraper's shared resources open and refreshes events as they come due."""
+
+    def __init__(
+        self,
+        scraper,
+        schedule_file=DEFAULT_SCHEDULE_FILE,
+        listing_interval: float = DEFAULT_LISTING_INTERVAL,
+        render_interval: float = DEFAULT_RENDER_INTERVAL,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        max_tracked: int = DEFAULT_MAX_TRACKED,
+        limit=None,
+        prune: bool = True,
+        publish=None,
+        metrics_file=None,
+        prometheus_file=None,
+    ):
+        # An AmsterdamEventsScraper with an event store
+        self.scraper = scraper
+        self.schedule_file = schedule_file
+        self.listing_interval = listing_interval
+        self.render_interval = render_interval
+        self.batch_size = max(1, batch_size)
+        self.limit = limit
+        self.prune = prune
+        # Optional callable that publishes the rendered files (run in a worker thread)
+        self.publish = publish
+        self.metrics_file = metrics_file
+        self.prometheus_file = prometheus_file
+        self.scheduler = RefreshScheduler(max_tracked)
+        self._sources = {source.name: source for source in scraper.sources}
+        self._browser = None
+        self._context = None
+        self._pages_at_recycle = 0
+        self._next_listing = 0.0
+        self._last_render = 0.0
+        self._dirty = False
+        self._stop = asyncio.Event()
+
+    def stop(self):
+        logger.info("Stopping the daemon after the current batch...")
+        self._stop.set()
+
+    @staticmethod
+    def _jittered(interval: float) -> float:
+        return interval * random.uniform(1 - JITTER, 1 + JITTER)
+
+    async def _discover(self, source):
+        try:
+            with METRICS.stage("discover"):
+                urls = await asyncio.wait_for(source.discover(self._context, self.limit), source.timeout)
+        except asyncio.TimeoutError:
+            METRICS.add_error(f"source_{source.name}")
+            logger.error(f"{source.name}: listing crawl ran out of its {source.timeout:g}s budget")
+            return None
+        except Exception as e:
+            METRICS.add_error(f"source_{source.name}")
+            logger.error(f"{source.name}: listing crawl failed: {e}")
+            return None
+        return urls[:self.limit] if self.limit else urls
+
+    async def crawl_listings(self):
+        """Re-crawl every source's listing: new URLs are due now, unlisted ones are dropped"""
+        sources = list(self._sources.values())
+        outcomes = await asyncio.gather(*(self._discover(source) for source in sources))
+        listed, failed = [], []
+        for source, urls in zip(sources, outcomes):
+            if urls is None:
+                # Keep the source's events and schedule as they were until a crawl succeeds
+                failed.append(source.label)
+                continue
+            new = [url for url in urls if url not in self.scheduler]
+            for url in new:
+                self.scheduler.schedule(url, source.name, 0.0)
+            dropped = self.scheduler.retain(source.name, urls)
+            listed.extend(urls)
+            METRICS.increment("daemon_new_urls", len(new))
+            logger.info(f"{source.name}: {len(urls)} listed, {len(new)} new, {dropped} no longer listed")
+
+        self.scraper.store.mark_listed(listed, keep_sources=failed)
+        # Events that dropped off the listings leave the feed
+        self._dirty = True
+        self.scheduler.save(self.schedule_file)
+        self.scraper.save_caches()
+        self._write_metrics()
+
+    async def refresh(self, batch):
+        """Scrape a batch of due URLs, store the results and schedule each URL's next check"""
+        by_source = {}
+        for url, name in batch:
+            by_source.setdefault(name, []).append(url)
+
+        async def refresh_source(name, urls):
+            source = self._sources[name]
+            results = await scrape_bounded(
+                urls, lambda url: source.scrape_event(self._context, url), source.concurrency
+            )
+            return [(url, name, event) for url, event in zip(urls, results)]
+
+        outcomes = await asyncio.gather(*(refresh_source(name, urls) for name, urls in by_source.items()))
+        now = datetime.now(AMSTERDAM)
+        events = []
+        for url, name, event in itertools.chain.from_iterable(outcomes):
+            if event is None:
+                METRICS.increment("daemon_refresh_failed")
+                self.scheduler.schedule(url, name, time.time() + self._jittered(FAILED_RETRY_INTERVAL))
+                continue
+            events.append(event)
+            self.scheduler.schedule(url, name, time.time() + self._jittered(refresh_interval(event, now)))
+        METRICS.increment("daemon_refreshed", len(events))
+
+        if events:
+            if self.scraper.probe_images:
+                self.scraper.events = events
+                await self.scraper.enrich_images_async()
+            counts = self.scraper.store.upsert(events, record_run=False)
+            if counts["new"] or counts["changed"]:
+                self._dirty = True
+
+    async def render(self):
+        """Render the feeds from the store; publish them if anything was written"""
+        self._last_render = time.time()
+        self._dirty = False
+        self.scraper.load_stored_events()
+        self.scraper.deduplicate_events()
+        if not self.scraper.events:
+            return
+        written = self.scraper.render_outputs(prune=self.prune)
+        if written:
+            logger.info(f"Feed updated with {len(self.scraper.events)} events ({self.scraper.changes.summary()})")
+            if self.publish:
+                await asyncio.to_thread(self.publish)
+
+    async def _recycle_context(self):
+        """Replace the browser context so memory held by past pages is released"""
+        pages = self.scraper.path_counts["playwright"]
+        if pages - self._pages_at_recycle < CONTEXT_RECYCLE_PAGES:
+            return
+        await self._context.close()
+        self._context = await self.scraper.new_browser_context(self._browser)
+        self._pages_at_recycle = pages
+        logger.info(f"Recycled the browser context after {CONTEXT_RECYCLE_PAGES} pages")
+
+    def _write_metrics(self):
+        if self.metrics_file:
+            METRICS.write_json(self.metrics_file)
+        if self.prometheus_file:
+            METRICS.write_prometheus(self.prometheus_file)
+
+    async def _tick(self):
+        if time.time() >= self._next_listing:
+            await self.crawl_listings()
+            self._next_listing = time.time() + self.listing_interval
+
+        batch = self.scheduler.pop_due(time.time(), self.batch_size)
+        if batch:
+            await self.refresh(batch)
+
+        since_render = time.time() - self._last_render
+        if (self._dirty and since_render >= self.render_interval) or since_render >= MAX_RENDER_INTERVAL:
+            await self.render()
+        await self._recycle_context()
+
+    def _seconds_until_next_work(self) -> float:
+        wake = min(self._next_listing, self._last_render + MAX_RENDER_INTERVAL)
+        if self._dirty:
+            wake = min(wake, self._last_render + self.render_interval)
+        next_due = self.scheduler.next_due()
+        if next_due is not None:
+            wake = min(wake, next_due)
+        return max(0.0, wake - time.time())
+
+    async def run(self):
+        """Run until SIGINT or SIGTERM; the schedule is saved on the way out"""
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, self.stop)
+        self.scheduler.load(self.schedule_file, self._sources)
+
+        async with self.scraper.shared_resources(max_tasks_per_child=PARSE_WORKER_MAX_TASKS) as browser:
+            self._browser = browser
+            self._context = await self.scraper.new_browser_context(browser)
+            logger.info(
+                f"Daemon started: {len(self._sources)} sources, listings every {self.listing_interval:g}s, "
+                f"renders at most every {self.render_interval:g}s."
+            )
+            try:
+                while not self._stop.is_set():
+                    try:
+                        await self._tick()
+                    except Exception as e:
+                        # One bad cycle must not end a process that is meant to run for days
+                        METRICS.add_error("daemon")
+                        logger.exception(f"Daemon cycle failed: {e}")
+                        await asyncio.sleep(60)
+                    try:
+                        await asyncio.wait_for(self._stop.wait(), self._seconds_until_next_work())
+                    except asyncio.TimeoutError:
+                        pass
+            finally:
+                self.scheduler.save(self.schedule_file)
+                self.scraper.save_caches()
+                self._write_metrics()
+                await self._context.close()
+        logger.info("Daemon stopped.")
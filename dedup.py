@@ -0,0 +1,132 @@
+"""
+Exact and near-duplicate detection for scraped events.
+
+DedupIndex keeps a hash index of canonicalized links for exact duplicates,
+and a MinHash/LSH index over title + description shingles. The LSH index
+catches the same event listed under a different URL or with a slightly
+different (translated) title. Inserts cost the same no matter how many
+events are already indexed. Every merge is recorded with its reason.
+"""
+
+import hashlib
+import logging
+import random
+import re
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+logger = logging.getLogger(__name__)
+
+# Placeholder descriptions carry no signal and are left out of the shingles
+PLACEHOLDER_DESCRIPTIONS = frozenset({"check website for description."})
+
+# Shingles are runs of this many consecutive words
+SHINGLE_SIZE = 2
+NUM_PERMUTATIONS = 64
+LSH_BANDS = 16
+LSH_ROWS = NUM_PERMUTATIONS // LSH_BANDS
+# Candidates from the LSH buckets must reach this exact Jaccard similarity
+SIMILARITY_THRESHOLD = 0.8
+
+# Each "permutation" XORs the 32-bit shingle hashes with a random mask; this
+# keeps the inner loop in C and is accurate enough for candidate generation.
+_rng = random.Random(1337)  # Fixed seed: signatures must be stable across runs
+_MASKS = [_rng.getrandbits(32) for _ in range(NUM_PERMUTATIONS)]
+
+_NON_ALNUM_PATTERN = re.compile(r"[^0-9a-z]+")
+_TRACKING_PARAM_PREFIXES = ("utm_", "fbclid", "gclid", "mc_")
+
+
+def canonical_link(url) -> str:
+    """Normalize a URL so trivially different forms of the same link compare equal"""
+    parts = urlsplit(str(url).strip())
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    query = urlencode(sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith(_TRACKING_PARAM_PREFIXES)
+    ))
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit(("https", host, path, query, ""))
+
+
+def _shingles(event) -> set:
+    text = event.title or ""
+    if event.description and event.description.strip().lower() not in PLACEHOLDER_DESCRIPTIONS:
+        text += " " + event.description
+    words = _NON_ALNUM_PATTERN.sub(" ", text.lower()).split()
+    if len(words) <= SHINGLE_SIZE:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+
+def _minhash(shingles) -> tuple:
+    hashes = [
+        int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "big")
+        for s in shingles
+    ]
+    return tuple(min(map(mask.__xor__, hashes)) for mask in _MASKS)
+
+
+def _jaccard(a: set, b: set) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class DedupIndex:
+    """Incremental index that decides whether an event duplicates one already kept."""
+
+    def __init__(self, threshold: float = SIMILARITY_THRESHOLD):
+        self.threshold = threshold
+        self.events = []
+        self._links: dict[str, int] = {}
+        self._shingles: list[set] = []
+        self._buckets: dict[tuple, list[int]] = {}
+        self.merges: list[dict] = []
+
+    def _record_merge(self, kept, dropped, reason, similarity=1.0):
+        self.merges.append({
+            "kept": str(kept.link),
+            "dropped": str(dropped.link),
+            "kept_title": kept.title,
+            "dropped_title": dropped.title,
+            "reason": reason,
+            "similarity": round(similarity, 3),
+        })
+        logger.debug(f"Merged duplicate ({reason}, {similarity:.2f}): '{dropped.title}' into '{kept.title}'")
+
+    def add(self, event) -> bool:
+        """Index an event. Returns False (and records why) if it is a duplicate."""
+        link = canonical_link(event.link)
+        existing = self._links.get(link)
+        if existing is not None:
+            self._record_merge(self.events[existing], event, "same-link")
+            return False
+
+        shingles = _shingles(event)
+        band_keys = []
+        if shingles:
+            signature = _minhash(shingles)
+            band_keys = [(band, signature[band * LSH_ROWS:(band + 1) * LSH_ROWS]) for band in range(LSH_BANDS)]
+            candidates = {i for key in band_keys for i in self._buckets.get(key, ())}
+            best, best_similarity = None, 0.0
+            for candidate in candidates:
+                similarity = _jaccard(shingles, self._shingles[candidate])
+                if similarity > best_similarity:
+                    best, best_similarity = candidate, similarity
+            if best is not None and best_similarity >= self.threshold:
+                self._links[link] = best
+                self._record_merge(self.events[best], event, "near-duplicate", best_similarity)
+                return False
+
+        index = len(self.events)
+        self.events.append(event)
+        self._links[link] = index
+        self._shingles.append(shingles)
+        for key in band_keys:
+            self._buckets.setdefault(key, []).append(index)
+        return True
+
+    def __contains__(self, url) -> bool:
+        return canonical_link(url) in self._links
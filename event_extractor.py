@@ -0,0 +1,335 @@
+"""
+Parsing of scraped event pages.
+
+extract_event_fields is a single-pass extractor that reads the date, price
+and description straight from the parsed HTML instead of converting it to
+Markdown and scanning that with regexes. Text is split into lines and
+paragraphs the same way markitdown does it (block elements such as <p> and
+<div> start a paragraph, inline <span> text runs together). That way it
+produces the same fields as the markitdown + regex path in
+parse_event_markdown, which remains the fallback. That path strips the
+Markdown syntax (list bullets, emphasis, links, images, escapes) from the
+fields it returns, so both give plain text.
+
+Everything here is free of scraper state, so it can run in worker processes.
+"""
+
+import io
+import logging
+import re
+
+from bs4 import BeautifulSoup, NavigableString, Tag
+from bs4.element import Comment, Doctype
+
+from metrics import METRICS
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DATE_TEXT = "Check website for dates"
+DEFAULT_PRICE_TEXT = "Check website for prices"
+DEFAULT_DESCRIPTION = "Check website for description."
+
+# Minimum length of a paragraph to be used as the description
+MIN_DESCRIPTION_LENGTH = 80
+
+# Dutch month and day abbreviations mapped to English in one table. Only the
+# months that are spelled differently need an entry; the rest survive the
+# final title-casing unchanged.
+DUTCH_DATE_WORDS = {
+    'mrt': 'mar', 'mei': 'may', 'okt': 'oct',
+    'ma': 'mon', 'di': 'tue', 'wo': 'wed', 'do': 'thu', 'vr': 'fri', 'za': 'sat', 'zo': 'sun',
+}
+# Months are replaced anywhere, days only as whole words
+DUTCH_DATE_WORDS_PATTERN = re.compile(r"mrt|mei|okt|\b(?:ma|di|wo|do|vr|za|zo)\b")
+
+# A line like "di 10 jun" or "10 jun - 12 jun"
+DATE_LINE_PATTERN = re.compile(
+    r"^\s*(\b(di|wo|do|vr|za|zo|ma)\b.*|.*\d{1,2}\s+(jan|feb|mrt|apr|mei|jun|jul|aug|sep|okt|nov|dec).*)$",
+    re.IGNORECASE | re.MULTILINE,
+)
+# A line containing "€", "Gratis" or "Free"
+PRICE_LINE_PATTERN = re.compile(r"^(.*(€|Gratis|Free).*)$", re.IGNORECASE | re.MULTILINE)
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+# Patterns for the Markdown fallback parser, compiled once
+MARKDOWN_DATA_BLOCK_PATTERN = re.compile(r"## Data\n\n(.*?)\n\n##", re.IGNORECASE | re.DOTALL)
+MARKDOWN_HEADER_PATTERN = re.compile(r'^\s*#+.*$', re.MULTILINE)
+MARKDOWN_IMAGE_PATTERN = re.compile(r'!\[.*?\]\(.*?\)')
+MARKDOWN_LINK_PATTERN = re.compile(r'\[(.*?)\]\(.*?\)')
+MARKDOWN_RULE_PATTERN = re.compile(r'^\s*[-*_]{3,}\s*$', re.MULTILINE)
+MARKDOWN_PARAGRAPH_SPLIT_PATTERN = re.compile(r'\n\s*\n')
+MARKDOWN_LIST_MARKER_PATTERN = re.compile(r'^\s*(?:[-*+]|\d+\.)\s+', re.MULTILINE)
+# **strong** and *emphasis*, but not escaped \* characters
+MARKDOWN_EMPHASIS_PATTERN = re.compile(r'(?<![\\*])(\*\*|\*)(?=\S)(.+?)(?<=[^\s\\])\1')
+MARKDOWN_ESCAPE_PATTERN = re.compile(r'\\([\\`*_{}\[\]()#+\-.!])')
+
+
+# Elements that start a new paragraph / a new line, as in markitdown's output
+PARAGRAPH_TAGS = frozenset({
+    "p", "div", "section", "article", "header", "footer", "aside", "nav",
+    "ul", "ol", "blockquote", "pre", "table", "hr", "dl", "figure",
+})
+LINE_TAGS = frozenset({"li", "br", "tr", "dt", "dd"})
+HEADING_LEVELS = {"h1": 1, "h2": 2, "h3": 3, "h4": 4, "h5": 5, "h6": 6}
+SKIPPED_TAGS = frozenset({"script", "style", "noscript", "template", "img", "svg", "picture", "source"})
+
+
+def translate_dutch_date_to_english(date_list: list[str]) -> list[str]:
+    """Translates a list of Dutch date strings to English."""
+    return [
+        DUTCH_DATE_WORDS_PATTERN.sub(lambda m: DUTCH_DATE_WORDS[m.group(0)], date_str.lower()).title()
+        for date_str in date_list
+    ]
+
+
+class _Block:
+    """A heading or a paragraph made of one or more lines"""
+
+    __slots__ = ("level", "lines")
+
+    def __init__(self, level=0):
+        self.level = level  # 0 for paragraphs, 1-6 for headings
+        self.lines = [[]]
+
+    def text_lines(self):
+        lines = (WHITESPACE_PATTERN.sub(" ", "".join(parts)).strip() for parts in self.lines)
+        return [line for line in lines if line]
+
+
+def _collect_blocks(root) -> list[_Block]:
+    """Walk the DOM once and group its text into headings and paragraphs"""
+    blocks = [_Block()]
+
+    def walk(node):
+        for child in node.children:
+            if isinstance(child, NavigableString):
+                if not isinstance(child, (Comment, Doctype)):
+                    blocks[-1].lines[-1].append(str(child))
+                continue
+            if not isinstance(child, Tag) or child.name in SKIPPED_TAGS:
+                continue
+
+            name = child.name
+            if name in HEADING_LEVELS:
+                blocks.append(_Block(HEADING_LEVELS[name]))
+                walk(child)
+                blocks.append(_Block())
+            elif name in PARAGRAPH_TAGS:
+                blocks.append(_Block())
+                walk(child)
+                blocks.append(_Block())
+            elif name in LINE_TAGS:
+                blocks[-1].lines.append([])
+                walk(child)
+                blocks[-1].lines.append([])
+            else:
+                walk(child)
+
+    walk(root)
+    return [block for block in blocks if block.text_lines()]
+
+
+def extract_event_fields(main_html: str):
+    """Extract date_text, price_text and description from <main> inner HTML.
+
+    Returns the same dict as the Markdown parser, or None when the HTML has
+    no text to work with.
+    """
+    root = BeautifulSoup(main_html, "html.parser")
+    blocks = _collect_blocks(root)
+    if not blocks:
+        return None
+
+    data = {
+        "date_text": [DEFAULT_DATE_TEXT],
+        "price_text": DEFAULT_PRICE_TEXT,
+        "description": DEFAULT_DESCRIPTION,
+    }
+
+    # Dates come from the "Data" section when there is one, else from the whole page
+    date_lines = None
+    in_data_section = False
+    all_lines = []
+    for block in blocks:
+        lines = block.text_lines()
+        all_lines.extend(lines)
+        if block.level:
+            if in_data_section and block.level >= 2:
+                in_data_section = False
+            elif block.level == 2 and lines[0].lower() == "data":
+                in_data_section = True
+                date_lines = []
+        elif in_data_section:
+            date_lines.extend(lines)
+
+    dates = []
+    for line in all_lines if date_lines is None else date_lines:
+        match = DATE_LINE_PATTERN.match(line)
+        if match:
+            dates.append(match.group(1).strip())
+    if dates:
+        data["date_text"] = translate_dutch_date_to_english(dates)
+        logger.debug(f"Found {len(dates)} dates: {data['date_text']}")
+
+    for line in all_lines:
+        match = PRICE_LINE_PATTERN.match(line)
+        if match:
+            data["price_text"] = match.group(1).strip()
+            break
+
+    for block in blocks:
+        if block.level:
+            continue
+        paragraph = " ".join(block.text_lines())
+        if len(paragraph) > MIN_DESCRIPTION_LENGTH:
+            data["description"] = paragraph
+            break
+
+    return data
+
+
+def _markdown_to_text(text: str) -> str:
+    """Plain text of a Markdown fragment, as extract_event_fields reads the same HTML"""
+    text = MARKDOWN_IMAGE_PATTERN.sub('', text)
+    text = MARKDOWN_LINK_PATTERN.sub(r'\1', text)
+    text = MARKDOWN_LIST_MARKER_PATTERN.sub('', text)
+    text = MARKDOWN_EMPHASIS_PATTERN.sub(r'\2', text)
+    text = MARKDOWN_ESCAPE_PATTERN.sub(r'\1', text)
+    return WHITESPACE_PATTERN.sub(' ', text).strip()
+
+
+def parse_event_markdown(markdown_text: str) -> dict:
+    """Extract event details from a markdown string using regex."""
+    data = {
+        "date_text": [DEFAULT_DATE_TEXT],
+        "price_text": DEFAULT_PRICE_TEXT,
+        "description": None,
+    }
+
+    # Isolate the "Data" block first to avoid capturing stray dates
+    data_block_match = MARKDOWN_DATA_BLOCK_PATTERN.search(markdown_text)
+
+    search_text = markdown_text # Default to searching the whole text
+    if data_block_match:
+        search_text = data_block_match.group(1)
+        logger.debug("Successfully isolated the 'Data' block for date searching.")
+
+    # Date parsing
+    # Looks for a line like "di 10 jun" or "10 jun - 12 jun"
+    dates_found = DATE_LINE_PATTERN.findall(search_text)
+    if dates_found:
+        # Extract the first group from each tuple in the findall result
+        cleaned_dates = [_markdown_to_text(match[0]) for match in dates_found]
+        # Translate dates to English before returning
+        translated_dates = translate_dutch_date_to_english(cleaned_dates)
+        data["date_text"] = translated_dates
+        logger.debug(f"Found and translated {len(translated_dates)} dates: {translated_dates}")
+
+    # Price parsing
+    # Looks for a line containing "€" or "Gratis"
+    price_match = PRICE_LINE_PATTERN.search(markdown_text)
+    if price_match:
+        data["price_text"] = _markdown_to_text(price_match.group(1))
+        logger.debug(f"Found price: {data['price_text']}")
+
+    # Description parsing
+    # Clean the markdown to remove syntax like links and images before extracting text.
+
+    # Remove headers first
+    clean_text = MARKDOWN_HEADER_PATTERN.sub('', markdown_text)
+
+    # Remove image markdown ![...](...)
+    clean_text = MARKDOWN_IMAGE_PATTERN.sub('', clean_text)
+
+    # Convert markdown links to plain text: [text](url) -> text
+    clean_text = MARKDOWN_LINK_PATTERN.sub(r'\1', clean_text)
+
+    # Remove horizontal rules
+    clean_text = MARKDOWN_RULE_PATTERN.sub('', clean_text)
+
+    # Split into paragraphs and find the first substantive one.
+    paragraphs = MARKDOWN_PARAGRAPH_SPLIT_PATTERN.split(clean_text)
+    description = DEFAULT_DESCRIPTION
+    for p in paragraphs:
+        p_clean = _markdown_to_text(p) # Join lines within a paragraph
+        # A good description should be substantive.
+        if len(p_clean) > MIN_DESCRIPTION_LENGTH:
+            description = p_clean
+            break # Found a good candidate
+
+    # Final cleanup to normalize whitespace
+    data["description"] = WHITESPACE_PATTERN.sub(' ', description).strip()
+
+    return data
+
+
+_markdown_converter = None
+
+
+def _convert_to_markdown(html: str) -> str:
+    """Convert HTML to Markdown with a per-process MarkItDown instance"""
+    global _markdown_converter
+    if _markdown_converter is None:
+        from markitdown import MarkItDown
+
+        _markdown_converter = MarkItDown()
+    # markitdown expects a file-like object, so we use io.BytesIO
+    with METRICS.stage("convert"):
+        return _markdown_converter.convert(io.BytesIO(html.encode('utf-8'))).text_content
+
+
+def parse_event_html(main_content_html: str, markdown_parser: bool = False) -> dict:
+    """Extract the event fields from <main> HTML.
+
+    Uses the direct DOM extractor, falling back to the markitdown + regex
+    path if it fails or when markdown parsing is forced. This is a plain
+    module-level function so it can run in a process pool.
+    """
+    with METRICS.stage("parse"):
+        if not markdown_parser:
+            try:
+                parsed_data = extract_event_fields(main_content_html)
+                if parsed_data:
+                    return parsed_data
+            except Exception as e:
+                logger.warning(f"DOM extraction failed, using markdown parser: {e}")
+            METRICS.increment("markdown_fallbacks")
+
+        return parse_event_markdown(_convert_to_markdown(main_content_html))
+
+
+def snapshot_from_static_html(html: str, page_url: str):
+    """Build a page snapshot from server-rendered HTML.
+
+    Returns None when the static HTML lacks a <main> element or the
+    "Data" (date) block, meaning the page needs a real browser.
+    """
+    soup = BeautifulSoup(html, "html.parser")
+    main = soup.find("main")
+    if main is None:
+        return None
+    if not any(h.get_text(strip=True).lower() == "data" for h in main.find_all("h2")):
+        return None
+
+    def attr(selector, name):
+        element = soup.select_one(selector)
+        return element.get(name) if element else None
+
+    h1 = soup.find("h1")
+    if h1:
+        title = h1.get_text()
+    else:
+        title = soup.title.get_text() if soup.title else ""
+
+    # Same fields and image preference order as the Playwright capture script
+    return {
+        "title": title,
+        "main_html": main.decode_contents(),
+        "images": [
+            attr('meta[property="og:image"]', 'content'),
+            attr('img[src*="thefeedfactory"]', 'src'),
+            attr('article img[src]', 'src'),
+            attr('main img[src]', 'src'),
+        ],
+        "url": page_url,
+    }
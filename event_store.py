@@ -0,0 +1,244 @@
+"""
+SQLite store of every event the scraper has seen.
+
+Rows are keyed by canonical link and keep the event as JSON, plus the
+columns the outputs are queried on:
+- source
+- first-seen / last-seen / last-changed times
+- the start date parsed from the date text
+
+Each run upserts its events. Unchanged rows only get their last_seen
+bumped; new or changed rows are written in full. The feed files are then
+built from a query for the events seen in the latest run. In daemon mode a
+run starts with each listing crawl (mark_listed), and the events refreshed
+after it are upserted into that run. pub_date comes from first_seen, so it
+stays stable across runs instead of being reset to the scrape time. Dates
+without a year are read as of last_changed, when the date text was scraped.
+"""
+
+import hashlib
+import json
+import logging
+import sqlite3
+from datetime import date, datetime, timezone
+from pathlib import Path
+
+from dedup import canonical_link
+from occurrences import parse_occurrences, reference_date
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_FILE = ".cache/events.db"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    link TEXT PRIMARY KEY,
+    source TEXT NOT NULL,
+    title TEXT NOT NULL,
+    start_date TEXT,
+    content_hash TEXT NOT NULL,
+    data TEXT NOT NULL,
+    first_seen TEXT NOT NULL,
+    last_seen TEXT NOT NULL,
+    last_changed TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_events_source ON events (source);
+CREATE INDEX IF NOT EXISTS idx_events_first_seen ON events (first_seen);
+CREATE INDEX IF NOT EXISTS idx_events_last_seen ON events (last_seen);
+CREATE INDEX IF NOT EXISTS idx_events_start_date ON events (start_date);
+CREATE TABLE IF NOT EXISTS runs (
+    started_at TEXT PRIMARY KEY,
+    events INTEGER NOT NULL,
+    new INTEGER NOT NULL,
+    changed INTEGER NOT NULL
+);
+"""
+
+
+def parse_start_date(date_texts, today: date | None = None):
+    """Date of the first occurrence in the scraped date texts (e.g. "Fri 13 Jun 20:00"), or None.
+
+    `today` is the date the year-less texts are read as of: the
+    reference_date() of when they were scraped, as the feeds use too.
+    """
+    occurrences = parse_occurrences(date_texts, today or reference_date(datetime.now(timezone.utc)))
+    return occurrences[0].start.date() if occurrences else None
+
+
+def _content_hash(data: dict) -> str:
+    # pub_date is derived from first_seen, so it must not count as a change
+    payload = {key: value for key, value in data.items() if key != "pub_date"}
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+class EventStore:
+    """Upserts scraped events and answers the queries the outputs are built from."""
+
+    def __init__(self, path=DEFAULT_DB_FILE):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(self.path)
+        self.db.row_factory = sqlite3.Row
+        self.db.executescript(_SCHEMA)
+
+    def upsert(self, events, seen_at: datetime | None = None, keep_sources=(), record_run=True) -> dict:
+        """Record the events of one run. Returns counts of new, changed and unchanged rows.
+
+        Events of the previous run from a source in `keep_sources` (one that
+        failed or timed out this run) are kept current as if seen again.
+        With `record_run` False the events are added to the latest run
+        instead of starting a new one.
+        """
+        seen_time = seen_at or datetime.now(timezone.utc)
+        seen_at = seen_time.isoformat()
+        previous_run = self.last_run()
+        # Dates are read as of this scrape; a written row's last_changed is set to it
+        today = reference_date(seen_time)
+        rows = []
+        for event in events:
+            data = event.model_dump(mode="json")
+            start_date = parse_start_date(data.get("date_text"), today)
+            rows.append((
+                canonical_link(event.link),
+                event.source,
+                event.title,
+                start_date.isoformat() if start_date else None,
+                _content_hash(data),
+                json.dumps(data, ensure_ascii=False),
+                seen_at,
+            ))
+
+        existing = {}
+        links = [row[0] for row in rows]
+        for offset in range(0, len(links), 500):
+            chunk = links[offset:offset + 500]
+            cursor = self.db.execute(
+                f"SELECT link, content_hash FROM events WHERE link IN ({','.join('?' * len(chunk))})", chunk
+            )
+            existing.update(cursor.fetchall())
+
+        counts = {"new": 0, "changed": 0, "unchanged": 0}
+        written, touched = [], []
+        for row in rows:
+            link, content_hash = row[0], row[4]
+            if link not in existing:
+                counts["new"] += 1
+                written.append(row)
+            elif existing[link] != content_hash:
+                counts["changed"] += 1
+                written.append(row)
+            else:
+                counts["unchanged"] += 1
+                touched.append((seen_at, link))
+
+        with self.db:
+            self.db.executemany(
+                """
+                INSERT INTO events (link, source, title, start_date, content_hash, data, first_seen, last_seen, last_changed)
+                VALUES (?1, ?2, ?3, ?4, ?5, ?6, ?7, ?7, ?7)
+                ON CONFLICT (link) DO UPDATE SET
+                    source = excluded.source,
+                    title = excluded.title,
+                    start_date = excluded.start_date,
+                    content_hash = excluded.content_hash,
+                    data = excluded.data,
+                    last_seen = excluded.last_seen,
+                    last_changed = excluded.last_changed
+                """,
+                written,
+            )
+            self.db.executemany("UPDATE events SET last_seen = ? WHERE link = ?", touched)
+            if record_run:
+                self._keep_current(keep_sources, previous_run, seen_at)
+                self.db.execute(
+                    "INSERT OR REPLACE INTO runs (started_at, events, new, changed) VALUES (?, ?, ?, ?)",
+                    (seen_at, len(rows), counts["new"], counts["changed"]),
+                )
+        logger.info(
+            f"Event store: {counts['new']} new, {counts['changed']} changed, "
+            f"{counts['unchanged']} unchanged events ({self.count()} stored)."
+        )
+        return counts
+
+    def mark_listed(self, links, seen_at: datetime | None = None, keep_sources=()):
+        """Start a run from a listing crawl without scraping the events.
+
+        Stored events whose links are listed stay current; events that are
+        no longer listed drop out of current_events(). `keep_sources` works
+        as in upsert().
+        """
+        seen_at = (seen_at or datetime.now(timezone.utc)).isoformat()
+        previous_run = self.last_run()
+        links = list(links)
+        with self.db:
+            self.db.executemany(
+                "UPDATE events SET last_seen = ? WHERE link = ?", [(seen_at, canonical_link(link)) for link in links]
+            )
+            self._keep_current(keep_sources, previous_run, seen_at)
+            self.db.execute(
+                "INSERT OR REPLACE INTO runs (started_at, events, new, changed) VALUES (?, ?, 0, 0)",
+                (seen_at, len(links)),
+            )
+
+    def _keep_current(self, sources, previous_run, seen_at: str):
+        if previous_run:
+            self.db.executemany(
+                "UPDATE events SET last_seen = ? WHERE source = ? AND last_seen >= ? AND last_seen < ?",
+                [(seen_at, source, previous_run, seen_at) for source in sources],
+            )
+
+    def last_run(self):
+        row = self.db.execute("SELECT started_at FROM runs ORDER BY started_at DESC LIMIT 1").fetchone()
+        return row["started_at"] if row else None
+
+    def current_events(self, source: str | None = None) -> list[dict]:
+        """Events seen in the latest run, soonest first.
+
+        pub_date is the first-seen time and dates_as_of the last-changed
+        time, which the year-less dates are read as of.
+        """
+        last_run = self.last_run()
+        if last_run is None:
+            return []
+        query = "SELECT data, first_seen, last_changed FROM events WHERE last_seen >= ?"
+        params = [last_run]
+        if source:
+            query += " AND source = ?"
+            params.append(source)
+        query += " ORDER BY start_date IS NULL, start_date, first_seen, link"
+        events = []
+        for row in self.db.execute(query, params):
+            data = json.loads(row["data"])
+            data["pub_date"] = row["first_seen"]
+            data["dates_as_of"] = row["last_changed"]
+            events.append(data)
+        return events
+
+    def stats(self) -> dict:
+        """Counts for the stats command"""
+        last_run = self.last_run()
+        today = datetime.now(timezone.utc).date().isoformat()
+
+        def one(query, *params):
+            return self.db.execute(query, params).fetchone()[0]
+
+        return {
+            "stored": self.count(),
+            "last_run": last_run,
+            "current": one("SELECT COUNT(*) FROM events WHERE last_seen >= ?", last_run or ""),
+            "new_in_last_run": one("SELECT COUNT(*) FROM events WHERE first_seen >= ?", last_run or ""),
+            "upcoming": one(
+                "SELECT COUNT(*) FROM events WHERE last_seen >= ? AND start_date >= ?", last_run or "", today
+            ),
+            "by_source": dict(self.db.execute(
+                "SELECT source, COUNT(*) FROM events WHERE last_seen >= ? GROUP BY source ORDER BY source",
+                (last_run or "",),
+            ).fetchall()),
+            "runs": one("SELECT COUNT(*) FROM runs"),
+        }
+
+    def count(self) -> int:
+        return self.db.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+
+    def close(self):
+        self.db.close()
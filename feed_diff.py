@@ -0,0 +1,134 @@
+"""
+Semantic diff between the events of this run and the last published ones.
+
+Events are compared by canonical link and a hash of their normalized
+content: whitespace is collapsed, null fields are treated as absent (so a
+snapshot written before a field existed still matches), and pub_date is
+left out, since it says when an event was seen, not what it is. If no
+event was added, removed or updated, the feed files are left untouched,
+so neither git nor the feed readers see a change. Otherwise a compact
+changelog of the differences is written next to the feeds.
+"""
+
+import hashlib
+import json
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+from dedup import canonical_link
+from feed_outputs import atomic_open
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHANGELOG_FILE = "changes.json"
+
+# Fields that do not describe the event itself
+_IGNORED_FIELDS = ("pub_date",)
+
+
+def _normalize(value):
+    if isinstance(value, str):
+        return " ".join(value.split())
+    if isinstance(value, list):
+        return [_normalize(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _normalize(item) for key, item in value.items() if item is not None}
+    return value
+
+
+def normalize_event(data: dict) -> dict:
+    """Comparable form of an event dict (as in events.json)"""
+    return {
+        key: _normalize(value)
+        for key, value in data.items()
+        if key not in _IGNORED_FIELDS and value is not None
+    }
+
+
+def event_fingerprint(data: dict) -> str:
+    payload = json.dumps(normalize_event(data), sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class FeedDiff:
+    added: list[dict] = field(default_factory=list)
+    removed: list[dict] = field(default_factory=list)
+    # {"link", "title", "fields": [names of the fields that changed]}
+    updated: list[dict] = field(default_factory=list)
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.updated)
+
+    def summary(self) -> str:
+        return f"{len(self.added)} added, {len(self.removed)} removed, {len(self.updated)} updated"
+
+    def to_dict(self) -> dict:
+        return {
+            "generated_at": datetime.now(timezone.utc).isoformat(),
+            "summary": self.summary(),
+            "added": self.added,
+            "removed": self.removed,
+            "updated": self.updated,
+        }
+
+
+def _keyed(events: list[dict]) -> dict:
+    return {canonical_link(event["link"]): event for event in events}
+
+
+def diff_events(previous: list[dict], current: list[dict]) -> FeedDiff:
+    """Differences between two event lists, in the order of `current` (removals in the order of `previous`)"""
+    before, after = _keyed(previous), _keyed(current)
+    diff = FeedDiff()
+    for link, event in after.items():
+        old = before.get(link)
+        if old is None:
+            diff.added.append({"link": event["link"], "title": event["title"]})
+        elif event_fingerprint(old) != event_fingerprint(event):
+            old, new = normalize_event(old), normalize_event(event)
+            fields = sorted(key for key in old.keys() | new.keys() if old.get(key) != new.get(key))
+            diff.updated.append({"link": event["link"], "title": event["title"], "fields": fields})
+    for link, event in before.items():
+        if link not in after:
+            diff.removed.append({"link": event["link"], "title": event["title"]})
+    return diff
+
+
+def load_published_events(path) -> list[dict] | None:
+    """Events of the last published snapshot (events.json), or None if there is none"""
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except ValueError as e:
+        logger.warning(f"Ignoring unreadable snapshot {path}: {e}")
+        return None
+
+
+def feed_links(path) -> list[str] | None:
+    """guids of the items in a published RSS feed, or None if it cannot be read"""
+    import xml.etree.ElementTree as ET
+
+    try:
+        return [guid.text for guid in ET.parse(path).getroot().iter("guid")]
+    except (OSError, ET.ParseError):
+        return None
+
+
+def changelog_summary(path=DEFAULT_CHANGELOG_FILE) -> str | None:
+    """One-line summary of the last written changelog, for commit messages"""
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f).get("summary")
+    except (OSError, ValueError):
+        return None
+
+
+def write_changelog(diff: FeedDiff, path=DEFAULT_CHANGELOG_FILE):
+    with atomic_open(path) as f:
+        json.dump(diff.to_dict(), f, indent=2, ensure_ascii=False)
+        f.write("\n")
+    logger.info(f"Feed changes ({diff.summary()}) written to {path}")
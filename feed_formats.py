@@ -0,0 +1,100 @@
+"""
+Atom 1.0 and JSON Feed 1.1 versions of the event feed.
+
+Both writers take the same arguments as rss_writer.write_rss_feed and
+stream one entry at a time into a temporary file that replaces the output
+once it is complete.
+"""
+
+import json
+
+from feed_outputs import atomic_open
+from rss_writer import TEXT_ESCAPES, enclosure, xml_attrs, xml_text
+
+ATOM_NS = "http://www.w3.org/2005/Atom"
+JSON_FEED_VERSION = "https://jsonfeed.org/version/1.1"
+
+
+def _html(tag: str, html: str) -> str:
+    # Atom carries HTML as escaped text in a type="html" element
+    return f'<{tag} type="html">{html.translate(TEXT_ESCAPES)}</{tag}>'
+
+
+def render_atom_entry(event, html_content: str) -> str:
+    """Render one <entry> element"""
+    updated = event.pub_date.isoformat()
+    parts = [
+        "<entry>",
+        xml_text("title", event.title),
+        xml_text("id", event.link),
+        f"<link{xml_attrs({'rel': 'alternate', 'href': event.link})} />",
+        xml_text("published", updated),
+        xml_text("updated", updated),
+        f"<author>{xml_text('name', event.source)}</author>",
+    ]
+    if event.description:
+        parts.append(xml_text("summary", event.description))
+    parts.append(_html("content", html_content))
+    for tag in event.tags:
+        parts.append(f"<category{xml_attrs({'term': tag})} />")
+    if event.image:
+        attributes = enclosure(event)
+        link = {"rel": "enclosure", "href": attributes["url"], "type": attributes["type"]}
+        if attributes["length"] != "0":
+            link["length"] = attributes["length"]
+        parts.append(f"<link{xml_attrs(link)} />")
+    parts.append("</entry>")
+    return "".join(parts)
+
+
+def write_atom_feed(events, output_file: str, channel: dict, render_content):
+    """Stream an Atom feed; `channel` is the same dict write_rss_feed takes"""
+    with atomic_open(output_file) as f:
+        f.write(f'<?xml version="1.0" encoding="utf-8"?><feed xmlns="{ATOM_NS}"{xml_attrs({"xml:lang": channel["language"]})}>')
+        f.write(xml_text("title", channel["title"]))
+        f.write(xml_text("subtitle", channel["description"]))
+        f.write(xml_text("id", channel["link"]))
+        f.write(f"<link{xml_attrs({'rel': 'self', 'href': channel['link'], 'type': 'application/atom+xml'})} />")
+        f.write(xml_text("updated", channel["last_build_date"].isoformat()))
+        f.write(xml_text("generator", channel["generator"]))
+
+        for event in events:
+            f.write(render_atom_entry(event, render_content(event)))
+
+        f.write("</feed>")
+
+
+def render_json_feed_item(event, html_content: str) -> dict:
+    item = {
+        "id": str(event.link),
+        "url": str(event.link),
+        "title": event.title,
+        "content_html": html_content,
+        "date_published": event.pub_date.isoformat(),
+    }
+    if event.description:
+        item["summary"] = event.description
+    if event.image:
+        item["image"] = str(event.image)
+    if event.tags:
+        item["tags"] = list(event.tags)
+    return item
+
+
+def write_json_feed(events, output_file: str, channel: dict, render_content):
+    """Stream a JSON Feed; `channel` is the same dict write_rss_feed takes"""
+    header = {
+        "version": JSON_FEED_VERSION,
+        "title": channel["title"],
+        "feed_url": channel["link"],
+        "description": channel["description"],
+        "language": channel["language"],
+    }
+    with atomic_open(output_file) as f:
+        # Everything but the closing "}" of the header, followed by the items array
+        f.write(json.dumps(header, ensure_ascii=False)[:-1] + ', "items": [')
+        for number, event in enumerate(events):
+            if number:
+                f.write(",")
+            f.write(json.dumps(render_json_feed_item(event, render_content(event)), ensure_ascii=False))
+        f.write("]}")
@@ -0,0 +1,299 @@
+"""
+Record/replay fixtures for running the scraper offline.
+
+In record mode the scraper saves every listing and event page it loads,
+plus the translator's responses, into a fixture directory. ReplayServer
+serves those pages back over local HTTP with a configurable latency, and
+ReplayBackend answers translations from the recording. Together they let a
+full scrape (and the benchmarks in benchmark.py) run without touching the
+live site. synthetic_site() builds an agenda of any size for the same server,
+and synthetic_images() a set of images for the image prober. The server
+answers HEAD and single-range GET requests like a CDN would.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import struct
+import zlib
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from translation import TranslationBackend
+
+logger = logging.getLogger(__name__)
+
+HTML_CONTENT_TYPE = "text/html; charset=utf-8"
+
+SYNTHETIC_EVENTS_PER_PAGE = 20
+_SYNTHETIC_CATEGORIES = ("muziek", "theater", "exposities", "film", "festivals")
+_SYNTHETIC_DAYS = ("ma", "di", "wo", "do", "vr", "za", "zo")
+_SYNTHETIC_WORDS = (
+    "optredens", "ontmoetingen", "makers", "stad", "muziek", "dans", "avond", "middag", "kunst", "gasten",
+    "premiere", "jazz", "klassiek", "jeugd", "familie", "wandeling", "rondleiding", "markt", "lezing", "debat",
+    "zomer", "winter", "grachten", "museum", "podium", "festival", "film", "drank", "eten", "verhalen",
+)
+_SYNTHETIC_IMAGE_BYTES = 48 * 1024
+_RANGE_PATTERN = re.compile(r"bytes=(\d*)-(\d*)$")
+_SYNTHETIC_MONTHS = ("jan", "feb", "mrt", "apr", "mei", "jun", "jul", "aug", "sep", "okt", "nov", "dec")
+
+
+def _path_key(url: str) -> str:
+    """Host-independent key of a URL: its path plus query string"""
+    parts = urlsplit(url)
+    return (parts.path or "/") + ("?" + parts.query if parts.query else "")
+
+
+class FixtureStore:
+    """Directory of recorded pages (pages/ + index.json) and translations (translations.json)."""
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self._lock = threading.Lock()
+        self.index: dict[str, dict] = self._load_json("index.json")
+        self.translations: dict[str, str] = self._load_json("translations.json")
+
+    def _load_json(self, name):
+        try:
+            with open(self.root / name, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def _write_json(self, name, data):
+        tmp_path = self.root / (name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.root / name)
+
+    def record_page(self, url: str, body: str, status: int = 200, content_type: str = HTML_CONTENT_TYPE):
+        """Save a page body; safe to call from fetcher threads"""
+        key = _path_key(url)
+        file_name = hashlib.sha256(key.encode("utf-8")).hexdigest()[:32] + ".html"
+        (self.root / "pages").mkdir(parents=True, exist_ok=True)
+        with open(self.root / "pages" / file_name, "w", encoding="utf-8") as f:
+            f.write(body)
+        with self._lock:
+            self.index[key] = {"url": url, "file": file_name, "status": status, "content_type": content_type}
+
+    @staticmethod
+    def _translation_key(text: str, to_language: str) -> str:
+        return to_language + ":" + hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def record_translation(self, text: str, to_language: str, translation: str):
+        with self._lock:
+            self.translations[self._translation_key(text, to_language)] = translation
+
+    def recorded_translation(self, text: str, to_language: str):
+        return self.translations.get(self._translation_key(text, to_language))
+
+    def save(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            self._write_json("index.json", self.index)
+            self._write_json("translations.json", self.translations)
+        logger.info(f"Recorded {len(self.index)} pages and {len(self.translations)} translations to {self.root}")
+
+    def load_pages(self) -> dict:
+        """Map of path+query to (status, content type, body bytes) for ReplayServer"""
+        pages = {}
+        for key, entry in self.index.items():
+            body = (self.root / "pages" / entry["file"]).read_bytes()
+            pages[key] = (entry["status"], entry["content_type"], body)
+        return pages
+
+
+def _synthetic_words(index: int, count: int = 12) -> str:
+    # Distinct text per event, so synthetic pages are not near-duplicates of each other
+    rng = random.Random(index)
+    return " ".join(rng.choice(_SYNTHETIC_WORDS) for _ in range(count))
+
+
+def _synthetic_event_page(index: int) -> str:
+    category = _SYNTHETIC_CATEGORIES[index % len(_SYNTHETIC_CATEGORIES)]
+    day = _SYNTHETIC_DAYS[index % 7]
+    month = _SYNTHETIC_MONTHS[index % 12]
+    return (
+        "<!DOCTYPE html><html><head>"
+        f"<title>Evenement {index} | I amsterdam</title>"
+        f'<meta property="og:image" content="https://cdn.thefeedfactory.nl/images/{index}.jpg">'
+        "</head><body><main><article>"
+        f"<h1>Evenement {index}: {category} in Amsterdam</h1>"
+        f"<p>Evenement {index} is een {category}-programma met {_synthetic_words(index)}. "
+        "Een beschrijving die ruim langer is dan tachtig tekens.</p>"
+        f"<h2>Data</h2><ul><li>{day} {index % 28 + 1} {month} 20:00 - 22:30</li>"
+        f"<li>{day} {(index + 7) % 28 + 1} {month} 14:00</li></ul>"
+        f"<h2>Prijs</h2><p>Prijs: \u20ac {10 + index % 40},50</p>"
+        "</article></main></body></html>"
+    )
+
+
+def synthetic_site(num_events: int, per_page: int = SYNTHETIC_EVENTS_PER_PAGE):
+    """Pages for ReplayServer: a paginated agenda linking to `num_events` event pages.
+
+    Returns (pages, event paths), with event paths in listing order.
+    """
+    pages = {}
+    event_paths = []
+    num_listing_pages = max(1, -(-num_events // per_page))
+    for page_number in range(1, num_listing_pages + 1):
+        links = []
+        for index in range((page_number - 1) * per_page, min(num_events, page_number * per_page)):
+            category = _SYNTHETIC_CATEGORIES[index % len(_SYNTHETIC_CATEGORIES)]
+            path = f"/uit/agenda/{category}/evenement-{index}/{index}"
+            event_paths.append(path)
+            links.append(f'<a href="{path}">Evenement {index}</a>')
+            pages[path] = (200, HTML_CONTENT_TYPE, _synthetic_event_page(index).encode("utf-8"))
+        if page_number < num_listing_pages:
+            links.append(f'<a href="/uit/agenda?page={page_number + 1}">Volgende</a>')
+        body = f"<html><body><main>{''.join(links)}</main></body></html>".encode("utf-8")
+        pages["/uit/agenda" if page_number == 1 else f"/uit/agenda?page={page_number}"] = (200, HTML_CONTENT_TYPE, body)
+    return pages, event_paths
+
+
+def _synthetic_png(width: int, height: int) -> bytes:
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header)
+
+
+def _synthetic_jpeg(width: int, height: int) -> bytes:
+    app0 = b"\xff\xe0" + struct.pack(">H", 16) + b"JFIF\x00\x01\x01\x00\x00\x01\x00\x01\x00\x00"
+    # An EXIF-sized segment before the frame header, as in camera images
+    app1 = b"\xff\xe1" + struct.pack(">H", 2 + 4000) + b"\x00" * 4000
+    sof0 = b"\xff\xc0" + struct.pack(">HBHHB", 11, 8, height, width, 1) + b"\x01\x11\x00"
+    return b"\xff\xd8" + app0 + app1 + sof0
+
+
+def synthetic_images(count: int):
+    """Images for ReplayServer: PNGs and JPEGs of varying dimensions, padded to a realistic size.
+
+    Returns (pages, {path: (MIME type, byte length, width, height)}).
+    """
+    pages, expected = {}, {}
+    for index in range(count):
+        width, height = 640 + index % 17 * 40, 360 + index % 11 * 30
+        if index % 2:
+            path, mime_type, header = f"/images/{index}.png", "image/png", _synthetic_png(width, height)
+        else:
+            path, mime_type, header = f"/images/{index}.jpg", "image/jpeg", _synthetic_jpeg(width, height)
+        body = header + b"\x00" * (_SYNTHETIC_IMAGE_BYTES + index - len(header))
+        pages[path] = (200, mime_type, body)
+        expected[path] = (mime_type, len(body), width, height)
+    return pages, expected
+
+
+def _byte_range(header, size: int):
+    """(first, last) byte of a single "bytes=a-b" Range header, or None to send the whole body"""
+    match = _RANGE_PATTERN.match(header or "")
+    if not match or size == 0 or not any(match.groups()):
+        return None
+    first, last = match.groups()
+    if not first:
+        # Suffix range: the last N bytes
+        return max(0, size - int(last)), size - 1
+    first = int(first)
+    if first >= size:
+        return None
+    return first, min(size - 1, int(last)) if last else size - 1
+
+
+class RecordingBackend(TranslationBackend):
+    """Wraps a translation backend and records its answers into a FixtureStore."""
+
+    def __init__(self, inner: TranslationBackend, store: FixtureStore):
+        self.inner = inner
+        self.store = store
+        self.name = inner.name
+
+    def translate_batch(self, texts, to_language):
+        results = self.inner.translate_batch(texts, to_language)
+        for text, result in zip(texts, results):
+            self.store.record_translation(text, to_language, result)
+        return results
+
+
+class ReplayBackend(TranslationBackend):
+    """Answers translations from a FixtureStore; unknown texts come back unchanged."""
+
+    name = "replay"
+
+    def __init__(self, store: FixtureStore):
+        self.store = store
+
+    def translate_batch(self, texts, to_language):
+        return [self.store.recorded_translation(t, to_language) or t for t in texts]
+
+
+class ReplayServer:
+    """Local HTTP server that serves recorded (or synthetic) pages with added latency."""
+
+    def __init__(self, pages: dict, latency: float = 0.0, host: str = "127.0.0.1", port: int = 0):
+        self.pages = pages
+        self.latency = latency
+        self.requests_served = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body go out in separate writes; avoid the Nagle/delayed-ACK stall
+            disable_nagle_algorithm = True
+
+            def _respond(self, send_body: bool):
+                if server.latency:
+                    time.sleep(server.latency)
+                server.requests_served += 1
+                page = server.pages.get(self.path)
+                if page is None:
+                    status, content_type, body = 404, HTML_CONTENT_TYPE, b"<html><body>Not found</body></html>"
+                else:
+                    status, content_type, body = page
+                byte_range = _byte_range(self.headers.get("Range"), len(body)) if status == 200 else None
+                if byte_range:
+                    first, last = byte_range
+                    status, total, body = 206, len(body), body[first:last + 1]
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("Accept-Ranges", "bytes")
+                if byte_range:
+                    self.send_header("Content-Range", f"bytes {first}-{last}/{total}")
+                self.end_headers()
+                if send_body:
+                    self.wfile.write(body)
+
+            def do_GET(self):
+                self._respond(send_body=True)
+
+            def do_HEAD(self):
+                self._respond(send_body=False)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer((host, port), Handler)
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        logger.info(f"Replay server with {len(self.pages)} pages listening on {self.url}")
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
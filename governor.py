@@ -0,0 +1,233 @@
+"""
+Shared governor for outbound calls (page fetches and translations).
+
+Each remote (an HTTP host, or a translation backend) gets:
+
+- an adaptive token bucket. The rate creeps up while calls are fast and
+  healthy, and is cut back on slow responses, 429s and 5xx errors;
+- jittered exponential retry for retryable failures, honouring Retry-After;
+- a circuit breaker. After repeated failures, calls are rejected at once
+  for a cool-down period instead of piling up on timeouts.
+"""
+
+import asyncio
+import logging
+import random
+import time
+from collections import Counter, defaultdict
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INITIAL_RATE = 4.0
+DEFAULT_MIN_RATE = 0.2
+DEFAULT_MAX_RATE = 50.0
+DEFAULT_BURST = 4
+# Responses slower than this stop the rate from increasing
+DEFAULT_TARGET_LATENCY = 2.0
+
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BASE_BACKOFF = 1.0
+DEFAULT_MAX_BACKOFF = 30.0
+
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RESET_TIMEOUT = 60.0
+
+
+class RetryableError(Exception):
+    """A failure worth retrying (timeouts, connection errors, 5xx)."""
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class ThrottledError(RetryableError):
+    """The remote side asked us to slow down (429, 503)."""
+
+
+class CircuitOpenError(Exception):
+    """The circuit breaker for this remote is open; the call was not made."""
+
+
+def host_key(url: str) -> str:
+    return (urlsplit(url).hostname or "").lower()
+
+
+def parse_retry_after(value):
+    """Seconds from a Retry-After header (only the delta-seconds form is supported)"""
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def raise_for_status(status: int, retry_after=None, url=""):
+    """Turn throttling and server-error status codes into governor exceptions"""
+    if status in (429, 503):
+        raise ThrottledError(f"HTTP {status} from {url}", parse_retry_after(retry_after))
+    if status >= 500:
+        raise RetryableError(f"HTTP {status} from {url}")
+
+
+class AdaptiveTokenBucket:
+    """Token bucket whose refill rate follows observed latency and throttling (AIMD)."""
+
+    def __init__(
+        self,
+        rate=DEFAULT_INITIAL_RATE,
+        min_rate=DEFAULT_MIN_RATE,
+        max_rate=DEFAULT_MAX_RATE,
+        burst=DEFAULT_BURST,
+        target_latency=DEFAULT_TARGET_LATENCY,
+    ):
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = burst
+        self.target_latency = target_latency
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    async def acquire(self):
+        # Tokens may go negative: each caller reserves its slot and sleeps until it arrives
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        if self.tokens < 0:
+            await asyncio.sleep(-self.tokens / self.rate)
+
+    def on_success(self, latency: float):
+        if latency <= self.target_latency:
+            self.rate = min(self.max_rate, self.rate + 0.5)
+        elif latency > 2 * self.target_latency:
+            self.rate = max(self.min_rate, self.rate * 0.9)
+
+    def on_error(self):
+        self.rate = max(self.min_rate, self.rate * 0.8)
+
+    def on_throttle(self):
+        self.rate = max(self.min_rate, self.rate * 0.5)
+
+
+class CircuitBreaker:
+    """Closed -> open after consecutive failures -> half-open trial after a cool-down."""
+
+    def __init__(self, failure_threshold=DEFAULT_FAILURE_THRESHOLD, reset_timeout=DEFAULT_RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half-open" and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+
+    def release(self):
+        """Forget a half-open trial whose outcome says nothing about the remote"""
+        self._trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._trial_in_flight = False
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+
+class OutboundGovernor:
+    """Rate limits, retries and circuit-breaks outbound calls, per remote key."""
+
+    def __init__(
+        self,
+        max_retries=DEFAULT_MAX_RETRIES,
+        base_backoff=DEFAULT_BASE_BACKOFF,
+        max_backoff=DEFAULT_MAX_BACKOFF,
+        bucket_factory=AdaptiveTokenBucket,
+        breaker_factory=CircuitBreaker,
+    ):
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.buckets = defaultdict(bucket_factory)
+        self.breakers = defaultdict(breaker_factory)
+        self.stats: dict[str, Counter] = defaultdict(Counter)
+
+    def _backoff(self, attempt: int, retry_after=None) -> float:
+        delay = min(self.max_backoff, self.base_backoff * 2 ** attempt) * random.uniform(0.5, 1.5)
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_backoff))
+        return delay
+
+    async def call(self, key: str, func, *args, retry_on=(RetryableError,)):
+        """Await func(*args) under the governor for `key`.
+
+        Exceptions in `retry_on` are retried with backoff; the last one is
+        re-raised once retries run out. Raises CircuitOpenError without
+        calling func while the breaker for `key` is open.
+        """
+        bucket = self.buckets[key]
+        breaker = self.breakers[key]
+        stats = self.stats[key]
+
+        for attempt in range(self.max_retries + 1):
+            if not breaker.allow():
+                stats["rejected"] += 1
+                raise CircuitOpenError(f"Circuit open for {key}")
+
+            await bucket.acquire()
+            stats["calls"] += 1
+            started = time.monotonic()
+            try:
+                result = await func(*args)
+            except retry_on as e:
+                breaker.record_failure()
+                if isinstance(e, ThrottledError):
+                    stats["throttled"] += 1
+                    bucket.on_throttle()
+                else:
+                    stats["errors"] += 1
+                    bucket.on_error()
+                if attempt >= self.max_retries:
+                    stats["gave_up"] += 1
+                    raise
+                stats["retries"] += 1
+                delay = self._backoff(attempt, getattr(e, "retry_after", None))
+                logger.info(f"{key}: {e}; retrying in {delay:.1f}s (attempt {attempt + 2}/{self.max_retries + 1})")
+                await asyncio.sleep(delay)
+                continue
+            except BaseException:
+                breaker.release()
+                raise
+
+            breaker.record_success()
+            bucket.on_success(time.monotonic() - started)
+            return result
+
+    def log_summary(self):
+        for key, stats in sorted(self.stats.items()):
+            logger.info(
+                f"Outbound {key}: {stats['calls']} calls, {stats['retries']} retries, "
+                f"{stats['throttled']} throttled, {stats['errors']} errors, "
+                f"{stats['gave_up']} gave up, {stats['rejected']} rejected by circuit breaker; "
+                f"final rate {self.buckets[key].rate:.1f}/s"
+            )
@@ -0,0 +1,84 @@
+"""
+Async, connection-pooled HTTP fetcher for server-rendered event pages.
+
+Built on the scraper's requests.Session: blocking requests run in worker
+threads, and the session keeps one pool of keep-alive connections per
+host sized to the scraper's concurrency.
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Mapping
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from governor import CircuitOpenError, RetryableError, host_key, raise_for_status
+from metrics import METRICS
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = 20
+
+
+@dataclass
+class FetchResult:
+    """A fetched page"""
+    url: str
+    status: int
+    text: str
+    headers: Mapping[str, str] = field(default_factory=dict)
+
+
+class HttpFetcher:
+    """Fetches pages concurrently through a shared requests.Session."""
+
+    def __init__(
+        self,
+        session: requests.Session,
+        concurrency: int,
+        timeout: float = DEFAULT_TIMEOUT,
+        governor=None,
+        recorder=None,
+    ):
+        self.session = session
+        # Optional OutboundGovernor providing rate limiting, retries and circuit breaking
+        self.governor = governor
+        # Optional fixtures.FixtureStore that keeps a copy of every successful response
+        self.recorder = recorder
+        self.timeout = timeout
+        self._semaphore = asyncio.Semaphore(max(1, concurrency))
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(1, concurrency))
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def _get(self, url: str, headers=None) -> FetchResult:
+        with METRICS.stage("http_fetch"):
+            try:
+                response = self.session.get(url, headers=headers, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                raise RetryableError(str(e)) from e
+            METRICS.add_bytes("http_fetch", len(response.content))
+            raise_for_status(response.status_code, response.headers.get("Retry-After"), url)
+        if self.recorder and response.status_code == 200:
+            self.recorder.record_page(
+                response.url, response.text, content_type=response.headers.get("Content-Type", "text/html")
+            )
+        return FetchResult(
+            url=response.url,
+            status=response.status_code,
+            text=response.text,
+            headers=response.headers,
+        )
+
+    async def fetch(self, url: str, headers=None):
+        """GET a URL off the event loop. Returns None on network and server errors."""
+        async with self._semaphore:
+            try:
+                if self.governor:
+                    return await self.governor.call(host_key(url), asyncio.to_thread, self._get, url, headers)
+                return await asyncio.to_thread(self._get, url, headers)
+            except (requests.RequestException, RetryableError, CircuitOpenError) as e:
+                logger.warning(f"HTTP fetch failed for {url}: {e}")
+                return None
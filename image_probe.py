@@ -0,0 +1,258 @@
+"""
+Concurrent prober for event images, with a persistent metadata cache.
+
+Feed enclosures need the image's real MIME type and byte length, and
+Media RSS can carry its dimensions. Each image URL is probed with a single
+ranged GET for the first PROBE_BYTES. The Content-Range (or Content-Length)
+header gives the full size, and the MIME type and dimensions are read from
+the image header in those bytes. Servers that ignore Range are read only up
+to the same limit. Results are cached per URL with a TTL, so an image is
+probed once across runs. requests is imported by the prober, so the CLI can
+read this module's defaults without loading the HTTP stack.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import re
+import struct
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from governor import CircuitOpenError, RetryableError, host_key, raise_for_status
+from metrics import METRICS
+
+if TYPE_CHECKING:
+    import requests
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_FILE = ".cache/images.json"
+DEFAULT_CONCURRENCY = 8
+DEFAULT_TIMEOUT = 15
+DEFAULT_MAX_AGE_DAYS = 30
+# Failed probes are retried sooner, in case the image was only briefly unavailable
+DEFAULT_FAILED_MAX_AGE_DAYS = 1
+# Enough for the header of PNG, GIF and WebP, and for the frame header of nearly all JPEGs
+PROBE_BYTES = 32 * 1024
+
+_CONTENT_RANGE_PATTERN = re.compile(r"bytes\s+\d+-\d+/(\d+)")
+# JPEG start-of-frame markers; C4 (DHT), C8 (JPG) and CC (DAC) share the range but are not frames
+_JPEG_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+def _jpeg_size(data: bytes):
+    offset = 2
+    while offset + 9 <= len(data):
+        if data[offset] != 0xFF:
+            return None
+        marker = data[offset + 1]
+        if marker == 0xFF:
+            # Fill byte
+            offset += 1
+            continue
+        if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7:
+            # Markers without a length field
+            offset += 2
+            continue
+        segment_length = struct.unpack(">H", data[offset + 2:offset + 4])[0]
+        if marker in _JPEG_SOF_MARKERS:
+            height, width = struct.unpack(">HH", data[offset + 5:offset + 9])
+            return width, height
+        offset += 2 + segment_length
+    return None
+
+
+def sniff_image(data: bytes):
+    """(MIME type, width, height) from the first bytes of an image; unknown parts are None"""
+    if data.startswith(b"\x89PNG\r\n\x1a\n") and len(data) >= 24:
+        width, height = struct.unpack(">II", data[16:24])
+        return "image/png", width, height
+    if data[:6] in (b"GIF87a", b"GIF89a") and len(data) >= 10:
+        width, height = struct.unpack("<HH", data[6:10])
+        return "image/gif", width, height
+    if data.startswith(b"\xff\xd8"):
+        size = _jpeg_size(data)
+        return ("image/jpeg",) + (size or (None, None))
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP" and len(data) >= 30:
+        chunk = data[12:16]
+        if chunk == b"VP8 ":
+            width, height = struct.unpack("<HH", data[26:30])
+            return "image/webp", width & 0x3FFF, height & 0x3FFF
+        if chunk == b"VP8L":
+            bits = int.from_bytes(data[21:25], "little")
+            return "image/webp", (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+        if chunk == b"VP8X":
+            width = int.from_bytes(data[24:27], "little") + 1
+            height = int.from_bytes(data[27:30], "little") + 1
+            return "image/webp", width, height
+        return "image/webp", None, None
+    return None, None, None
+
+
+class ImageMetadataCache:
+    """Persistent map of image URL to probed metadata, with TTL eviction."""
+
+    def __init__(
+        self,
+        path=DEFAULT_CACHE_FILE,
+        max_age_days=DEFAULT_MAX_AGE_DAYS,
+        failed_max_age_days=DEFAULT_FAILED_MAX_AGE_DAYS,
+    ):
+        self.path = Path(path)
+        self.max_age_seconds = max_age_days * 24 * 3600
+        self.failed_max_age_seconds = failed_max_age_days * 24 * 3600
+        self.entries: dict[str, dict] = {}
+        self.dirty = False
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                self.entries = json.load(f)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable image cache {self.path}: {e}")
+
+    def _expired(self, entry, now) -> bool:
+        max_age = self.max_age_seconds if entry.get("info") else self.failed_max_age_seconds
+        return now - entry.get("probed_at", 0) > max_age
+
+    def get(self, url: str):
+        """The cached entry ({"info": dict or None, "probed_at": ...}) for a URL, or None"""
+        entry = self.entries.get(url)
+        if entry is None or self._expired(entry, time.time()):
+            return None
+        return entry
+
+    def put(self, url: str, info):
+        """Store the metadata of a probed image; None records a failed probe"""
+        self.entries[url] = {"info": info, "probed_at": time.time()}
+        self.dirty = True
+
+    def evict(self):
+        """Drop expired entries"""
+        now = time.time()
+        expired = [url for url, entry in self.entries.items() if self._expired(entry, now)]
+        for url in expired:
+            del self.entries[url]
+        if expired:
+            self.dirty = True
+            logger.info(f"Image cache: evicted {len(expired)} expired entries")
+
+    def save(self):
+        """Evict expired entries and write the cache to disk if anything changed"""
+        self.evict()
+        if not self.dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f)
+        os.replace(tmp_path, self.path)
+        self.dirty = False
+
+
+class ImageProber:
+    """Probes image URLs concurrently through one pooled requests.Session."""
+
+    def __init__(
+        self,
+        session: "requests.Session | None" = None,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        timeout: float = DEFAULT_TIMEOUT,
+        governor=None,
+        cache: ImageMetadataCache | None = None,
+    ):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.session = session or requests.Session()
+        self.timeout = timeout
+        # Optional OutboundGovernor providing rate limiting, retries and circuit breaking
+        self.governor = governor
+        self.cache = cache
+        self.stats = {"cache_hits": 0, "probed": 0, "failed": 0}
+        self._semaphore = asyncio.Semaphore(max(1, concurrency))
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(1, concurrency))
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def _probe(self, url: str):
+        import requests
+
+        with METRICS.stage("image_probe"):
+            try:
+                response = self.session.get(
+                    url,
+                    headers={"Range": f"bytes=0-{PROBE_BYTES - 1}"},
+                    timeout=self.timeout,
+                    stream=True,
+                )
+            except (requests.ConnectionError, requests.Timeout) as e:
+                raise RetryableError(str(e)) from e
+            with response:
+                raise_for_status(response.status_code, response.headers.get("Retry-After"), url)
+                if response.status_code not in (200, 206):
+                    logger.warning(f"Image probe got HTTP {response.status_code} for {url}")
+                    return None
+                head = b""
+                for chunk in response.iter_content(chunk_size=8192):
+                    head += chunk
+                    if len(head) >= PROBE_BYTES:
+                        break
+            METRICS.add_bytes("image_probe", len(head))
+
+        length = None
+        content_range = _CONTENT_RANGE_PATTERN.match(response.headers.get("Content-Range", ""))
+        if response.status_code == 206 and content_range:
+            length = int(content_range.group(1))
+        elif response.status_code == 200 and response.headers.get("Content-Length", "").isdigit():
+            length = int(response.headers["Content-Length"])
+
+        mime_type, width, height = sniff_image(head)
+        if mime_type is None:
+            header_type = response.headers.get("Content-Type", "").split(";", 1)[0].strip().lower()
+            if not header_type.startswith("image/"):
+                logger.warning(f"Not an image ({header_type or 'no Content-Type'}): {url}")
+                return None
+            mime_type = header_type
+        return {"mime_type": mime_type, "length": length, "width": width, "height": height}
+
+    async def probe(self, url: str):
+        """Metadata of one image (mime_type, length, width, height), or None if it cannot be read"""
+        entry = self.cache.get(url) if self.cache else None
+        if entry is not None:
+            self.stats["cache_hits"] += 1
+            return entry["info"]
+
+        import requests
+
+        async with self._semaphore:
+            try:
+                if self.governor:
+                    info = await self.governor.call(host_key(url), asyncio.to_thread, self._probe, url)
+                else:
+                    info = await asyncio.to_thread(self._probe, url)
+            except (requests.RequestException, RetryableError, CircuitOpenError) as e:
+                logger.warning(f"Image probe failed for {url}: {e}")
+                # Unreachable now is not the same as broken: leave it for the next run
+                self.stats["failed"] += 1
+                return None
+
+        self.stats["probed" if info else "failed"] += 1
+        if self.cache:
+            self.cache.put(url, info)
+        return info
+
+    async def probe_all(self, urls) -> dict:
+        """Probe each distinct URL once; returns url -> metadata or None"""
+        unique = list(dict.fromkeys(urls))
+        results = await asyncio.gather(*(self.probe(url) for url in unique))
+        return dict(zip(unique, results))
+
+    def log_summary(self):
+        logger.info(
+            f"Image probe: {self.stats['cache_hits']} cache hits, "
+            f"{self.stats['probed']} probed, {self.stats['failed']} failed."
+        )
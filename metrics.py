@@ -0,0 +1,215 @@
+"""
+Per-stage timing and metrics for a scrape run.
+
+Pipeline stages run inside `METRICS.stage(name)`. This records the call
+count, a duration histogram and any error raised. Bytes transferred and
+free-form counters are added with add_bytes() and increment(). At the end
+of a run the registry is written as a JSON report and, optionally, as a
+Prometheus textfile for node_exporter's textfile collector.
+
+Parse jobs in worker processes record into their own registry;
+run_measured() ships those numbers back so the parent can merge() them.
+"""
+
+import json
+import logging
+import math
+import os
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_METRICS_FILE = "metrics.json"
+PROMETHEUS_PREFIX = "amsterdam_events"
+
+# Upper bounds (seconds) of the duration histogram buckets
+DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, math.inf)
+
+
+class _StageStats:
+    __slots__ = ("count", "errors", "bytes", "total_seconds", "max_seconds", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.bytes = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.buckets = [0] * len(DURATION_BUCKETS)
+
+    def observe(self, seconds: float):
+        self.count += 1
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        for index, bound in enumerate(DURATION_BUCKETS):
+            if seconds <= bound:
+                self.buckets[index] += 1
+                break
+
+    def quantile(self, fraction: float):
+        """Estimate a quantile from the histogram (upper bound of the bucket that holds it)"""
+        if not self.count:
+            return None
+        rank = fraction * self.count
+        seen = 0
+        for bound, count in zip(DURATION_BUCKETS, self.buckets):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max_seconds)
+        return self.max_seconds
+
+
+def _rounded(value):
+    return round(value, 6) if value is not None else None
+
+
+class Metrics:
+    """Registry of stage timings, byte and error counts and named counters."""
+
+    def __init__(self):
+        self.stages: dict[str, _StageStats] = {}
+        self.counters: Counter = Counter()
+        self.started_at = datetime.now(timezone.utc)
+
+    def _stage(self, name: str) -> _StageStats:
+        stats = self.stages.get(name)
+        if stats is None:
+            stats = self.stages[name] = _StageStats()
+        return stats
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time the enclosed block as one call of `name`; exceptions are counted and re-raised"""
+        started = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self._stage(name).errors += 1
+            raise
+        finally:
+            self._stage(name).observe(time.perf_counter() - started)
+
+    def observe(self, name: str, seconds: float):
+        self._stage(name).observe(seconds)
+
+    def add_bytes(self, name: str, count: int):
+        self._stage(name).bytes += count
+
+    def add_error(self, name: str, count: int = 1):
+        self._stage(name).errors += count
+
+    def increment(self, name: str, count: int = 1):
+        self.counters[name] += count
+
+    def snapshot(self) -> dict:
+        """Raw, mergeable copy of the registry (picklable, for worker processes)"""
+        return {
+            "stages": {
+                name: {slot: getattr(stats, slot) for slot in _StageStats.__slots__}
+                for name, stats in self.stages.items()
+            },
+            "counters": dict(self.counters),
+        }
+
+    def merge(self, snapshot: dict):
+        for name, values in snapshot["stages"].items():
+            stats = self._stage(name)
+            stats.count += values["count"]
+            stats.errors += values["errors"]
+            stats.bytes += values["bytes"]
+            stats.total_seconds += values["total_seconds"]
+            stats.max_seconds = max(stats.max_seconds, values["max_seconds"])
+            stats.buckets = [a + b for a, b in zip(stats.buckets, values["buckets"])]
+        self.counters.update(snapshot["counters"])
+
+    def reset(self):
+        self.stages.clear()
+        self.counters.clear()
+        self.started_at = datetime.now(timezone.utc)
+
+    def report(self) -> dict:
+        """Summary of the run as a JSON-serializable dict"""
+        stages = {}
+        for name, stats in sorted(self.stages.items()):
+            stages[name] = {
+                "count": stats.count,
+                "errors": stats.errors,
+                "bytes": stats.bytes,
+                "total_seconds": round(stats.total_seconds, 6),
+                "mean_seconds": round(stats.total_seconds / stats.count, 6) if stats.count else None,
+                "p50_seconds": _rounded(stats.quantile(0.5)),
+                "p95_seconds": _rounded(stats.quantile(0.95)),
+                "max_seconds": round(stats.max_seconds, 6),
+                "histogram": {
+                    ("+Inf" if math.isinf(bound) else str(bound)): count
+                    for bound, count in zip(DURATION_BUCKETS, stats.buckets)
+                },
+            }
+        return {
+            "started_at": self.started_at.isoformat(),
+            "finished_at": datetime.now(timezone.utc).isoformat(),
+            "stages": stages,
+            "counters": dict(sorted(self.counters.items())),
+        }
+
+    def write_json(self, path=DEFAULT_METRICS_FILE):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, indent=2)
+        logger.info(f"Metrics report written to {path}")
+
+    def write_prometheus(self, path):
+        """Write the registry in the Prometheus text exposition format"""
+        prefix = PROMETHEUS_PREFIX
+        lines = [
+            f"# HELP {prefix}_stage_duration_seconds Time spent per call of a pipeline stage.",
+            f"# TYPE {prefix}_stage_duration_seconds histogram",
+        ]
+        for name, stats in sorted(self.stages.items()):
+            cumulative = 0
+            for bound, count in zip(DURATION_BUCKETS, stats.buckets):
+                cumulative += count
+                le = "+Inf" if math.isinf(bound) else str(bound)
+                lines.append(f'{prefix}_stage_duration_seconds_bucket{{stage="{name}",le="{le}"}} {cumulative}')
+            lines.append(f'{prefix}_stage_duration_seconds_sum{{stage="{name}"}} {stats.total_seconds:.6f}')
+            lines.append(f'{prefix}_stage_duration_seconds_count{{stage="{name}"}} {stats.count}')
+        for metric, attribute, help_text in (
+            ("stage_errors_total", "errors", "Errors raised per pipeline stage."),
+            ("stage_bytes_total", "bytes", "Bytes transferred or written per pipeline stage."),
+        ):
+            lines.append(f"# HELP {prefix}_{metric} {help_text}")
+            lines.append(f"# TYPE {prefix}_{metric} counter")
+            for name, stats in sorted(self.stages.items()):
+                lines.append(f'{prefix}_{metric}{{stage="{name}"}} {getattr(stats, attribute)}')
+        lines.append(f"# HELP {prefix}_events_total Run counters.")
+        lines.append(f"# TYPE {prefix}_events_total counter")
+        for name, value in sorted(self.counters.items()):
+            lines.append(f'{prefix}_events_total{{counter="{name}"}} {value}')
+
+        # The textfile collector may read at any moment; never expose a half-written file
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, path)
+        logger.info(f"Prometheus metrics written to {path}")
+
+    def log_summary(self):
+        for name, stats in sorted(self.stages.items()):
+            p95 = stats.quantile(0.95)
+            logger.info(
+                f"Stage {name}: {stats.count} calls, {stats.total_seconds:.2f}s total, "
+                f"p95 {p95 if p95 is not None else 0:.3f}s, {stats.errors} errors, {stats.bytes} bytes"
+            )
+
+
+# Process-wide registry used by all pipeline modules
+METRICS = Metrics()
+
+
+def run_measured(func, *args):
+    """Call func(*args) in a worker process and return (result, metrics recorded by it)"""
+    METRICS.reset()
+    result = func(*args)
+    return result, METRICS.snapshot()
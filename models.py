@@ -2,6 +2,16 @@ from datetime import datetime
 from typing import List, Optional
 from pydantic import BaseModel, HttpUrl, Field
 
+class ImageInfo(BaseModel):
+    """
+    Metadata of an event image, as probed from the image itself.
+    """
+    mime_type: str = Field(..., description="The image's MIME type (e.g., 'image/png').")
+    length: Optional[int] = Field(None, description="The size of the image in bytes.")
+    width: Optional[int] = Field(None, description="The image width in pixels.")
+    height: Optional[int] = Field(None, description="The image height in pixels.")
+
+
 class Event(BaseModel):
     """
     Pydantic model for a single event.
@@ -16,6 +26,12 @@ class Event(BaseModel):
     tags: List[str] = Field(default_factory=list, description="A list of tags or categories.")
     location: str = Field("Amsterdam", description="The general location of the event.")
     image: Optional[HttpUrl] = Field(None, description="A URL for the main event image.")
+    image_info: Optional[ImageInfo] = Field(None, description="Probed type, size and dimensions of the image.")
+    dates_as_of: Optional[datetime] = Field(
+        None,
+        exclude=True,
+        description="When the date texts were last scraped with a change; dates without a year are read as of then.",
+    )
 
     class Config:
         """Pydantic config."""
@@ -24,4 +40,4 @@ class Event(BaseModel):
             datetime: lambda v: v.isoformat(),
             HttpUrl: lambda v: str(v),
         }
-        validate_assignment = True 
\ No newline at end of file
+        validate_assignment = True 
@@ -0,0 +1,161 @@
+"""
+Structured event dates and an interval index over them.
+
+The site lists one display line per occurrence ("Fri 13 Jun00:00 - 23:59",
+"wo 2 jul 20:00 - 22:00", "vr 13 jun t/m zo 15 jun", "01 Jul '25"). parse_occurrences
+turns those lines, Dutch or English, into typed start/end ranges in
+Amsterdam time. OccurrenceIndex answers "which events happen in this
+window" for the time-windowed feeds and for pruning past events.
+"""
+
+import bisect
+import re
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from zoneinfo import ZoneInfo
+
+AMSTERDAM = ZoneInfo("Europe/Amsterdam")
+
+# Dates this far in the past are taken to be next year's (the site omits the year)
+PAST_DATE_TOLERANCE = timedelta(days=61)
+
+_MONTHS = {
+    "jan": 1, "feb": 2, "mar": 3, "mrt": 3, "apr": 4, "may": 5, "mei": 5, "jun": 6,
+    "jul": 7, "aug": 8, "sep": 9, "oct": 10, "okt": 10, "nov": 11, "dec": 12,
+}
+_MONTH = r"(jan|feb|mar|mrt|apr|may|mei|jun|jul|aug|sep|oct|okt|nov|dec)[a-z]*\.?"
+# A four-digit year, or a two-digit one after an apostrophe ("01 Jul '25"); never the hour of a time
+_YEAR = r"(?:\s+'?((?<=')\d{2}|\d{4}(?![:.]\d))\b)?"
+_TIME = r"(\d{1,2})[:.](\d{2})"
+# "-", "–" or the Dutch "t/m" (tot en met, through) and "tot" (until)
+_RANGE_SEPARATOR = r"\s*(?:[-–]|\b(?:t/m|tot en met|tot)\b)\s*"
+# The end of a range may repeat the weekday ("vr 13 jun t/m zo 15 jun")
+_WEEKDAY = r"(?:[a-z]{2,9}\.?,?\s+)?"
+# <day> <month> [year] [time] [<separator> [[weekday] <day> <month> [year]] [time]]
+_OCCURRENCE_PATTERN = re.compile(
+    rf"\b(\d{{1,2}})\s*{_MONTH}{_YEAR}\s*(?:{_TIME})?"
+    rf"(?:{_RANGE_SEPARATOR}(?:{_WEEKDAY}(\d{{1,2}})\s*{_MONTH}{_YEAR})?\s*(?:{_TIME})?)?",
+    re.IGNORECASE,
+)
+
+
+@dataclass(frozen=True)
+class Occurrence:
+    """One date range of an event, in Amsterdam time; `end` is exclusive."""
+    start: datetime
+    end: datetime
+    all_day: bool = False
+
+
+def reference_date(scraped_at: datetime) -> date:
+    """Day that year-less dates scraped at `scraped_at` are read as of, in Amsterdam"""
+    return scraped_at.astimezone(AMSTERDAM).date()
+
+
+def event_reference_date(event) -> date:
+    """Reference date for an Event's date texts.
+
+    That is when they were last scraped with a change: the store's
+    last_changed (Event.dates_as_of), or else pub_date, which is the parse
+    time of a freshly scraped or page-cached event. Never the first
+    sighting, or a listing that runs for months would get last year's dates.
+    """
+    return reference_date(event.dates_as_of or event.pub_date)
+
+
+def _resolve_date(day, month, year, today):
+    month = _MONTHS[month.lower()[:3]]
+    if year:
+        year = int(year)
+        return date(year + 2000 if year < 100 else year, month, int(day))
+    resolved = date(today.year, month, int(day))
+    if today - resolved > PAST_DATE_TOLERANCE:
+        resolved = date(today.year + 1, month, int(day))
+    return resolved
+
+
+def parse_occurrence(text: str, today: date | None = None):
+    """Parse one date line into an Occurrence, or None if it holds no date"""
+    match = _OCCURRENCE_PATTERN.search(text or "")
+    if not match:
+        return None
+    (day, month, year, start_h, start_m, end_day, end_month, end_year, end_h, end_m) = match.groups()
+    today = today or datetime.now(AMSTERDAM).date()
+    try:
+        start_date = _resolve_date(day, month, year, today)
+        end_date = start_date
+        if end_day:
+            end_date = _resolve_date(end_day, end_month, end_year or year, start_date)
+        start_time = time(int(start_h), int(start_m)) if start_h else None
+        end_time = time(int(end_h) % 24, int(end_m)) if end_h else None
+    except ValueError:
+        return None
+
+    start = datetime.combine(start_date, start_time or time(0), AMSTERDAM)
+    if end_time is not None and not end_day:
+        end = datetime.combine(end_date, end_time, AMSTERDAM)
+        # "00:00 - 00:00" and "00:00 - 23:59" are the site's way of saying "all day"
+        all_day = start_time == time(0) and end_time in (time(0), time(23, 59))
+        if all_day:
+            end = datetime.combine(end_date + timedelta(days=1), time(0), AMSTERDAM)
+        elif end <= start:
+            # Runs past midnight ("22:00 - 04:00")
+            end += timedelta(days=1)
+        return Occurrence(start, end, all_day)
+    if end_time is not None:
+        return Occurrence(start, datetime.combine(end_date, end_time, AMSTERDAM), False)
+    # No end time: the occurrence lasts until the end of its (last) day
+    end = datetime.combine(end_date + timedelta(days=1), time(0), AMSTERDAM)
+    return Occurrence(start, end, start_time is None)
+
+
+def parse_occurrences(date_texts, today: date | None = None) -> list[Occurrence]:
+    """Parse all date lines of an event, sorted by start; lines without a date are skipped"""
+    parsed = (parse_occurrence(text, today) for text in date_texts or ())
+    return sorted((o for o in parsed if o), key=lambda o: (o.start, o.end))
+
+
+class OccurrenceIndex:
+    """Static interval index from occurrence ranges to the items they belong to.
+
+    Intervals are sorted by start. A query bisects to the intervals that
+    start before the window ends, and skips everything that started more
+    than the longest duration before the window begins.
+    """
+
+    def __init__(self):
+        self._intervals: list[tuple[datetime, datetime, int]] = []
+        self._starts: list[datetime] = []
+        self._items = []
+        self._max_duration = timedelta(0)
+        self._sorted = True
+
+    def add(self, item, occurrences):
+        index = len(self._items)
+        self._items.append(item)
+        for occurrence in occurrences:
+            self._intervals.append((occurrence.start, occurrence.end, index))
+            self._max_duration = max(self._max_duration, occurrence.end - occurrence.start)
+        self._sorted = False
+
+    def _ensure_sorted(self):
+        if not self._sorted:
+            self._intervals.sort(key=lambda interval: (interval[0], interval[1]))
+            self._starts = [interval[0] for interval in self._intervals]
+            self._sorted = True
+
+    def overlapping(self, window_start: datetime, window_end: datetime) -> list:
+        """Items with an occurrence overlapping [window_start, window_end), in insertion order"""
+        self._ensure_sorted()
+        low = bisect.bisect_left(self._starts, window_start - self._max_duration)
+        high = bisect.bisect_left(self._starts, window_end)
+        hits = {index for start, end, index in self._intervals[low:high] if end > window_start}
+        return [self._items[index] for index in sorted(hits)]
+
+    def ended_before(self, moment: datetime) -> list:
+        """Items whose every occurrence ended at or before `moment` (items without dates are never past)"""
+        self._ensure_sorted()
+        last_end = {}
+        for _, end, index in self._intervals:
+            last_end[index] = max(end, last_end.get(index, end))
+        return [self._items[index] for index in sorted(last_end) if last_end[index] <= moment]
@@ -0,0 +1,123 @@
+"""
+Persistent on-disk cache of scraped event pages.
+
+One JSON file per URL holds the HTTP validators (ETag / Last-Modified), a
+hash of the captured page content and the Event built from it. When a page
+comes back unchanged (304, or same content hash) the stored Event is reused
+and the page is not parsed, translated or image-scanned again.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import time
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = ".cache/pages"
+DEFAULT_MAX_AGE_DAYS = 30
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+
+
+def content_hash(snapshot: dict) -> str:
+    """Stable hash of the parts of a page snapshot we build events from"""
+    payload = json.dumps(snapshot, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class PageCache:
+    """URL-keyed store of page validators, content hashes and parsed events."""
+
+    def __init__(
+        self,
+        cache_dir=DEFAULT_CACHE_DIR,
+        max_age_days=DEFAULT_MAX_AGE_DAYS,
+        max_bytes=DEFAULT_MAX_BYTES,
+        refresh=False,
+    ):
+        self.cache_dir = Path(cache_dir)
+        self.max_age_seconds = max_age_days * 24 * 3600
+        self.max_bytes = max_bytes
+        # In refresh mode every lookup misses, but fresh results are still stored
+        self.refresh = refresh
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def _path_for(self, url: str) -> Path:
+        return self.cache_dir / (hashlib.sha256(url.encode("utf-8")).hexdigest() + ".json")
+
+    def get(self, url: str):
+        """Return the cache entry for a URL, or None"""
+        if self.refresh:
+            return None
+        path = self._path_for(url)
+        try:
+            with open(path, encoding="utf-8") as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable cache entry {path}: {e}")
+            return None
+        if time.time() - entry.get("stored_at", 0) > self.max_age_seconds:
+            return None
+        return entry
+
+    def put(self, url: str, body_hash: str, event: dict, etag=None, last_modified=None):
+        """Store (or replace) the entry for a URL"""
+        entry = {
+            "url": url,
+            "etag": etag,
+            "last_modified": last_modified,
+            "body_hash": body_hash,
+            "stored_at": time.time(),
+            "event": event,
+        }
+        path = self._path_for(url)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def touch(self, url: str):
+        """Mark an entry as revalidated so it is not aged out"""
+        entry = self.get(url)
+        if entry:
+            self.put(url, entry["body_hash"], entry["event"], entry.get("etag"), entry.get("last_modified"))
+
+    @staticmethod
+    def conditional_headers(entry) -> dict:
+        """Request headers that let the server answer 304 Not Modified"""
+        headers = {}
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def evict(self):
+        """Drop expired entries, then the oldest ones until under the size budget"""
+        now = time.time()
+        entries = []
+        for path in self.cache_dir.glob("*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            if now - stat.st_mtime > self.max_age_seconds:
+                path.unlink(missing_ok=True)
+            else:
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        if removed:
+            logger.info(f"Page cache: evicted {removed} entries to stay under {self.max_bytes} bytes")
@@ -0,0 +1,148 @@
+"""
+On-disk checkpoints for the staged scrape pipeline.
+
+A run goes through these stages:
+
+    discover -> fetch -> parse -> translate -> enrich -> render -> publish
+
+discover saves the event URLs each source found. fetch, parse, translate and enrich
+run per event and append each finished item to a JSON-lines log for that
+stage. After dedup, the final event list is stored as the input of render.
+A crashed run started again with --resume skips every item a stage has
+already finished. The render and publish stages can also run on their own
+from the stored events.
+"""
+
+import json
+import logging
+import os
+import time
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHECKPOINT_DIR = ".cache/pipeline"
+
+STAGES = ("discover", "fetch", "parse", "translate", "enrich", "render", "publish")
+# Stages that checkpoint one item per event URL
+ITEM_STAGES = ("fetch", "parse", "translate", "enrich")
+
+
+class Checkpoint:
+    """Directory of per-stage outputs plus a manifest of the stages that completed."""
+
+    def __init__(self, directory=DEFAULT_CHECKPOINT_DIR):
+        self.directory = Path(directory)
+        self.manifest = {"started_at": None, "completed": []}
+        self._items: dict[str, dict] = {stage: {} for stage in ITEM_STAGES}
+        self._logs = {}
+
+    def _path(self, name: str) -> Path:
+        return self.directory / name
+
+    def _write_json(self, name: str, data):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp_path = self._path(name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, self._path(name))
+
+    def _read_json(self, name: str):
+        try:
+            with open(self._path(name), encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def start(self, resume: bool = False):
+        """Begin a run: pick up the unfinished previous run, or clear it and start over"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        manifest = self._read_json("manifest.json") if resume else None
+        if manifest and "publish" not in manifest["completed"]:
+            self.manifest = manifest
+            for stage in ITEM_STAGES:
+                self._items[stage] = self._load_items(stage)
+            logger.info(
+                f"Resuming run from {manifest['started_at']}: "
+                + ", ".join(f"{len(self._items[s])} {s}" for s in ITEM_STAGES)
+                + f" items done; completed stages: {', '.join(manifest['completed']) or 'none'}."
+            )
+        else:
+            if resume:
+                logger.info("No unfinished run to resume; starting a new one.")
+            for stage in ITEM_STAGES:
+                self._path(f"{stage}.jsonl").unlink(missing_ok=True)
+            self.manifest = {"started_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"), "completed": []}
+            self._write_json("manifest.json", self.manifest)
+
+    def load(self):
+        """Read the manifest of the last run, for stages run on their own"""
+        self.manifest = self._read_json("manifest.json") or self.manifest
+        return self
+
+    def _load_items(self, stage: str) -> dict:
+        items = {}
+        try:
+            with open(self._path(f"{stage}.jsonl"), encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # The last line may be cut short by the crash we are resuming from
+                        continue
+                    items[record["url"]] = record["data"]
+        except FileNotFoundError:
+            pass
+        return items
+
+    def get(self, stage: str, url: str):
+        """Stored output of `stage` for one event URL, or None"""
+        return self._items[stage].get(url)
+
+    def record(self, stage: str, url: str, data):
+        """Append one finished item.
+
+        The line is flushed to the OS before this returns, so it survives the
+        process crashing. It is not fsynced: that would block the event loop
+        on every page, and a power loss only costs pages that are scraped again.
+        """
+        self._items[stage][url] = data
+        log = self._logs.get(stage)
+        if log is None:
+            log = self._logs[stage] = open(self._path(f"{stage}.jsonl"), "a", encoding="utf-8")
+        log.write(json.dumps({"url": url, "data": data}, ensure_ascii=False) + "\n")
+        log.flush()
+
+    def is_complete(self, stage: str) -> bool:
+        return stage in self.manifest["completed"]
+
+    def complete(self, stage: str):
+        if stage not in self.manifest["completed"]:
+            self.manifest["completed"].append(stage)
+            self._write_json("manifest.json", self.manifest)
+
+    def save_urls(self, source: str, urls: list[str]):
+        """Store the event URLs one source discovered"""
+        self._write_json(f"urls-{source}.json", urls)
+        discovered = self.manifest.setdefault("discovered", [])
+        if source not in discovered:
+            discovered.append(source)
+            self._write_json("manifest.json", self.manifest)
+
+    def load_urls(self, source: str):
+        if source not in self.manifest.get("discovered", []):
+            return None
+        return self._read_json(f"urls-{source}.json")
+
+    def save_events(self, events: list[dict]):
+        """Store the deduplicated events that render works from"""
+        self._write_json("events.json", events)
+        self.complete("enrich")
+
+    def load_events(self):
+        return self._read_json("events.json")
+
+    def close(self):
+        for log in self._logs.values():
+            log.close()
+        self._logs.clear()
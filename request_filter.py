@@ -0,0 +1,117 @@
+"""
+Request interception profile for the Playwright scraper.
+
+We only read text, the <main> HTML and image URLs from event pages, so
+images, fonts, media and third-party scripts are aborted before they are
+downloaded.
+"""
+
+import logging
+from collections import Counter
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+# Resource types (as reported by Playwright) that are never needed
+DEFAULT_BLOCKED_RESOURCE_TYPES = ("image", "media", "font", "stylesheet", "texttrack", "manifest")
+
+# Hosts we depend on; everything else counts as third-party
+DEFAULT_ALLOWED_HOSTS = ("iamsterdam.com", "thefeedfactory.nl")
+
+# Hosts that are always blocked, even when third-party blocking is disabled
+DEFAULT_DENIED_HOSTS = (
+    "googletagmanager.com",
+    "google-analytics.com",
+    "doubleclick.net",
+    "googlesyndication.com",
+    "facebook.net",
+    "facebook.com",
+    "hotjar.com",
+    "linkedin.com",
+    "tiktok.com",
+    "bing.com",
+)
+
+# Rough transfer size per resource type, used to estimate what blocking saved.
+# Blocked requests are never answered, so their real size is unknown.
+ESTIMATED_RESOURCE_BYTES = {
+    "image": 80_000,
+    "media": 500_000,
+    "font": 40_000,
+    "stylesheet": 30_000,
+    "script": 60_000,
+    "xhr": 5_000,
+    "fetch": 5_000,
+}
+DEFAULT_ESTIMATED_BYTES = 10_000
+
+
+def _host_matches(host: str, patterns) -> bool:
+    """True if host equals one of the patterns or is a subdomain of one"""
+    return any(host == p or host.endswith("." + p) for p in patterns)
+
+
+class RequestFilter:
+    """Aborts unneeded requests on a browser context and counts what was saved."""
+
+    def __init__(
+        self,
+        blocked_resource_types=DEFAULT_BLOCKED_RESOURCE_TYPES,
+        allowed_hosts=DEFAULT_ALLOWED_HOSTS,
+        denied_hosts=DEFAULT_DENIED_HOSTS,
+        block_third_party=True,
+    ):
+        self.blocked_resource_types = frozenset(blocked_resource_types)
+        self.allowed_hosts = tuple(allowed_hosts)
+        self.denied_hosts = tuple(denied_hosts)
+        self.block_third_party = block_third_party
+        self.allowed_count = 0
+        self.blocked_by_type: Counter = Counter()
+
+    def should_block(self, url: str, resource_type: str) -> bool:
+        """Decide whether a request should be aborted"""
+        host = (urlparse(url).hostname or "").lower()
+        if _host_matches(host, self.denied_hosts):
+            return True
+        # Pages (and frames) we navigate to are otherwise always loaded
+        if resource_type == "document":
+            return False
+        if resource_type in self.blocked_resource_types:
+            return True
+        if self.block_third_party and host and not _host_matches(host, self.allowed_hosts):
+            return True
+        return False
+
+    async def handle(self, route):
+        """Playwright route handler"""
+        request = route.request
+        if self.should_block(request.url, request.resource_type):
+            self.blocked_by_type[request.resource_type] += 1
+            await route.abort()
+        else:
+            self.allowed_count += 1
+            await route.continue_()
+
+    async def attach(self, context):
+        """Install the filter on every page of a browser context"""
+        await context.route("**/*", self.handle)
+
+    @property
+    def blocked_count(self) -> int:
+        return sum(self.blocked_by_type.values())
+
+    @property
+    def estimated_bytes_saved(self) -> int:
+        return sum(
+            ESTIMATED_RESOURCE_BYTES.get(resource_type, DEFAULT_ESTIMATED_BYTES) * count
+            for resource_type, count in self.blocked_by_type.items()
+        )
+
+    def log_summary(self):
+        """Report requests and bytes saved during this run"""
+        total = self.blocked_count + self.allowed_count
+        logger.info(
+            f"Request filter: blocked {self.blocked_count} of {total} requests, "
+            f"saving an estimated {self.estimated_bytes_saved / 1_000_000:.1f} MB "
+            f"({dict(self.blocked_by_type)})"
+        )
@@ -0,0 +1,146 @@
+"""
+Streaming RSS 2.0 writer.
+
+The channel header is written first, then each <item> is rendered and
+written to the output file in turn. Memory use therefore stays flat and
+time grows linearly with the number of events. content:encoded is written
+as a real CDATA section. Image enclosures use the probed MIME type and size
+of the image, with its dimensions in a Media RSS element. The feed is
+written to a temporary file that replaces the output once complete.
+validate_rss_feed() checks a written feed.
+"""
+
+import mimetypes
+from email.utils import format_datetime
+
+from feed_outputs import atomic_open
+
+ATOM_NS = "http://www.w3.org/2005/Atom"
+CONTENT_NS = "http://purl.org/rss/1.0/modules/content/"
+MEDIA_NS = "http://search.yahoo.com/mrss/"
+
+# Escaping for element text; xml_text and xml_attrs are shared with the Atom writer
+TEXT_ESCAPES = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;"})
+_ATTR_ESCAPES = str.maketrans({
+    "&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;",
+    "\r": "&#13;", "\n": "&#10;", "\t": "&#09;",
+})
+
+
+def xml_text(tag: str, value) -> str:
+    """An element holding escaped text; None gives an empty element"""
+    if value is None:
+        return f"<{tag} />"
+    return f"<{tag}>{str(value).translate(TEXT_ESCAPES)}</{tag}>"
+
+
+def xml_attrs(attributes: dict) -> str:
+    """Escaped ` name="value"` pairs for an opening tag"""
+    return "".join(f' {name}="{str(value).translate(_ATTR_ESCAPES)}"' for name, value in attributes.items())
+
+
+def _cdata(text: str) -> str:
+    # "]]>" cannot appear inside a CDATA section, so split it across two
+    return "<![CDATA[" + text.replace("]]>", "]]]]><![CDATA[>") + "]]>"
+
+
+def enclosure(event) -> dict:
+    """url, type and length of an event's image; without probed metadata the type is guessed from the URL"""
+    info = event.image_info
+    mime_type = info.mime_type if info else None
+    if not mime_type:
+        guessed, _ = mimetypes.guess_type(str(event.image))
+        mime_type = guessed if guessed and guessed.startswith("image/") else "image/jpeg"
+    length = info.length if info and info.length else 0
+    return {"url": str(event.image), "type": mime_type, "length": str(length)}
+
+
+def render_item(event, html_content: str) -> str:
+    """Render one <item> element"""
+    parts = [
+        "<item>",
+        xml_text("title", event.title),
+        xml_text("link", event.link),
+        xml_text("pubDate", format_datetime(event.pub_date)),
+        f'<guid isPermaLink="false">{str(event.link).translate(TEXT_ESCAPES)}</guid>',
+        xml_text("description", event.description),
+        f"<content:encoded>{_cdata(html_content)}</content:encoded>",
+    ]
+    # Also add image as enclosure for RSS readers that support it
+    if event.image:
+        attributes = enclosure(event)
+        parts.append(f"<enclosure{xml_attrs(attributes)} />")
+        info = event.image_info
+        if info and info.width and info.height:
+            media = {"url": attributes["url"], "type": attributes["type"], "medium": "image",
+                     "width": info.width, "height": info.height}
+            if info.length:
+                media["fileSize"] = info.length
+            parts.append(f"<media:content{xml_attrs(media)} />")
+    parts.append("</item>")
+    return "".join(parts)
+
+
+def write_rss_feed(events, output_file: str, channel: dict, render_content):
+    """Stream an RSS feed for `events` to `output_file`.
+
+    `channel` holds title, link, description, language, last_build_date
+    (a datetime) and generator. `render_content(event)` returns the HTML
+    for the item's content:encoded.
+    """
+    with atomic_open(output_file) as f:
+        f.write(
+            f'<rss xmlns:atom="{ATOM_NS}" xmlns:content="{CONTENT_NS}" xmlns:media="{MEDIA_NS}" version="2.0">'
+            "<channel>"
+        )
+        f.write(xml_text("title", channel["title"]))
+        f.write(xml_text("link", channel["link"]))
+        f.write(f"<atom:link{xml_attrs({'rel': 'self', 'href': channel['link'], 'type': 'application/rss+xml'})} />")
+        f.write(xml_text("description", channel["description"]))
+        f.write(xml_text("language", channel["language"]))
+        f.write(xml_text("lastBuildDate", format_datetime(channel["last_build_date"])))
+        f.write(xml_text("generator", channel["generator"]))
+
+        for event in events:
+            f.write(render_item(event, render_content(event)))
+
+        f.write("</channel></rss>")
+
+
+def validate_rss_feed(path: str) -> tuple[int, list[str]]:
+    """Check a feed file for the elements feed readers rely on.
+
+    Returns (number of items, list of problems); no problems means valid.
+    """
+    import xml.etree.ElementTree as ET
+    from email.utils import parsedate_to_datetime
+
+    try:
+        root = ET.parse(path).getroot()
+    except (OSError, ET.ParseError) as e:
+        return 0, [f"cannot parse {path}: {e}"]
+    channel = root.find("channel")
+    if root.tag != "rss" or channel is None:
+        return 0, [f"{path} is not an RSS document"]
+
+    problems = [f"channel has no <{tag}>" for tag in ("title", "link", "description") if not channel.findtext(tag)]
+    items = channel.findall("item")
+    guids = set()
+    for number, item in enumerate(items, start=1):
+        label = f"item {number} ({item.findtext('title') or 'untitled'})"
+        for tag in ("title", "link", "guid", "pubDate"):
+            if not item.findtext(tag):
+                problems.append(f"{label} has no <{tag}>")
+        guid = item.findtext("guid")
+        if guid in guids:
+            problems.append(f"{label} repeats guid {guid}")
+        guids.add(guid)
+        if item.findtext("pubDate"):
+            try:
+                parsedate_to_datetime(item.findtext("pubDate"))
+            except (TypeError, ValueError):
+                problems.append(f"{label} has an invalid pubDate")
+        enclosure = item.find("enclosure")
+        if enclosure is not None and not enclosure.get("url"):
+            problems.append(f"{label} has an enclosure without url")
+    return len(items), problems
@@ -4,26 +4,51 @@ Amsterdam Events Scraper
 Collects event data from multiple Amsterdam sources and generates an RSS feed.
 """
 
-import requests
-import time
+# Only light modules are imported here. The browser, HTTP, HTML-parsing and
+# translation stacks are imported inside the stages that use them, so the
+# render/validate/stats commands start quickly.
 import json
+import os
 import re
-from datetime import datetime, timezone, timedelta
-from bs4 import BeautifulSoup
-from feedgen.feed import FeedGenerator  # type: ignore
-from urllib.parse import urljoin, urlparse
+from datetime import datetime, time, timedelta, timezone
+from urllib.parse import urljoin
 import logging
 import asyncio
-from playwright.async_api import async_playwright
-import translators as ts  # type: ignore
+from collections import Counter
+from contextlib import asynccontextmanager
 import subprocess
 import argparse
-from markitdown import MarkItDown
-from models import Event
-import io
-from email.utils import format_datetime
-import markdown  # type: ignore
-import xml.etree.ElementTree as ET
+from models import Event, ImageInfo
+from rss_writer import write_rss_feed, validate_rss_feed
+from feed_formats import write_atom_feed, write_json_feed
+from feed_outputs import DEFAULT_MANIFEST_FILE, atomic_open, load_manifest, precompress, remove_output, write_manifest
+from feed_diff import (
+    DEFAULT_CHANGELOG_FILE,
+    FeedDiff,
+    changelog_summary,
+    diff_events,
+    feed_links,
+    load_published_events,
+    write_changelog,
+)
+from dedup import DedupIndex, canonical_link
+from governor import OutboundGovernor, RetryableError, host_key, raise_for_status, DEFAULT_MAX_RETRIES
+from crawler import AGENDA_URL, DEFAULT_MAX_LISTING_PAGES, DEFAULT_REQUESTS_PER_SECOND, agenda_category
+from occurrences import AMSTERDAM, OccurrenceIndex, event_reference_date, parse_occurrences
+from metrics import METRICS, run_measured, DEFAULT_METRICS_FILE
+from pipeline import Checkpoint, DEFAULT_CHECKPOINT_DIR
+from daemon import ScraperDaemon, DEFAULT_BATCH_SIZE, DEFAULT_LISTING_INTERVAL, DEFAULT_RENDER_INTERVAL, DEFAULT_SCHEDULE_FILE
+from sources import SOURCES, DEFAULT_SOURCE_TIMEOUT, EventSource, SourceRunner, register_source, scrape_bounded, source_link_text
+from event_store import EventStore, DEFAULT_DB_FILE
+from translation import Translator, TranslationCache, make_backend, DEFAULT_BACKEND, DEFAULT_CACHE_FILE
+from page_cache import PageCache, content_hash, DEFAULT_CACHE_DIR
+from image_probe import ImageMetadataCache, ImageProber, DEFAULT_CACHE_FILE as DEFAULT_IMAGE_CACHE_FILE
+from request_filter import (
+    RequestFilter,
+    DEFAULT_ALLOWED_HOSTS,
+    DEFAULT_BLOCKED_RESOURCE_TYPES,
+    DEFAULT_DENIED_HOSTS,
+)
 
 # Configure logging
 logging.basicConfig(
@@ -31,29 +56,79 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-ET.register_namespace('atom', 'http://www.w3.org/2005/Atom')
-ET.register_namespace('content', 'http://purl.org/rss/1.0/modules/content/')
-
-def translate_dutch_date_to_english(date_list: list[str]) -> list[str]:
-    """Translates a list of Dutch date strings to English."""
-    month_map = {
-        'jan': 'Jan', 'feb': 'Feb', 'mrt': 'Mar', 'apr': 'Apr', 'mei': 'May', 'jun': 'Jun',
-        'jul': 'Jul', 'aug': 'Aug', 'sep': 'Sep', 'okt': 'Oct', 'nov': 'Nov', 'dec': 'Dec'
-    }
-    day_map = {
-        'ma': 'Mon', 'di': 'Tue', 'wo': 'Wed', 'do': 'Thu', 'vr': 'Fri', 'za': 'Sat', 'zo': 'Sun'
-    }
-    
-    translated_dates = []
-    for date_str in date_list:
-        translated_str = date_str.lower()
-        for nl, en in month_map.items():
-            translated_str = translated_str.replace(nl, en)
-        for nl, en in day_map.items():
-            # Use word boundaries to avoid replacing parts of words
-            translated_str = re.sub(r'\b' + nl + r'\b', en, translated_str)
-        translated_dates.append(translated_str.title()) # Capitalize for better readability
-    return translated_dates
+FEED_URL = "https://raw.githubusercontent.com/lassebenni/amsterdam-events-feed/master/events.xml"
+
+FEED_BASE_URL = FEED_URL.rsplit("/", 1)[0]
+
+# The same feed as Atom and as JSON Feed
+ATOM_FILE = "events.atom"
+JSON_FEED_FILE = "events.feed.json"
+
+# Small feeds (today, this week, this month, per category) written next to the full one
+FEED_SHARD_DIR = "feeds"
+FEED_SHARD_URL = f"{FEED_BASE_URL}/{FEED_SHARD_DIR}"
+
+# Collects everything we need from an event page in a single round-trip.
+# Image candidates are listed in order of preference.
+EVENT_CAPTURE_SCRIPT = """
+() => {
+    const attr = (selector, name) => {
+        const element = document.querySelector(selector);
+        return element ? element.getAttribute(name) : null;
+    };
+    const h1 = document.querySelector('h1');
+    const main = document.querySelector('main');
+    return {
+        title: h1 ? h1.textContent : document.title,
+        main_html: main ? main.innerHTML : '',
+        images: [
+            attr('meta[property="og:image"]', 'content'),
+            attr('img[src*="thefeedfactory"]', 'src'),
+            attr('article img[src]', 'src'),
+            attr('main img[src]', 'src'),
+        ],
+        url: location.href,
+    };
+}
+"""
+
+# Number of event pages loaded at the same time in one browser context
+DEFAULT_CONCURRENCY = 4
+
+# Number of processes that parse captured event pages
+DEFAULT_PARSE_WORKERS = os.cpu_count() or 1
+
+_markdown_converter = None
+# Date and price lines without markdown syntax ("Fri 13 Jun 20:00 - 22:00", "€ 12,50") convert to a
+# plain paragraph, so they skip the converter. A leading "1. " would start a list, so it is excluded.
+_PLAIN_TEXT_PATTERN = re.compile(r"(?!\d+\.\s)[^\W_](?:[^\W_]|[ :,'’€/.–-])*(?<! )")
+
+
+def _markdown(text: str) -> str:
+    """Markdown to HTML with one reused converter (markdown is imported on first use)"""
+    if _PLAIN_TEXT_PATTERN.fullmatch(text):
+        return f"<p>{text}</p>"
+    global _markdown_converter
+    if _markdown_converter is None:
+        import markdown  # type: ignore
+
+        _markdown_converter = markdown.Markdown()
+    return _markdown_converter.reset().convert(text)
+
+
+def _content_renderer():
+    """_build_html_content memoized for one render, so every feed and shard reuses an event's HTML"""
+    rendered = {}
+
+    def render(event: Event) -> str:
+        # Keyed by identity: the events stay alive, and unchanged, for the whole render
+        key = id(event)
+        if key not in rendered:
+            rendered[key] = _build_html_content(event)
+        return rendered[key]
+
+    return render
+
 
 def _build_html_content(event: Event) -> str:
     # Create well-structured HTML content for better WordPress display
@@ -70,12 +145,12 @@ def _build_html_content(event: Event) -> str:
     content_parts.append('<span class="event-icon">📅</span>')
     content_parts.append('<span class="event-label">Date:</span>')
     # Join the list of dates with a line break for display
-    date_display = "<br>".join([markdown.markdown(d) for d in event.date_text])
+    date_display = "<br>".join([_markdown(d) for d in event.date_text])
     content_parts.append(f'<span class="event-value">{date_display}</span>')
     content_parts.append('</div>')
 
     # Price information
-    price = markdown.markdown(event.price_text)
+    price = _markdown(event.price_text)
     if price:
         content_parts.append('<div class="event-info-line">')
         content_parts.append('<span class="event-icon">💰</span>')
@@ -127,7 +202,7 @@ def _build_html_content(event: Event) -> str:
     content_parts.append('<div class="event-info-line">')
     content_parts.append('<span class="event-icon">🌟</span>')
     content_parts.append('<span class="event-label">More Info:</span>')
-    content_parts.append(f'<a href="{str(event.link)}" target="_blank" rel="noopener" class="event-link">View Event Details on I amsterdam</a>')
+    content_parts.append(f'<a href="{str(event.link)}" target="_blank" rel="noopener" class="event-link">{source_link_text(event.source)}</a>')
     content_parts.append('</div>')
     content_parts.append('</div>')
     
@@ -137,350 +212,696 @@ def _build_html_content(event: Event) -> str:
     html_content = ''.join(content_parts)
     return html_content
 
-class AmsterdamEventsScraper:
-    def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update(
-            {
-                "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-            }
+@register_source
+class IAmsterdamSource(EventSource):
+    """The official I amsterdam agenda, scraped through the scraper's cached HTTP/Playwright pipeline"""
+
+    name = "iamsterdam"
+    label = "I Amsterdam Official"
+    link_text = "View Event Details on I amsterdam"
+
+    async def discover(self, context, limit=None):
+        from crawler import AgendaCrawler, HostRateLimiter
+
+        scraper = self.scraper
+        logger.info("Crawling the agenda for event links...")
+        crawler = AgendaCrawler(
+            fetchers=scraper._listing_fetchers(context),
+            concurrency=self.concurrency,
+            max_pages=scraper.max_listing_pages,
+            rate_limiter=HostRateLimiter(scraper.crawl_rate),
         )
+        event_urls = await crawler.crawl(scraper.agenda_url, target=limit)
+        if not event_urls:
+            logger.warning("No valid event URLs found on the agenda.")
+        return event_urls
+
+    async def scrape_event(self, context, url):
+        return await self.scraper._scrape_event(context, url)
+
+
+class AmsterdamEventsScraper:
+    def __init__(
+        self,
+        concurrency=DEFAULT_CONCURRENCY,
+        request_filter=None,
+        http_first=True,
+        page_cache=None,
+        translator=None,
+        markdown_parser=False,
+        parse_workers=DEFAULT_PARSE_WORKERS,
+        max_listing_pages=DEFAULT_MAX_LISTING_PAGES,
+        crawl_rate=DEFAULT_REQUESTS_PER_SECOND,
+        governor=None,
+        agenda_url=AGENDA_URL,
+        recorder=None,
+        checkpoint=None,
+        store=None,
+        sources=None,
+        source_timeout=DEFAULT_SOURCE_TIMEOUT,
+        probe_images=True,
+        image_cache=None,
+        output_dir=".",
+    ):
+        self._session = None
         self.events: list[Event] = []
-        self.md_converter = MarkItDown()
+        # Merge decisions from the last deduplicate_events() call
+        self.dedup_merges: list[dict] = []
+        self.concurrency = max(1, concurrency)
+        # Optional RequestFilter installed on the Playwright browser context
+        self.request_filter = request_filter
+        # Fetch event pages over plain HTTP first and only render with Playwright when needed
+        self.http_first = http_first
+        self.http_fetcher = None
+        self.path_counts: Counter = Counter()
+        # Optional PageCache used to skip re-parsing pages that did not change
+        self.page_cache = page_cache
+        self.cache_counts: Counter = Counter()
+        self.translator = translator or Translator(make_backend(DEFAULT_BACKEND))
+        # Always use the markitdown + regex parser instead of the DOM extractor
+        self.markdown_parser = markdown_parser
+        # CPU-bound parsing runs in this many worker processes (0 parses inline)
+        self.parse_workers = parse_workers
+        self.parse_pool = None
+        self._parse_slots = None
+        # Agenda crawl limits: listing pages per run and requests per second per host
+        self.max_listing_pages = max_listing_pages
+        self.crawl_rate = crawl_rate
+        # Shared rate limiting, retries and circuit breaking for page loads and translations
+        self.governor = governor or OutboundGovernor()
+        # Where the crawl starts; a local ReplayServer URL when replaying fixtures
+        self.agenda_url = agenda_url
+        # Optional FixtureStore that records every page loaded, for offline replay
+        self.recorder = recorder
+        # Optional pipeline.Checkpoint that stores each stage's output so a crashed run can resume
+        self.checkpoint = checkpoint
+        # Optional EventStore; when set, the outputs are built from its query of current events
+        self.store = store
+        # Files written by the last render, for precompression and the manifest
+        self.outputs: list[str] = []
+        # Differences between the last render and the previously published events
+        self.changes = FeedDiff()
+        # Registered sources to scrape (all by default), each with its own time budget
+        self.sources = [SOURCES[name](self, timeout=source_timeout) for name in (sources or SOURCES)]
+        # Labels of the sources that failed or timed out in the last scrape
+        self.incomplete_sources: list[str] = []
+        # Probe event images for their real type, size and dimensions; optional image_probe.ImageMetadataCache
+        self.probe_images = probe_images
+        self.image_cache = image_cache
+        self._image_prober = None
+        # Directory the feeds, events.json, manifest and changelog are rendered into
+        self.output_dir = output_dir
+
+    @property
+    def session(self):
+        """requests.Session for plain HTTP fetches, created on first use"""
+        if self._session is None:
+            import requests
+
+            self._session = requests.Session()
+            self._session.headers.update(
+                {
+                    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+                }
+            )
+        return self._session
+
+    def _checkpointed(self, stage, url):
+        return self.checkpoint.get(stage, url) if self.checkpoint else None
+
+    def _save_checkpoint(self, stage, url, data):
+        if self.checkpoint:
+            self.checkpoint.record(stage, url, data)
 
     def _parse_event_from_markdown(self, markdown_text: str) -> dict:
         """Extract event details from a markdown string using regex."""
-        data = {
-            "date_text": ["Check website for dates"],
-            "price_text": "Check website for prices",
-            "description": None,
-        }
+        from event_extractor import parse_event_markdown
+
+        return parse_event_markdown(markdown_text)
+
+    async def _run_parser(self, func, *args):
+        """Run a CPU-bound parse function in the process pool, or inline without one.
+
+        At most two jobs per worker are in flight; fetch workers wait here
+        when parsing falls behind, so captured HTML cannot pile up.
+        """
+        if self.parse_pool is None:
+            return func(*args)
+
+        async with self._parse_slots:
+            result, worker_metrics = await asyncio.get_running_loop().run_in_executor(
+                self.parse_pool, run_measured, func, *args
+            )
+        METRICS.merge(worker_metrics)
+        return result
+
+    def _pick_event_image(self, image_candidates, page_url):
+        """Return the first usable image URL from the captured candidates"""
+        with METRICS.stage("image"):
+            for image_url in image_candidates:
+                if image_url:
+                    # Convert relative URLs to absolute
+                    if image_url.startswith('/'):
+                        image_url = urljoin(page_url, image_url)
+
+                    logger.debug(f"Found image: {image_url}")
+                    return image_url
+
+            METRICS.increment("images_missing")
+            logger.warning(f"No suitable image found for {page_url}")
+            return None
 
-        # Isolate the "Data" block first to avoid capturing stray dates
-        data_block_pattern = re.compile(r"## Data\n\n(.*?)\n\n##", re.IGNORECASE | re.DOTALL)
-        data_block_match = data_block_pattern.search(markdown_text)
-        
-        search_text = markdown_text # Default to searching the whole text
-        if data_block_match:
-            search_text = data_block_match.group(1)
-            logger.info("Successfully isolated the 'Data' block for date searching.")
-
-        # Date parsing
-        # Looks for a line like "di 10 jun" or "10 jun - 12 jun"
-        date_pattern = re.compile(r"^\s*(\b(di|wo|do|vr|za|zo|ma)\b.*|.*\d{1,2}\s+(jan|feb|mrt|apr|mei|jun|jul|aug|sep|okt|nov|dec).*)$", re.IGNORECASE | re.MULTILINE)
-        dates_found = date_pattern.findall(search_text)
-        if dates_found:
-            # Extract the first group from each tuple in the findall result
-            cleaned_dates = [match[0].strip() for match in dates_found]
-            # Translate dates to English before returning
-            translated_dates = translate_dutch_date_to_english(cleaned_dates)
-            data["date_text"] = translated_dates
-            logger.info(f"Found and translated {len(translated_dates)} dates: {translated_dates}")
-
-        # Price parsing
-        # Looks for a line containing "€" or "Gratis"
-        price_pattern = re.compile(r"^(.*(€|Gratis|Free).*)$", re.IGNORECASE | re.MULTILINE)
-        price_match = price_pattern.search(markdown_text)
-        if price_match:
-            data["price_text"] = price_match.group(1).strip()
-            logger.info(f"Found price: {data['price_text']}")
-
-        # Description parsing
-        # Clean the markdown to remove syntax like links and images before extracting text.
-        
-        # Remove headers first
-        clean_text = re.sub(r'^\s*#+.*$', '', markdown_text, flags=re.MULTILINE)
-        
-        # Remove image markdown ![...](...)
-        clean_text = re.sub(r'!\[.*?\]\(.*?\)', '', clean_text)
-        
-        # Convert markdown links to plain text: [text](url) -> text
-        clean_text = re.sub(r'\[(.*?)\]\(.*?\)', r'\1', clean_text)
+    async def _capture_event_page(self, page):
+        """Read title, <main> HTML and image candidates from one DOM snapshot"""
+        return await page.evaluate(EVENT_CAPTURE_SCRIPT)
 
-        # Remove horizontal rules
-        clean_text = re.sub(r'^\s*[-*_]{3,}\s*$', '', clean_text, flags=re.MULTILINE)
+    async def _event_from_snapshot(self, url, snapshot):
+        """Parse, translate and assemble an Event from a captured page snapshot"""
+        title = snapshot["title"] or ""
+        main_content_html = snapshot["main_html"]
 
-        # Split into paragraphs and find the first substantive one.
-        paragraphs = re.split(r'\n\s*\n', clean_text)
-        description = "Check website for description."
-        for p in paragraphs:
-            p_clean = p.strip().replace('\n', ' ') # Join lines within a paragraph
-            # A good description should be substantive.
-            if len(p_clean) > 80:
-                description = p_clean
-                break # Found a good candidate
+        if not main_content_html:
+            logger.warning(f"Could not find main content for {url}")
+            return None
+
+        parsed_data = self._checkpointed("parse", url)
+        if parsed_data is None:
+            from event_extractor import parse_event_html
+
+            parsed_data = await self._run_parser(parse_event_html, main_content_html, self.markdown_parser)
+            self._save_checkpoint("parse", url, parsed_data)
+
+        translated = self._checkpointed("translate", url)
+        if translated is None:
+            # Translate title and description to English in one batch
+            description, title = await asyncio.gather(
+                self.translator.translate(parsed_data.get("description")),
+                self.translator.translate(title),
+            )
+            translated = {"title": title, "description": description}
+            self._save_checkpoint("translate", url, translated)
+        title, description = translated["title"], translated["description"]
+
+        event_image = self._pick_event_image(snapshot["images"], snapshot["url"])
+        category = agenda_category(url)
+
+        return Event(
+            title=title.strip(),
+            link=url,
+            description=description,
+            source=IAmsterdamSource.label,
+            date_text=parsed_data.get("date_text", ["Check website for dates"]),
+            price_text=parsed_data.get("price_text", "Check website for prices"),
+            pub_date=datetime.now(timezone.utc),
+            tags=[category] if category else [],
+            image=event_image
+        )
 
-        # Final cleanup to normalize whitespace
-        data["description"] = re.sub(r'\s+', ' ', description).strip()
+    async def _event_for_snapshot(self, url, snapshot, etag=None, last_modified=None):
+        """Build an Event, reusing the cached one when the page content is unchanged"""
+        if self.page_cache is None:
+            return await self._event_from_snapshot(url, snapshot)
+
+        body_hash = content_hash(snapshot)
+        cached = self.page_cache.get(url)
+        if cached and cached.get("event") and cached["body_hash"] == body_hash:
+            self.cache_counts["unchanged"] += 1
+            self.page_cache.put(url, body_hash, cached["event"], etag, last_modified)
+            return Event.model_validate(cached["event"])
+
+        self.cache_counts["changed"] += 1
+        event = await self._event_from_snapshot(url, snapshot)
+        if event:
+            self.page_cache.put(url, body_hash, event.model_dump(mode='json'), etag, last_modified)
+        return event
+
+    async def _scrape_event_http(self, url):
+        """Try the HTTP fast path. Returns None if the page needs Playwright."""
+        cached = self.page_cache.get(url) if self.page_cache else None
+        response = await self.http_fetcher.fetch(url, headers=PageCache.conditional_headers(cached))
+        if response is None:
+            return None
+        if response.status == 304 and cached and cached.get("event"):
+            self.cache_counts["not_modified"] += 1
+            self.page_cache.touch(url)
+            return Event.model_validate(cached["event"])
+        if response.status != 200:
+            return None
 
+        from event_extractor import snapshot_from_static_html
 
-        return data
+        snapshot = await self._run_parser(snapshot_from_static_html, response.text, response.url)
+        if snapshot is None:
+            return None
+        self._save_checkpoint("fetch", url, snapshot)
+        return await self._event_for_snapshot(
+            url, snapshot, response.headers.get("ETag"), response.headers.get("Last-Modified")
+        )
 
-    async def extract_event_image_playwright(self, page, event_url):
-        """Extract the main image from an event page using Playwright"""
+    async def _goto(self, page, url, wait_until='domcontentloaded'):
+        """Navigate under the outbound governor; timeouts, 429 and 5xx are retried"""
+        from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+        async def navigate():
+            try:
+                response = await page.goto(url, wait_until=wait_until)
+            except PlaywrightTimeoutError as e:
+                raise RetryableError(f"Timeout loading {url}") from e
+            if response is not None:
+                raise_for_status(response.status, response.headers.get("retry-after"), url)
+            return response
+
+        with METRICS.stage("navigate"):
+            return await self.governor.call(host_key(url), navigate)
+
+    async def _scrape_event_page(self, context, url):
+        """Load a single event page in its own tab and build an Event from it"""
+        page = None
         try:
-            logger.info(f"Extracting image from: {event_url}")
-            await page.goto(event_url, wait_until='domcontentloaded')
-            
-            # Try multiple selectors for finding images
-            image_selectors = [
-                'meta[property="og:image"]',
-                'img[src*="thefeedfactory"]',
-                'article img[src]',
-                'main img[src]'
-            ]
-            
-            for selector in image_selectors:
-                element = await page.query_selector(selector)
-                if element:
-                    if selector.startswith('meta'):
-                        image_url = await element.get_attribute('content')
-                    else:
-                        image_url = await element.get_attribute('src')
-
-                    if image_url:
-                        # Convert relative URLs to absolute
-                        if image_url.startswith('/'):
-                            image_url = urljoin(page.url, image_url)
-                        
-                        logger.info(f"Found image: {image_url}")
-                        return image_url
-            
-            logger.warning(f"No suitable image found for {event_url}")
-            return None
-            
+            page = await context.new_page()
+            await self._goto(page, url)
+            if self.recorder:
+                self.recorder.record_page(url, await page.content())
+
+            # Handle cookie consent
+            try:
+                with METRICS.stage("cookie"):
+                    allow_button = await page.query_selector('button:has-text("Allow all")')
+                    if allow_button:
+                        await allow_button.click()
+                        logger.info("Accepted cookie consent.")
+                        # Wait for the banner to disappear
+                        await page.wait_for_selector('button:has-text("Allow all")', state='hidden')
+            except Exception as e:
+                logger.warning(f"Could not handle cookie consent on {url}: {e}")
+
+            snapshot = await self._capture_event_page(page)
+            await page.close()
+            self._save_checkpoint("fetch", url, snapshot)
+            return await self._event_for_snapshot(url, snapshot)
+
         except Exception as e:
-            logger.warning(f"Error extracting image from {event_url}: {e}")
+            logger.warning(f"Error processing page {url}: {e}")
+            return None
+        finally:
+            if page is not None and not page.is_closed():
+                await page.close()
+
+    async def _scrape_event(self, context, url):
+        """Scrape one event, continuing from the last stage a previous run checkpointed for it"""
+        stored = self._checkpointed("enrich", url)
+        if stored:
+            self.path_counts["checkpoint"] += 1
+            return Event.model_validate(stored)
+
+        snapshot = self._checkpointed("fetch", url)
+        if snapshot:
+            self.path_counts["checkpoint"] += 1
+            event = await self._event_for_snapshot(url, snapshot)
+        else:
+            event = await self._fetch_event(context, url)
+        if event:
+            self._save_checkpoint("enrich", url, event.model_dump(mode='json'))
+        return event
+
+    async def _fetch_event(self, context, url):
+        """Scrape one event over plain HTTP, falling back to Playwright"""
+        if self.http_fetcher:
+            try:
+                event = await self._scrape_event_http(url)
+                if event:
+                    self.path_counts["http"] += 1
+                    return event
+            except Exception as e:
+                logger.warning(f"HTTP fast path failed for {url}, using Playwright: {e}")
+
+        self.path_counts["playwright"] += 1
+        return await self._scrape_event_page(context, url)
+
+    async def _scrape_event_pages(self, context, event_urls):
+        """Scrape event pages with a bounded pool of concurrent tabs.
+
+        Returns one entry per URL (an Event or None) in the same order as
+        ``event_urls``, regardless of the order in which pages finish.
+        """
+        worker_count = max(1, min(self.concurrency, len(event_urls)))
+        logger.info(f"Processing {len(event_urls)} event pages with {worker_count} concurrent pages.")
+        return await scrape_bounded(event_urls, lambda url: self._scrape_event(context, url), self.concurrency)
+
+    def _listing_fetchers(self, context):
+        """Fetchers for agenda listing pages: plain HTTP first (if enabled), then the browser"""
+
+        async def fetch_http(url):
+            with METRICS.stage("listing_load"):
+                response = await self.http_fetcher.fetch(url)
+            if response is not None and response.status == 200:
+                METRICS.add_bytes("listing_load", len(response.text.encode("utf-8")))
+                return response.text
             return None
 
-    async def scrape_iamsterdam_playwright(self, limit=None):
-        """Scrape events from I Amsterdam using Playwright to handle dynamic content"""
-        logger.info("Scraping I Amsterdam events agenda with Playwright...")
-        
+        async def fetch_browser(url):
+            page = await context.new_page()
+            try:
+                with METRICS.stage("listing_load"):
+                    await self._goto(page, url, wait_until='networkidle')
+                    html = await page.content()
+                METRICS.add_bytes("listing_load", len(html.encode("utf-8")))
+                if self.recorder:
+                    self.recorder.record_page(url, html)
+                return html
+            finally:
+                await page.close()
+
+        return [fetch_http, fetch_browser] if self.http_fetcher else [fetch_browser]
+
+    async def new_browser_context(self, browser):
+        """A browser context with the request filter installed"""
+        context = await browser.new_context()
+        if self.request_filter:
+            await self.request_filter.attach(context)
+        return context
+
+    @asynccontextmanager
+    async def shared_resources(self, max_tasks_per_child=None):
+        """Launch the browser and create the HTTP fetcher and parse pool that all sources share.
+
+        Yields the browser. On exit the parse pool is shut down and the browser closed.
+        """
+        from concurrent.futures import ProcessPoolExecutor
+        import multiprocessing
+        from playwright.async_api import async_playwright
+        from http_fetcher import HttpFetcher
+
+        async with async_playwright() as p:
+            browser = await p.chromium.launch()
+
+            if self.http_first:
+                # One connection pool for every source, sized to their combined concurrency
+                self.http_fetcher = HttpFetcher(
+                    self.session,
+                    sum(source.concurrency for source in self.sources),
+                    governor=self.governor,
+                    recorder=self.recorder,
+                )
+
+            if self.parse_workers > 0:
+                # Spawn rather than fork: this process already runs browser and fetcher threads
+                self.parse_pool = ProcessPoolExecutor(
+                    max_workers=self.parse_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    max_tasks_per_child=max_tasks_per_child,
+                )
+                self._parse_slots = asyncio.Semaphore(2 * self.parse_workers)
+
+            try:
+                yield browser
+            finally:
+                if self.parse_pool:
+                    self.parse_pool.shutdown()
+                    self.parse_pool = None
+                await browser.close()
+
+    async def scrape_sources_async(self, limit=None):
+        """Run all sources concurrently on one browser context, HTTP fetcher and parse pool"""
+        logger.info(f"Scraping {len(self.sources)} sources: {', '.join(source.name for source in self.sources)}")
+        runner = SourceRunner(self.sources, checkpoint=self.checkpoint)
+
         try:
-            async with async_playwright() as p:
-                browser = await p.chromium.launch()
-                context = await browser.new_context()
-                page = await context.new_page()
-                
-                await page.goto("https://www.iamsterdam.com/uit/agenda", wait_until='networkidle')
-                
-                logger.info("Page loaded. Finding event links...")
-                
-                # Use Playwright to find all event links and extract hrefs immediately
-                link_handles = await page.query_selector_all('a[href*="/uit/agenda/"]')
-                event_urls = []
-                for link_handle in link_handles:
-                    href = await link_handle.get_attribute('href')
-                    if href:
-                        # Filter out category pages by checking URL path depth.
-                        parsed_url = urlparse(href)
-                        if len(parsed_url.path.split('/')) >= 5:
-                            event_urls.append(urljoin("https://www.iamsterdam.com", href))
-
-                await browser.close() # Close the browser now that we have the URLs
-
-                if not event_urls:
-                    logger.warning("No valid event URLs found on the page.")
-                    return
-                
-                logger.info(f"Found {len(event_urls)} potential event URLs. Processing them now...")
-
-                if limit:
-                    logger.info(f"Applying limit: scraping a maximum of {limit} events.")
-                    event_urls = event_urls[:limit]
-
-                async with async_playwright() as p_inner:
-                    browser_inner = await p_inner.chromium.launch()
-                    context_inner = await browser_inner.new_context()
-
-                    for url in event_urls:
-                        try:
-                            page = await context_inner.new_page()
-                            await page.goto(url, wait_until='domcontentloaded')
-
-                            # Handle cookie consent
-                            try:
-                                allow_button = await page.query_selector('button:has-text("Allow all")')
-                                if allow_button:
-                                    await allow_button.click()
-                                    logger.info("Accepted cookie consent.")
-                                    # Wait for the banner to disappear
-                                    await page.wait_for_selector('button:has-text("Allow all")', state='hidden')
-                            except Exception as e:
-                                logger.warning(f"Could not handle cookie consent on {url}: {e}")
-
-                            title = await page.title()
-                            
-                            # Try to find a more specific title within the page
-                            h1_title = await page.query_selector('h1')
-                            if h1_title:
-                                title = await h1_title.text_content()
-                            
-                            # New approach: get HTML, convert to Markdown, then parse
-                            main_content_html = ""
-                            main_element = await page.query_selector('main')
-                            if main_element:
-                                main_content_html = await main_element.inner_html()
-
-                            if not main_content_html:
-                                logger.warning(f"Could not find main content for {url}")
-                                continue
-
-                            # Use markitdown to convert HTML to Markdown
-                            # It expects a file-like object, so we use io.BytesIO
-                            html_stream = io.BytesIO(main_content_html.encode('utf-8'))
-                            result = self.md_converter.convert(html_stream)
-                            markdown_text = result.text_content
-
-                            parsed_data = self._parse_event_from_markdown(markdown_text)
-
-                            description = parsed_data.get("description")
-
-                            # Translate description to English
-                            try:
-                                if description:
-                                    # Using Google translator
-                                    translated_description = ts.translate_text(description, translator='google', to_language='en')
-                                    description = translated_description
-                                    logger.info(f"Successfully translated description for: {title}")
-                            except Exception as e:
-                                logger.warning(f"Could not translate description for {title}: {e}")
-
-                            # Translate title to English
-                            try:
-                                if title:
-                                    translated_title = ts.translate_text(title, translator='google', to_language='en')
-                                    title = translated_title
-                                    logger.info(f"Successfully translated title for event: {title}")
-                            except Exception as e:
-                                logger.warning(f"Could not translate title for {title}: {e}")
-
-                            event_image = await self.extract_event_image_playwright(page, url)
-                            
-                            event_data = Event(
-                                title=title.strip(),
-                                link=url,
-                                description=description,
-                                source="I Amsterdam Official",
-                                date_text=parsed_data.get("date_text", ["Check website for dates"]),
-                                price_text=parsed_data.get("price_text", "Check website for prices"),
-                                pub_date=datetime.now(timezone.utc),
-                                image=event_image
-                            )
-
-                            if not any(e.link == event_data.link for e in self.events):
-                                self.events.append(event_data)
-                            
-                            await page.close()
-
-                        except Exception as e:
-                            logger.warning(f"Error processing page {url}: {e}")
-                            if 'page' in locals() and not page.is_closed():
-                                await page.close()
-                            continue
-                    
-                    await browser_inner.close()
-
-                logger.info(f"Finished processing. Found {len(self.events)} unique events.")
+            async with self.shared_resources() as browser:
+                # Sources share the browser context for their pages
+                results = await runner.run(await self.new_browser_context(browser), limit)
+            if self.checkpoint:
+                for stage in ("fetch", "parse", "translate"):
+                    self.checkpoint.complete(stage)
+
+            # Collect in source and listing order so the feed does not depend on timing
+            seen_links = {canonical_link(e.link) for e in self.events}
+            for source in self.sources:
+                for event_data in results[source.name]:
+                    if canonical_link(event_data.link) not in seen_links:
+                        seen_links.add(canonical_link(event_data.link))
+                        self.events.append(event_data)
+            self.incomplete_sources = runner.incomplete_labels()
+
+            logger.info(f"Finished processing. Found {len(self.events)} unique events.")
+            runner.log_summary()
+            METRICS.increment("event_urls", sum(report["urls"] for report in runner.reports.values()))
+            METRICS.increment("events_scraped", sum(len(events) for events in results.values()))
+            for path, count in self.path_counts.items():
+                METRICS.increment(f"event_pages_{path}", count)
+            for outcome, count in self.cache_counts.items():
+                METRICS.increment(f"page_cache_{outcome}", count)
+            logger.info(
+                f"Event pages by path: {self.path_counts['http']} via HTTP, "
+                f"{self.path_counts['playwright']} via Playwright, "
+                f"{self.path_counts['checkpoint']} from the checkpoint."
+            )
+            self.save_caches()
 
         except Exception as e:
-            logger.error(f"Error scraping I Amsterdam agenda with Playwright: {e}")
-
-    def scrape_iamsterdam(self, limit=None):
-        """Scrape events from I Amsterdam website - official Amsterdam events agenda with images"""
-        asyncio.run(self.scrape_iamsterdam_playwright(limit=limit))
+            logger.error(f"Error scraping event sources: {e}")
+
+    def save_caches(self):
+        """Log the cache, filter and governor summaries and write the caches to disk"""
+        if self.page_cache:
+            logger.info(
+                f"Page cache: {self.cache_counts['not_modified']} not modified, "
+                f"{self.cache_counts['unchanged']} unchanged, "
+                f"{self.cache_counts['changed']} new or changed."
+            )
+            self.page_cache.evict()
+        self.translator.log_summary()
+        if self.translator.cache:
+            self.translator.cache.save()
+        if self.request_filter:
+            self.request_filter.log_summary()
+        self.governor.log_summary()
+        if self.recorder:
+            self.recorder.save()
+
+    def scrape_sources(self, limit=None):
+        """Scrape every enabled source; `limit` caps the events per source"""
+        asyncio.run(self.scrape_sources_async(limit=limit))
 
     def deduplicate_events(self):
-        """Remove duplicate events based on title similarity"""
+        """Remove exact (same canonical link) and near-duplicate (similar title + description) events"""
         logger.info("Removing duplicate events...")
 
-        unique_events = []
-        seen_titles = set()
+        index = DedupIndex()
+        with METRICS.stage("dedup"):
+            for event in self.events:
+                index.add(event)
+        METRICS.increment("duplicates_removed", len(index.merges))
 
+        original_count = len(self.events)
+        self.events = index.events
+        self.dedup_merges = index.merges
+        reasons = Counter(merge["reason"] for merge in index.merges)
+        logger.info(f"Removed {original_count - len(self.events)} duplicate events ({dict(reasons)})")
+
+    async def enrich_images_async(self):
+        if self._image_prober is None:
+            # Kept for the scraper's lifetime, so a daemon reuses its connection pool
+            self._image_prober = ImageProber(
+                concurrency=self.concurrency, governor=self.governor, cache=self.image_cache
+            )
+            self._image_prober.session.headers.update(self.session.headers)
+        prober = self._image_prober
+        with METRICS.stage("enrich_images"):
+            infos = await prober.probe_all(str(event.image) for event in self.events if event.image)
         for event in self.events:
-            # Create a normalized title for comparison
-            normalized_title = re.sub(
-                r"[^a-zA-Z0-9\s]", "", event.title.lower()
-            ).strip()
+            info = infos.get(str(event.image)) if event.image else None
+            event.image_info = ImageInfo(**info) if info else None
+        METRICS.increment("images_probed", prober.stats["probed"])
+        METRICS.increment("image_cache_hits", prober.stats["cache_hits"])
+        prober.log_summary()
+        if self.image_cache:
+            self.image_cache.save()
+
+    def enrich_images(self):
+        """Set image_info (MIME type, byte length, dimensions) on every event with an image"""
+        asyncio.run(self.enrich_images_async())
+
+    def load_stored_events(self):
+        """Replace self.events with the store's events of the latest run (first-seen pub_date)"""
+        self.events = [Event.model_validate(event) for event in self.store.current_events()]
+        return self.events
 
-            if normalized_title not in seen_titles and len(normalized_title) > 5:
-                seen_titles.add(normalized_title)
-                unique_events.append(event)
+    def _occurrence_index(self):
+        """Interval index of self.events over their parsed occurrences"""
+        index = OccurrenceIndex()
+        for event in self.events:
+            # The site leaves out the year, so read the dates as of when they were scraped
+            index.add(event, parse_occurrences(event.date_text, event_reference_date(event)))
+        return index
+
+    def prune_past_events(self, now=None):
+        """Drop events whose every occurrence has ended; events without parseable dates are kept"""
+        now = now or datetime.now(AMSTERDAM)
+        past = {id(event) for event in self._occurrence_index().ended_before(now)}
+        if past:
+            self.events = [event for event in self.events if id(event) not in past]
+            logger.info(f"Pruned {len(past)} past events.")
+        METRICS.increment("past_events_pruned", len(past))
+
+    def _channel(self, title="Amsterdam Events Feed", link=FEED_URL):
+        return {
+            "title": title,
+            # Link to the feed itself, also used for the Atom self-link
+            "link": link,
+            "description": "Curated upcoming events and activities in Amsterdam from I amsterdam official agenda",
+            "language": "en",
+            "last_build_date": datetime.now(timezone.utc),
+            "generator": "Amsterdam Events Scraper v10.0",
+        }
 
-        original_count = len(self.events)
-        self.events = unique_events
-        logger.info(f"Removed {original_count - len(self.events)} duplicate events")
+    def _output_path(self, name):
+        return os.path.normpath(os.path.join(self.output_dir, name))
 
-    def generate_rss_feed(self, output_file='events.xml'):
+    def generate_rss_feed(self, output_file='events.xml', render_content=_build_html_content):
         """Generate RSS feed from collected events"""
         logger.info(f"Generating RSS feed with {len(self.events)} events...")
-        
-        # Create RSS root element with registered namespaces
-        rss = ET.Element("rss", version="2.0")
-        channel = ET.SubElement(rss, "channel")
-
-        ET.SubElement(channel, "title").text = "Amsterdam Events Feed"
-        # Main link to the RSS feed
-        ET.SubElement(channel, "link").text = "https://raw.githubusercontent.com/lassebenni/amsterdam-events-feed/master/events.xml"
-        # Atom self-link for interoperability
-        ET.SubElement(
-            channel,
-            "{http://www.w3.org/2005/Atom}link",
-            attrib={
-                "rel": "self",
-                "href": "https://raw.githubusercontent.com/lassebenni/amsterdam-events-feed/master/events.xml",
-                "type": "application/rss+xml",
-            },
-        )
-        ET.SubElement(channel, "description").text = "Curated upcoming events and activities in Amsterdam from I amsterdam official agenda"
-        ET.SubElement(channel, "language").text = "en"
-        ET.SubElement(channel, "lastBuildDate").text = format_datetime(datetime.now(timezone.utc))
-        ET.SubElement(channel, "generator").text = "Amsterdam Events Scraper v10.0"
 
+        with METRICS.stage("rss_render"):
+            write_rss_feed(self.events, output_file, self._channel(), render_content)
+        METRICS.add_bytes("rss_render", os.path.getsize(output_file))
+        METRICS.increment("events_in_feed", len(self.events))
+        self.outputs.append(output_file)
+
+    def generate_alternate_feeds(self, atom_file=ATOM_FILE, json_feed_file=JSON_FEED_FILE, render_content=_build_html_content):
+        """Write the Atom and JSON Feed versions of the full feed"""
+        for path, writer in ((atom_file, write_atom_feed), (json_feed_file, write_json_feed)):
+            with METRICS.stage("feed_render"):
+                link = f"{FEED_BASE_URL}/{os.path.basename(path)}"
+                writer(self.events, path, self._channel(link=link), render_content)
+            METRICS.add_bytes("feed_render", os.path.getsize(path))
+            self.outputs.append(path)
+
+    def plan_feed_shards(self, now=None) -> dict:
+        """Shard file name -> (title, events) for the time-window and per-category feeds"""
+        now = now or datetime.now(AMSTERDAM)
+        midnight = datetime.combine(now.date(), time(0), AMSTERDAM)
+        index = self._occurrence_index()
+        shards = {
+            "today.xml": ("Today", index.overlapping(now, midnight + timedelta(days=1))),
+            "week.xml": ("Next 7 Days", index.overlapping(now, midnight + timedelta(days=7))),
+            "month.xml": ("Next 30 Days", index.overlapping(now, midnight + timedelta(days=30))),
+        }
+        categories = {}
         for event in self.events:
-            item = ET.SubElement(channel, "item")
-            ET.SubElement(item, "title").text = event.title
-            ET.SubElement(item, "link").text = str(event.link)
-            ET.SubElement(item, "pubDate").text = format_datetime(event.pub_date)
-            ET.SubElement(item, "guid", isPermaLink="false").text = str(event.link)
-            ET.SubElement(item, "description").text = event.description
-            
-            content_encoded = ET.SubElement(item, "{http://purl.org/rss/1.0/modules/content/}encoded")
-            content_encoded.text = f"__CDATA_PLACEHOLDER_{event.link}__"
-            
-            # Also add image as enclosure for RSS readers that support it
-            if event.image:
-                ET.SubElement(item, "enclosure", url=str(event.image), type="image/jpeg", length="0")
-
-        xml_str = ET.tostring(rss, encoding='unicode')
-
-        # Replace placeholders with actual CDATA content
-        for event in self.events:
-            html_content = _build_html_content(event)
-            cdata_placeholder = f"__CDATA_PLACEHOLDER_{event.link}__"
-            xml_str = xml_str.replace(cdata_placeholder, f"<![CDATA[{html_content}]]>")
+            # Events cached before categories were recorded get theirs from the link
+            for tag in event.tags or filter(None, [agenda_category(str(event.link))]):
+                categories.setdefault(tag, []).append(event)
+        for tag, events in sorted(categories.items()):
+            slug = re.sub(r"[^a-z0-9]+", "-", tag.lower()).strip("-")
+            if slug:
+                shards.setdefault(f"category-{slug}.xml", (tag.replace("-", " ").title(), events))
+        return shards
+
+    def generate_feed_shards(self, shards=None, directory=FEED_SHARD_DIR, render_content=_build_html_content):
+        """Write the planned shards; shards that no longer apply are removed"""
+        shards = self.plan_feed_shards() if shards is None else shards
+        os.makedirs(directory, exist_ok=True)
+        with METRICS.stage("shard_render"):
+            for name, (label, events) in shards.items():
+                path = os.path.join(directory, name)
+                channel = self._channel(f"Amsterdam Events Feed: {label}", f"{FEED_SHARD_URL}/{name}")
+                write_rss_feed(events, path, channel, render_content)
+                METRICS.add_bytes("shard_render", os.path.getsize(path))
+                self.outputs.append(path)
+            for name in os.listdir(directory):
+                if name.endswith(".xml") and name not in shards:
+                    remove_output(os.path.join(directory, name))
+        METRICS.increment("feed_shards", len(shards))
+        logger.info(
+            f"Wrote {len(shards)} feed shards to {directory}/: "
+            + ", ".join(f"{name} ({len(events)})" for name, (_, events) in shards.items())
+        )
 
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(xml_str)
+    @staticmethod
+    def _shards_changed(shards, directory=FEED_SHARD_DIR) -> bool:
+        """Whether the planned shards differ from the shard files on disk (time windows move daily)"""
+        existing = {name for name in os.listdir(directory) if name.endswith(".xml")} if os.path.isdir(directory) else set()
+        if existing != set(shards):
+            return True
+        return any(
+            feed_links(os.path.join(directory, name)) != [str(event.link) for event in events]
+            for name, (_, events) in shards.items()
+        )
+
+    def render_outputs(self, prune=True, force=False) -> bool:
+        """Write all feeds and events.json from self.events, then their compressed copies and manifest.
+
+        Everything goes into self.output_dir. Nothing is written when the
+        events match the events.json there and the shards are unchanged,
+        unless `force` is set. Returns whether the outputs were written.
+        """
+        if prune:
+            self.prune_past_events()
+        published = load_published_events(self._output_path("events.json"))
+        current = [event.model_dump(mode='json') for event in self.events]
+        self.changes = diff_events(published or [], current)
+        shards = self.plan_feed_shards()
+        METRICS.increment("events_added", len(self.changes.added))
+        METRICS.increment("events_removed", len(self.changes.removed))
+        METRICS.increment("events_updated", len(self.changes.updated))
+
+        shard_dir = self._output_path(FEED_SHARD_DIR)
+        outputs = ("events.xml", ATOM_FILE, JSON_FEED_FILE, "events.json", DEFAULT_MANIFEST_FILE)
+        complete = published is not None and all(os.path.exists(self._output_path(name)) for name in outputs)
+        if complete and not force and not self.changes and not self._shards_changed(shards, shard_dir):
+            logger.info("No event changes since the last published feed; leaving the outputs untouched.")
+            return False
+
+        logger.info(f"Feed changes: {self.changes.summary()}")
+        self.outputs = []
+        os.makedirs(self.output_dir, exist_ok=True)
+        # Each event's HTML is built once and shared by all feeds and shards
+        render_content = _content_renderer()
+        self.generate_rss_feed(self._output_path("events.xml"), render_content)
+        self.generate_alternate_feeds(self._output_path(ATOM_FILE), self._output_path(JSON_FEED_FILE), render_content)
+        self.generate_feed_shards(shards, shard_dir, render_content)
+        self.save_events_json(self._output_path("events.json"))
+        with METRICS.stage("compress"):
+            # Manifest keys are relative to the output directory, as a static server sees them
+            manifest_file = self._output_path(DEFAULT_MANIFEST_FILE)
+            previous = {self._output_path(name): entry for name, entry in load_manifest(manifest_file).items()}
+            entries = {
+                os.path.relpath(path, self.output_dir): entry
+                for path, entry in precompress(self.outputs, previous).items()
+            }
+            write_manifest(entries, manifest_file)
+        write_changelog(self.changes, self._output_path(DEFAULT_CHANGELOG_FILE))
+        return True
 
     def save_events_json(self, output_file="events.json"):
         """Save events as JSON for debugging/alternative use"""
         # Create a list of dictionaries from the Pydantic models
-        events_dict = [event.model_dump(mode='json') for event in self.events]
-        with open(output_file, "w", encoding="utf-8") as f:
-            json.dump(events_dict, f, indent=2, ensure_ascii=False)
+        with METRICS.stage("json_save"):
+            events_dict = [event.model_dump(mode='json') for event in self.events]
+            with atomic_open(output_file) as f:
+                json.dump(events_dict, f, indent=2, ensure_ascii=False)
+        METRICS.add_bytes("json_save", os.path.getsize(output_file))
+        self.outputs.append(output_file)
         logger.info(f"Events data saved to {output_file}")
 
     def scrape_all(self, limit=None):
-        """Run all scrapers - prioritizing official I amsterdam source for current month events"""
+        """Run all sources, then deduplicate and store the events"""
         logger.info("Starting Amsterdam events scraping...")
 
-        # Prioritize official I amsterdam agenda for current month events
-        self.scrape_iamsterdam(limit=limit)
+        # Sources run side by side; the official I amsterdam agenda is registered first
+        self.scrape_sources(limit=limit)
 
         # Clean up the data
         self.deduplicate_events()
+        if self.probe_images and self.events:
+            self.enrich_images()
+        if self.checkpoint and self.events:
+            self.checkpoint.save_events([event.model_dump(mode='json') for event in self.events])
+        if self.store and self.events:
+            # A source that failed this run keeps its events from the last one
+            self.store.upsert(self.events, keep_sources=self.incomplete_sources)
+            self.load_stored_events()
 
         logger.info(f"Scraping complete. Total events collected: {len(self.events)}")
 
@@ -490,22 +911,34 @@ class AmsterdamEventsScraper:
 def publish_to_github():
     """Commit and push the updated feed files to GitHub."""
     logger.info("Publishing updated feed to GitHub...")
+    with METRICS.stage("publish"):
+        _publish_to_github()
+
+
+def _publish_to_github():
+    """Run the git commands; failures are logged and counted, not raised"""
     try:
         # Configure Git user
         subprocess.run(['git', 'config', 'user.name', 'Automated Scraper'], check=True)
         subprocess.run(['git', 'config', 'user.email', 'scraper@example.com'], check=True)
 
         # Add the generated files
-        subprocess.run(['git', 'add', 'events.xml', 'events.json'], check=True)
+        # "events.*" is a git pathspec: every feed format and its .gz/.br siblings
+        subprocess.run(
+            ['git', 'add', '--all', '--', 'events.*', FEED_SHARD_DIR, DEFAULT_MANIFEST_FILE, DEFAULT_CHANGELOG_FILE],
+            check=True,
+        )
         
-        # Check for changes
-        status_result = subprocess.run(['git', 'status', '--porcelain'], capture_output=True, text=True)
-        if not status_result.stdout.strip():
+        # Check for staged changes (unrelated files in the working tree do not count)
+        if subprocess.run(['git', 'diff', '--cached', '--quiet']).returncode == 0:
             logger.info("No changes to commit. Feed is already up-to-date.")
             return
 
-        # Commit the changes
+        # Commit the changes, summarized from the changelog of the last render
         commit_message = f"feed: Auto-update event feed on {datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')}"
+        summary = changelog_summary(DEFAULT_CHANGELOG_FILE)
+        if summary:
+            commit_message += f" ({summary})"
         subprocess.run(['git', 'commit', '-m', commit_message], check=True)
         
         # Push the changes
@@ -514,35 +947,461 @@ def publish_to_github():
         logger.info("Successfully published the new feed to GitHub.")
         
     except subprocess.CalledProcessError as e:
+        METRICS.add_error("publish")
         logger.error(f"Failed to publish to GitHub: {e}")
         logger.error(f"Git command output:\n{e.stderr}")
     except FileNotFoundError:
+        METRICS.add_error("publish")
         logger.error("Git command not found. Please ensure Git is installed and in your PATH.")
 
 
 def main():
     """Main execution function"""
     parser = argparse.ArgumentParser(description="Scrape Amsterdam events and generate an RSS feed.")
-    parser.add_argument("--limit", type=int, help="Limit the number of events to scrape for testing.")
+    parser.add_argument(
+        "command",
+        nargs="?",
+        default="run",
+        choices=("run", "daemon", "render", "publish", "validate", "stats"),
+        help="run: the whole pipeline (default); daemon: keep running and re-check events by "
+             "priority, updating the feeds when they change; render: write the feeds and events.json "
+             "from the events stored by the last run; publish: commit and push the rendered files; "
+             "validate: check events.xml; stats: summarize the event store. Only run and daemon load "
+             "the browser, HTTP and translation stack.",
+    )
+    parser.add_argument("--limit", type=int, help="Limit the number of events to scrape per source, for testing.")
+    parser.add_argument(
+        "--sources",
+        default=",".join(SOURCES),
+        help=f"Comma-separated sources to scrape (default: {','.join(SOURCES)}).",
+    )
+    parser.add_argument(
+        "--source-timeout",
+        type=float,
+        default=DEFAULT_SOURCE_TIMEOUT,
+        help=f"Seconds each source may run before its finished events are used without it; 0 disables "
+             f"the limit (default: {DEFAULT_SOURCE_TIMEOUT}).",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help=f"Number of event pages to load in parallel (default: {DEFAULT_CONCURRENCY}).",
+    )
+    parser.add_argument(
+        "--no-request-filter",
+        action="store_true",
+        help="Load every resource on event pages instead of blocking images, fonts and trackers.",
+    )
+    parser.add_argument(
+        "--block-types",
+        default=",".join(DEFAULT_BLOCKED_RESOURCE_TYPES),
+        help="Comma-separated Playwright resource types to block.",
+    )
+    parser.add_argument(
+        "--allow-host",
+        action="append",
+        default=[],
+        help="Extra first-party host whose requests are let through (repeatable).",
+    )
+    parser.add_argument(
+        "--deny-host",
+        action="append",
+        default=[],
+        help="Extra host whose requests are always blocked (repeatable).",
+    )
+    parser.add_argument(
+        "--allow-third-party",
+        action="store_true",
+        help="Do not block hosts outside the allow list (denied hosts are still blocked).",
+    )
+    parser.add_argument(
+        "--no-http-first",
+        action="store_true",
+        help="Always render event pages with Playwright instead of trying plain HTTP first.",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Do not read or write the on-disk page cache.",
+    )
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Re-scrape every page, ignoring cached results (the cache is still updated).",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=DEFAULT_CACHE_DIR,
+        help=f"Directory for the page cache (default: {DEFAULT_CACHE_DIR}).",
+    )
+    parser.add_argument(
+        "--translator",
+        default=DEFAULT_BACKEND,
+        help=f"Translation backend: a `translators` engine such as google or bing, or 'stub' to skip translation (default: {DEFAULT_BACKEND}).",
+    )
+    parser.add_argument(
+        "--translation-cache",
+        default=DEFAULT_CACHE_FILE,
+        help=f"File for cached translations (default: {DEFAULT_CACHE_FILE}).",
+    )
+    parser.add_argument(
+        "--no-image-probe",
+        action="store_true",
+        help="Do not probe event images for their type, size and dimensions (enclosures then guess the type).",
+    )
+    parser.add_argument(
+        "--image-cache",
+        default=DEFAULT_IMAGE_CACHE_FILE,
+        help=f"File for cached image metadata (default: {DEFAULT_IMAGE_CACHE_FILE}).",
+    )
+    parser.add_argument(
+        "--markdown-parser",
+        action="store_true",
+        help="Parse event pages via markitdown and regexes instead of the direct DOM extractor.",
+    )
+    parser.add_argument(
+        "--parse-workers",
+        type=int,
+        default=DEFAULT_PARSE_WORKERS,
+        help=f"Processes used to parse event pages; 0 parses inline (default: {DEFAULT_PARSE_WORKERS}).",
+    )
+    parser.add_argument(
+        "--max-listing-pages",
+        type=int,
+        default=DEFAULT_MAX_LISTING_PAGES,
+        help=f"Maximum number of agenda listing pages to crawl (default: {DEFAULT_MAX_LISTING_PAGES}).",
+    )
+    parser.add_argument(
+        "--crawl-rate",
+        type=float,
+        default=DEFAULT_REQUESTS_PER_SECOND,
+        help=f"Listing page requests per second per host; 0 disables the limit (default: {DEFAULT_REQUESTS_PER_SECOND}).",
+    )
+    parser.add_argument(
+        "--max-retries",
+        type=int,
+        default=DEFAULT_MAX_RETRIES,
+        help=f"Retries for throttled or failed page loads and translations (default: {DEFAULT_MAX_RETRIES}).",
+    )
+    parser.add_argument(
+        "--record",
+        metavar="DIR",
+        help="Save every listing page, event page and translation to DIR for offline replay (implies --no-cache).",
+    )
+    parser.add_argument(
+        "--replay",
+        metavar="DIR",
+        help="Scrape pages and translations recorded with --record from a local server instead of the live site (implies --no-cache; nothing is published).",
+    )
+    parser.add_argument(
+        "--replay-latency",
+        type=float,
+        default=0.0,
+        help="Milliseconds of latency the replay server adds to every response (default: 0).",
+    )
+    parser.add_argument(
+        "--metrics-file",
+        default=DEFAULT_METRICS_FILE,
+        help=f"Where to write the JSON metrics report of the run (default: {DEFAULT_METRICS_FILE}).",
+    )
+    parser.add_argument(
+        "--prometheus-file",
+        help="Also write the metrics as a Prometheus textfile (for node_exporter's textfile collector).",
+    )
+    parser.add_argument(
+        "--profile",
+        metavar="FILE",
+        help="Record a cProfile of the run to FILE (parsing then runs inline so it shows up in the profile).",
+    )
+    parser.add_argument(
+        "--db",
+        default=DEFAULT_DB_FILE,
+        help=f"SQLite event store the outputs are built from (default: {DEFAULT_DB_FILE}).",
+    )
+    parser.add_argument(
+        "--no-store",
+        action="store_true",
+        help="Build the outputs straight from this run's events, without the event store.",
+    )
+    parser.add_argument(
+        "--keep-past",
+        action="store_true",
+        help="Keep events whose dates have all passed in the feeds instead of pruning them.",
+    )
+    parser.add_argument(
+        "--force-render",
+        action="store_true",
+        help="Rewrite the outputs even when no event changed since the published events.json.",
+    )
+    parser.add_argument(
+        "--no-publish",
+        action="store_true",
+        help="Write the outputs but do not commit and push them.",
+    )
+    parser.add_argument(
+        "--output-dir",
+        metavar="DIR",
+        help="Write the feeds, events.json, manifest and changelog to DIR instead of the repository root; "
+             "they are then not published. --replay defaults to a new temporary directory, so a replay "
+             "never touches the published feed.",
+    )
+    parser.add_argument(
+        "--listing-interval",
+        type=float,
+        default=DEFAULT_LISTING_INTERVAL,
+        help=f"daemon: seconds between crawls of the listings for new and removed events "
+             f"(default: {DEFAULT_LISTING_INTERVAL}).",
+    )
+    parser.add_argument(
+        "--render-interval",
+        type=float,
+        default=DEFAULT_RENDER_INTERVAL,
+        help=f"daemon: minimum seconds between feed updates when events change (default: {DEFAULT_RENDER_INTERVAL}).",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help=f"daemon: due event pages refreshed per batch (default: {DEFAULT_BATCH_SIZE}).",
+    )
+    parser.add_argument(
+        "--schedule-file",
+        default=DEFAULT_SCHEDULE_FILE,
+        help=f"daemon: where the refresh schedule is kept across restarts (default: {DEFAULT_SCHEDULE_FILE}).",
+    )
+    parser.add_argument(
+        "--checkpoint-dir",
+        default=DEFAULT_CHECKPOINT_DIR,
+        help=f"Directory for pipeline checkpoints (default: {DEFAULT_CHECKPOINT_DIR}).",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue the last unfinished run from its checkpoints instead of starting over.",
+    )
+    parser.add_argument(
+        "--no-checkpoint",
+        action="store_true",
+        help="Do not write pipeline checkpoints (the run cannot be resumed).",
+    )
     args = parser.parse_args()
 
-    scraper = AmsterdamEventsScraper()
+    if args.command not in ("run", "daemon"):
+        _run_stage(args)
+        return
+    if args.command == "daemon" and (args.record or args.replay or args.no_store):
+        parser.error("daemon keeps its events in the event store and cannot use --record, --replay or --no-store")
+
+    source_names = [name.strip() for name in args.sources.split(",") if name.strip()]
+    unknown = [name for name in source_names if name not in SOURCES]
+    if unknown or not source_names:
+        parser.error(f"unknown source(s) {', '.join(unknown) or '(none given)'}; choose from {', '.join(SOURCES)}")
+
+    governor = OutboundGovernor(max_retries=args.max_retries)
+
+    fixture_store = None
+    replay_server = None
+    agenda_url = AGENDA_URL
+    extra_allowed_hosts = tuple(args.allow_host)
+    if args.record or args.replay:
+        from fixtures import FixtureStore, RecordingBackend, ReplayBackend, ReplayServer
+    if args.replay:
+        fixture_store = FixtureStore(args.replay)
+        replay_server = ReplayServer(fixture_store.load_pages(), latency=args.replay_latency / 1000).start()
+        agenda_url = replay_server.url + "/uit/agenda"
+        extra_allowed_hosts += ("127.0.0.1",)
+        # Keep replayed local URLs out of the caches, the store and the feeds used by live runs
+        args.no_cache = True
+        args.no_store = True
+        if args.output_dir is None:
+            import tempfile
+
+            args.output_dir = tempfile.mkdtemp(prefix="replay-output-")
+        logger.info(f"Replay outputs go to {args.output_dir}")
+    elif args.record:
+        fixture_store = FixtureStore(args.record)
+        # Cache hits would never reach the network, so they would be missing from the recording
+        args.no_cache = True
+
+    request_filter = None
+    if not args.no_request_filter:
+        request_filter = RequestFilter(
+            blocked_resource_types=[t.strip() for t in args.block_types.split(",") if t.strip()],
+            allowed_hosts=DEFAULT_ALLOWED_HOSTS + extra_allowed_hosts,
+            denied_hosts=DEFAULT_DENIED_HOSTS + tuple(args.deny_host),
+            block_third_party=not args.allow_third_party,
+        )
 
+    page_cache = None
+    if not args.no_cache:
+        page_cache = PageCache(cache_dir=args.cache_dir, refresh=args.refresh)
+
+    translation_cache = None
+    if not args.no_cache:
+        translation_cache = TranslationCache(args.translation_cache)
+
+    image_cache = None
+    if not args.no_cache and not args.no_image_probe:
+        image_cache = ImageMetadataCache(args.image_cache)
+    backend = make_backend(args.translator)
+    if args.replay:
+        backend = ReplayBackend(fixture_store)
+    elif args.record:
+        backend = RecordingBackend(backend, fixture_store)
+    translator = Translator(backend, cache=translation_cache, governor=governor)
+
+    checkpoint = None
+    # The daemon has no single run to resume; its schedule file takes that role
+    if not args.no_checkpoint and args.command == "run":
+        checkpoint = Checkpoint(args.checkpoint_dir)
+        checkpoint.start(resume=args.resume)
+
+    scraper = AmsterdamEventsScraper(
+        concurrency=args.concurrency,
+        request_filter=request_filter,
+        http_first=not args.no_http_first,
+        page_cache=page_cache,
+        translator=translator,
+        markdown_parser=args.markdown_parser,
+        # Work in pool processes would be invisible to the profiler
+        parse_workers=0 if args.profile else args.parse_workers,
+        max_listing_pages=args.max_listing_pages,
+        crawl_rate=args.crawl_rate,
+        governor=governor,
+        agenda_url=agenda_url,
+        recorder=fixture_store if args.record else None,
+        checkpoint=checkpoint,
+        store=None if args.no_store else EventStore(args.db),
+        sources=source_names,
+        source_timeout=args.source_timeout,
+        # Replayed events point at live image URLs, so replays stay offline by not probing them
+        probe_images=not (args.no_image_probe or args.replay),
+        image_cache=image_cache,
+        output_dir=args.output_dir or ".",
+    )
+
+    profiler = None
+    if args.profile:
+        import cProfile
+        import pstats
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+    try:
+        if args.command == "daemon":
+            _run_daemon(scraper, args)
+        else:
+            _run(scraper, args, replay_server)
+    finally:
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(args.profile)
+            logger.info(f"cProfile output written to {args.profile}")
+            pstats.Stats(profiler).sort_stats("cumulative").print_stats(25)
+        _write_metrics(args)
+        if checkpoint:
+            checkpoint.close()
+        if scraper.store:
+            scraper.store.close()
+
+
+def _write_metrics(args):
+    METRICS.log_summary()
+    METRICS.write_json(args.metrics_file)
+    if args.prometheus_file:
+        METRICS.write_prometheus(args.prometheus_file)
+
+
+def _run_stage(args):
+    """Run a later stage (render, publish) or a read-only command (validate, stats) on its own"""
+    if args.command == "validate":
+        feed_file = os.path.normpath(os.path.join(args.output_dir or ".", "events.xml"))
+        item_count, problems = validate_rss_feed(feed_file)
+        for problem in problems:
+            print(f"❌ {problem}")
+        if problems:
+            raise SystemExit(1)
+        print(f"✅ {feed_file} is valid ({item_count} items)")
+        return
+    if args.command == "stats":
+        if not os.path.exists(args.db):
+            print(f"❌ No event store at {args.db}. Run the scraper first.")
+            raise SystemExit(1)
+        print(json.dumps(EventStore(args.db).stats(), indent=2))
+        return
+
+    checkpoint = Checkpoint(args.checkpoint_dir).load()
+    if args.command == "render":
+        scraper = AmsterdamEventsScraper(output_dir=args.output_dir or ".")
+        if not args.no_store and os.path.exists(args.db):
+            scraper.store = EventStore(args.db)
+            scraper.load_stored_events()
+        else:
+            stored = checkpoint.load_events()
+            scraper.events = [Event.model_validate(event) for event in stored or []]
+        if not scraper.events:
+            print("❌ No stored events. Run the scraper first.")
+            return
+        try:
+            written = scraper.render_outputs(prune=not args.keep_past, force=args.force_render)
+        finally:
+            _write_metrics(args)
+        checkpoint.complete("render")
+        if written:
+            print(f"✅ Rendered {len(scraper.events)} stored events to {len(scraper.outputs)} files "
+                  f"({scraper.changes.summary()}, see {scraper._output_path(DEFAULT_CHANGELOG_FILE)})")
+        else:
+            print("✅ No event changes; the outputs are up to date")
+    elif args.command == "publish":
+        publish_to_github()
+        checkpoint.complete("publish")
+
+
+def _run_daemon(scraper, args):
+    """Keep scraping and updating the feeds until interrupted"""
+    daemon = ScraperDaemon(
+        scraper,
+        schedule_file=args.schedule_file,
+        listing_interval=args.listing_interval,
+        render_interval=args.render_interval,
+        batch_size=args.batch_size,
+        limit=args.limit,
+        prune=not args.keep_past,
+        publish=None if args.no_publish or args.output_dir else publish_to_github,
+        metrics_file=args.metrics_file,
+        prometheus_file=args.prometheus_file,
+    )
+    asyncio.run(daemon.run())
+
+
+def _run(scraper, args, replay_server):
+    """Scrape, write the feed files and publish them"""
     # Scrape all sources
-    events = scraper.scrape_all(limit=args.limit)
+    try:
+        events = scraper.scrape_all(limit=args.limit)
+    finally:
+        if replay_server:
+            replay_server.stop()
 
     if events:
-        # Generate RSS feed
-        scraper.generate_rss_feed()
-
-        # Save JSON for debugging
-        scraper.save_events_json()
-
-        print(f"✅ Successfully generated feed with {len(events)} events")
-        print("📄 Files created: events.xml, events.json")
+        # Generate the RSS feeds and the JSON for debugging, unless no event changed
+        written = scraper.render_outputs(prune=not args.keep_past, force=args.force_render)
+        if scraper.checkpoint:
+            scraper.checkpoint.complete("render")
+
+        if written:
+            print(f"✅ Successfully generated feed with {len(scraper.events)} events ({scraper.changes.summary()})")
+            print(f"📄 Files created in {scraper.output_dir}: events.xml, {ATOM_FILE}, {JSON_FEED_FILE}, "
+                  f"{FEED_SHARD_DIR}/*.xml, events.json (+ .gz/.br, {DEFAULT_MANIFEST_FILE}, {DEFAULT_CHANGELOG_FILE})")
+        else:
+            print(f"✅ No event changes among {len(scraper.events)} events; feed files left untouched")
         
-        # Publish the new feed to GitHub
-        publish_to_github()
+        # Publish the new feed to GitHub (only the repository-root outputs of a live run, and only if something changed)
+        if written and not args.replay and not args.no_publish and not args.output_dir:
+            publish_to_github()
+        if scraper.checkpoint:
+            scraper.checkpoint.complete("publish")
 
         print("🔗 Ready to use with WordPress RSS plugins!")
     else:
@@ -0,0 +1,180 @@
+"""
+Event sources and the runner that scrapes them side by side.
+
+A source discovers event URLs and turns each one into an Event
+(discover -> fetch -> parse). Sources register themselves with
+@register_source. SourceRunner runs the enabled sources concurrently on one
+event loop. They share the scraper's browser context, HTTP fetcher, parse
+pool and translator, but each source has its own concurrency and time
+budget. A source that fails or runs out of time keeps the events it
+finished, and the other sources carry on.
+"""
+
+import asyncio
+import logging
+import time
+
+from metrics import METRICS
+
+logger = logging.getLogger(__name__)
+
+# Seconds a source may spend on discovery and its event pages together
+DEFAULT_SOURCE_TIMEOUT = 30 * 60
+
+# name -> EventSource subclass, in registration order
+SOURCES: dict[str, type] = {}
+
+OK = "ok"
+TIMED_OUT = "timed out"
+FAILED = "failed"
+
+
+def register_source(cls):
+    """Class decorator that makes a source available to the runner and --sources"""
+    if not cls.name or not cls.label:
+        raise ValueError(f"{cls.__name__} needs a name and a label")
+    SOURCES[cls.name] = cls
+    return cls
+
+
+def source_link_text(label: str) -> str:
+    """Text of the feed's link to the event page, for the source an event came from"""
+    for cls in SOURCES.values():
+        if cls.label == label:
+            return cls.link_text
+    return EventSource.link_text
+
+
+class EventSource:
+    """One event website.
+
+    Subclasses set `name` (used on the command line and in checkpoints),
+    `label` (Event.source) and implement discover(), fetch() and parse().
+    A source whose pages go through a pipeline of its own may override
+    scrape_event() instead of fetch() and parse().
+    """
+
+    name = None
+    label = None
+    link_text = "View Event Details"
+
+    def __init__(self, scraper, concurrency=None, timeout=DEFAULT_SOURCE_TIMEOUT):
+        # The AmsterdamEventsScraper whose browser, fetcher, parse pool and translator are shared
+        self.scraper = scraper
+        self.concurrency = max(1, concurrency or scraper.concurrency)
+        # None or 0 means no time limit
+        self.timeout = timeout or None
+
+    async def discover(self, context, limit=None) -> list[str]:
+        """Event page URLs, in the order their events should appear"""
+        raise NotImplementedError
+
+    async def fetch(self, context, url):
+        """Load one event page; returns whatever parse() needs, or None"""
+        raise NotImplementedError
+
+    async def parse(self, url, page):
+        """Build an Event from a fetched page, or return None"""
+        raise NotImplementedError
+
+    async def scrape_event(self, context, url):
+        page = await self.fetch(context, url)
+        return await self.parse(url, page) if page is not None else None
+
+
+async def scrape_bounded(urls, scrape_one, concurrency, results=None) -> list:
+    """Await scrape_one(url) for every URL with at most `concurrency` in flight.
+
+    Entries of `results` (one per URL, in URL order) are filled in as pages
+    finish, so a caller that is cancelled still has the finished ones. A
+    page that raises is logged and left as None.
+    """
+    results = [None] * len(urls) if results is None else results
+    queue: asyncio.Queue = asyncio.Queue()
+    for index, url in enumerate(urls):
+        queue.put_nowait((index, url))
+
+    async def worker():
+        while True:
+            try:
+                index, url = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            try:
+                results[index] = await scrape_one(url)
+            except Exception as e:
+                logger.warning(f"Error processing page {url}: {e}")
+
+    worker_count = max(1, min(concurrency, len(urls)))
+    await asyncio.gather(*(worker() for _ in range(worker_count)))
+    return results
+
+
+class SourceRunner:
+    """Runs sources concurrently, each under its own timeout."""
+
+    def __init__(self, sources, checkpoint=None):
+        self.sources = list(sources)
+        # Optional pipeline.Checkpoint holding each source's discovered URLs
+        self.checkpoint = checkpoint
+        # name -> {"status", "urls", "events", "seconds"} of the last run()
+        self.reports: dict[str, dict] = {}
+
+    async def _discover(self, source, context, limit):
+        urls = self.checkpoint.load_urls(source.name) if self.checkpoint else None
+        if urls is not None:
+            logger.info(f"{source.name}: using {len(urls)} event URLs discovered by the resumed run.")
+            return urls
+        with METRICS.stage("discover"):
+            urls = await source.discover(context, limit)
+        if limit:
+            urls = urls[:limit]
+        if self.checkpoint:
+            self.checkpoint.save_urls(source.name, urls)
+        return urls
+
+    async def _scrape(self, source, context, limit, results, report):
+        urls = await self._discover(source, context, limit)
+        report["urls"] = len(urls)
+        results.extend([None] * len(urls))
+        logger.info(f"{source.name}: processing {len(urls)} event pages with up to {source.concurrency} at a time.")
+        await scrape_bounded(urls, lambda url: source.scrape_event(context, url), source.concurrency, results)
+
+    async def _run_source(self, source, context, limit):
+        results = []
+        report = self.reports[source.name] = {"status": OK, "urls": 0, "events": 0, "seconds": 0.0}
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(self._scrape(source, context, limit, results, report), source.timeout)
+        except asyncio.TimeoutError:
+            report["status"] = TIMED_OUT
+            METRICS.add_error(f"source_{source.name}")
+            logger.error(f"{source.name}: stopped after its {source.timeout:g}s budget; keeping the finished events.")
+        except Exception as e:
+            report["status"] = FAILED
+            METRICS.add_error(f"source_{source.name}")
+            logger.error(f"{source.name}: source failed: {e}")
+        events = [event for event in results if event]
+        report["events"] = len(events)
+        report["seconds"] = round(time.monotonic() - started, 1)
+        METRICS.increment(f"source_{source.name}_events", len(events))
+        return events
+
+    async def run(self, context, limit=None) -> dict:
+        """Scrape every source; returns name -> events in each source's listing order"""
+        self.reports = {}
+        outcomes = await asyncio.gather(*(self._run_source(source, context, limit) for source in self.sources))
+        if self.checkpoint:
+            self.checkpoint.complete("discover")
+        return {source.name: events for source, events in zip(self.sources, outcomes)}
+
+    def incomplete_labels(self) -> list[str]:
+        """Event.source labels of the sources that failed or timed out in the last run()"""
+        return [source.label for source in self.sources if self.reports.get(source.name, {}).get("status") != OK]
+
+    def log_summary(self):
+        for name, report in self.reports.items():
+            logger.info(
+                f"Source {name}: {report['status']}, {report['events']} events "
+                f"from {report['urls']} URLs in {report['seconds']}s"
+            )
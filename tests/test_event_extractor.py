@@ -0,0 +1,26 @@
+import pytest
+
+from event_extractor import parse_event_html
+from fixtures import _synthetic_event_page
+
+RICH_PAGE = (
+    "<main><article><h1>Avondconcert</h1>"
+    '<p><img src="https://example.com/banner.svg" alt=""></p>'
+    "<p>Een avond vol muziek in de grote zaal, met <strong>nadruk</strong> en een "
+    '<a href="https://example.com/info">link</a> naar meer informatie over het programma.</p>'
+    "<h2>Data</h2><ul><li><strong>vr 13 jun</strong> 20:00 - 22:00</li><li>za 14 jun t/m zo 15 jun</li></ul>"
+    '<p><a href="https://tickets.example/buy?a=1">Koop tickets vanaf €17,50</a></p>'
+    "</article></main>"
+)
+
+
+def _main(page: str) -> str:
+    return page[page.index("<main>"):page.index("</main>") + len("</main>")]
+
+
+@pytest.mark.parametrize("page", [_synthetic_event_page(3), RICH_PAGE], ids=["synthetic", "rich"])
+def test_dom_and_markdown_paths_give_the_same_fields(page):
+    dom = parse_event_html(_main(page))
+    markdown = parse_event_html(_main(page), markdown_parser=True)
+    assert dom["date_text"]
+    assert dom == markdown
@@ -0,0 +1,44 @@
+from feed_diff import diff_events, event_fingerprint
+
+
+def _event(**fields):
+    event = {
+        "title": "Concert",
+        "link": "https://www.iamsterdam.com/en/whats-on/calendar/music/concert",
+        "description": "An evening of music",
+        "pub_date": "2025-06-01T10:00:00Z",
+    }
+    event.update(fields)
+    return event
+
+
+def test_null_field_matches_missing_field():
+    # A snapshot written before image_info existed against a run that has it unset
+    old = _event()
+    new = _event(image_info=None)
+    assert event_fingerprint(old) == event_fingerprint(new)
+    assert not diff_events([old], [new])
+
+
+def test_pub_date_and_whitespace_are_ignored():
+    old = _event()
+    new = _event(description="An  evening of\nmusic", pub_date="2025-06-02T10:00:00Z")
+    assert not diff_events([old], [new])
+
+
+def test_changed_field_is_reported():
+    old = _event(image_info=None)
+    new = _event(image_info={"mime_type": "image/png", "length": 1024, "width": None, "height": None})
+    diff = diff_events([old], [new])
+    assert diff.summary() == "0 added, 0 removed, 1 updated"
+    assert diff.updated[0]["fields"] == ["image_info"]
+
+
+def test_added_and_removed():
+    kept = _event()
+    gone = _event(link="https://www.iamsterdam.com/en/whats-on/calendar/music/gone", title="Gone")
+    new = _event(link="https://www.iamsterdam.com/en/whats-on/calendar/music/new", title="New")
+    diff = diff_events([kept, gone], [kept, new])
+    assert [item["title"] for item in diff.added] == ["New"]
+    assert [item["title"] for item in diff.removed] == ["Gone"]
+    assert not diff.updated
@@ -0,0 +1,28 @@
+import os
+
+from feed_outputs import load_manifest, precompress, write_manifest
+
+
+def test_unchanged_outputs_keep_their_compressed_siblings(tmp_path):
+    changed, unchanged = tmp_path / "events.xml", tmp_path / "events.json"
+    changed.write_text("<rss>one</rss>")
+    unchanged.write_text("[]")
+    paths = [str(changed), str(unchanged)]
+    write_manifest(precompress(paths), tmp_path / "manifest.json")
+    unchanged_gz = str(unchanged) + ".gz"
+    os.utime(unchanged_gz, (0, 0))
+
+    changed.write_text("<rss>two</rss>")
+    entries = precompress(paths, load_manifest(tmp_path / "manifest.json"))
+    assert os.path.getmtime(unchanged_gz) == 0
+    assert os.path.getmtime(str(changed) + ".gz") > 0
+    assert entries[str(changed)]["sha256"] != load_manifest(tmp_path / "manifest.json")[str(changed)]["sha256"]
+
+
+def test_missing_sibling_is_written_again(tmp_path):
+    output = tmp_path / "events.xml"
+    output.write_text("<rss />")
+    manifest = precompress([str(output)])
+    os.remove(str(output) + ".gz")
+    precompress([str(output)], manifest)
+    assert os.path.exists(str(output) + ".gz")
@@ -0,0 +1,91 @@
+from datetime import date, datetime, timezone
+
+from daemon import refresh_interval
+from event_store import EventStore
+from models import Event
+from occurrences import AMSTERDAM, event_reference_date, parse_occurrence, parse_occurrences
+from scrape_amsterdam_events import AmsterdamEventsScraper
+
+
+def _day(year, month, day):
+    return datetime(year, month, day, tzinfo=AMSTERDAM)
+
+
+def test_dutch_range_through():
+    occurrence = parse_occurrence("vr 13 jun t/m zo 15 jun", date(2025, 6, 1))
+    assert occurrence.start == _day(2025, 6, 13)
+    assert occurrence.end == _day(2025, 6, 16)
+    assert occurrence.all_day
+
+
+def test_dutch_range_until():
+    occurrence = parse_occurrence("13 jun tot 15 jun", date(2025, 6, 1))
+    assert (occurrence.start, occurrence.end) == (_day(2025, 6, 13), _day(2025, 6, 16))
+
+
+def test_dutch_range_with_times():
+    occurrence = parse_occurrence("do 12 jun 20:00 t/m za 14 jun 23:00", date(2025, 6, 1))
+    assert occurrence.start == datetime(2025, 6, 12, 20, 0, tzinfo=AMSTERDAM)
+    assert occurrence.end == datetime(2025, 6, 14, 23, 0, tzinfo=AMSTERDAM)
+    assert not occurrence.all_day
+
+
+def test_range_across_new_year():
+    occurrence = parse_occurrence("za 28 dec t/m zo 5 jan", date(2025, 12, 1))
+    assert (occurrence.start, occurrence.end) == (_day(2025, 12, 28), _day(2026, 1, 6))
+
+
+def test_hyphen_ranges_still_parse():
+    assert parse_occurrence("10 jun - 12 jun", date(2025, 6, 1)).end == _day(2025, 6, 13)
+    occurrence = parse_occurrence("wo 2 jul 20:00 - 22:00", date(2025, 6, 1))
+    assert occurrence.end == datetime(2025, 7, 2, 22, 0, tzinfo=AMSTERDAM)
+
+
+def _listing(first_seen, date_text):
+    return Event(
+        title="Open Day",
+        link="https://www.iamsterdam.com/en/whats-on/calendar/attractions/open-day",
+        description="Open day",
+        source="I Amsterdam Official",
+        price_text="Free",
+        pub_date=first_seen,
+        date_text=date_text,
+    )
+
+
+def test_long_running_listing_is_not_pruned(tmp_path):
+    # First seen ten months before its current dates were scraped
+    first_seen = datetime(2025, 6, 10, 9, 0, tzinfo=timezone.utc)
+    rescraped = datetime(2026, 4, 20, 9, 0, tzinfo=timezone.utc)
+    store = EventStore(tmp_path / "events.db")
+    store.upsert([_listing(first_seen, ["Sat 14 Jun 10:00 - 12:00"])], seen_at=first_seen)
+    store.upsert(
+        [_listing(rescraped, ["Sat 25 Apr 10:00 - 12:00", "Sat 2 May 10:00 - 12:00"])], seen_at=rescraped
+    )
+
+    scraper = AmsterdamEventsScraper(store=store)
+    scraper.load_stored_events()
+    event = scraper.events[0]
+    assert event.pub_date == first_seen
+    assert event_reference_date(event) == date(2026, 4, 20)
+    scraper.prune_past_events(now=datetime(2026, 4, 20, 12, 0, tzinfo=AMSTERDAM))
+    assert scraper.events == [event]
+
+    start_date = store.db.execute("SELECT start_date FROM events").fetchone()[0]
+    store.close()
+    assert start_date == "2026-04-25"
+    # The daemon schedules it from the same dates: it starts within a week
+    assert refresh_interval(event, datetime(2026, 4, 20, 12, 0, tzinfo=AMSTERDAM)) == 6 * 3600
+
+
+def test_store_and_feeds_agree_on_the_year_around_new_year(tmp_path):
+    # Scraped just before midnight UTC, which is already 1 Jan in Amsterdam
+    scraped = datetime(2025, 12, 31, 23, 30, tzinfo=timezone.utc)
+    store = EventStore(tmp_path / "events.db")
+    store.upsert([_listing(scraped, ["do 1 jan 20:00 - 22:00"])], seen_at=scraped)
+    start_date = store.db.execute("SELECT start_date FROM events").fetchone()[0]
+    event = Event.model_validate(store.current_events()[0])
+    store.close()
+
+    feed_start = parse_occurrences(event.date_text, event_reference_date(event))[0].start.date()
+    assert start_date == feed_start.isoformat() == "2026-01-01"
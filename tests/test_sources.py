@@ -0,0 +1,74 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from crawler import AgendaCrawler, CrawlError, HostRateLimiter
+from daemon import ScraperDaemon
+from event_store import EventStore
+from models import Event
+from sources import FAILED, EventSource, SourceRunner
+
+AGENDA = "https://www.iamsterdam.com/uit/agenda"
+EVENT_URL = "https://www.iamsterdam.com/uit/agenda/muziek/concerten/open-air"
+
+
+async def _unreachable(url):
+    raise ConnectionError("agenda site is down")
+
+
+class DownSource(EventSource):
+    """A source whose listing site cannot be reached"""
+
+    name = "down"
+    label = "Down Source"
+
+    async def discover(self, context, limit=None):
+        crawler = AgendaCrawler([_unreachable], rate_limiter=HostRateLimiter(0))
+        return await crawler.crawl(AGENDA, target=limit)
+
+
+class FakeScraper:
+    concurrency = 2
+
+    def __init__(self, store=None):
+        self.store = store
+        self.sources = [DownSource(self)]
+
+    def save_caches(self):
+        pass
+
+
+def test_crawl_without_any_listing_page_raises():
+    crawler = AgendaCrawler([_unreachable], rate_limiter=HostRateLimiter(0))
+    with pytest.raises(CrawlError):
+        asyncio.run(crawler.crawl(AGENDA))
+
+
+def test_unreachable_listing_fails_the_source():
+    runner = SourceRunner([DownSource(FakeScraper())])
+    events = asyncio.run(runner.run(context=None))
+    assert events == {"down": []}
+    assert runner.reports["down"]["status"] == FAILED
+    assert runner.incomplete_labels() == ["Down Source"]
+
+
+def test_daemon_keeps_schedule_and_events_when_listing_is_down(tmp_path):
+    store = EventStore(tmp_path / "events.db")
+    seen_at = datetime.now(timezone.utc) - timedelta(hours=1)
+    event = Event(
+        title="Open Air",
+        link=EVENT_URL,
+        source="Down Source",
+        date_text=["Sat 14 Jun 20:00 - 23:00"],
+        price_text="Free",
+        pub_date=seen_at,
+    )
+    store.upsert([event], seen_at=seen_at)
+    daemon = ScraperDaemon(FakeScraper(store), schedule_file=tmp_path / "schedule.json")
+    daemon.scheduler.schedule(EVENT_URL, "down", 0.0)
+
+    asyncio.run(daemon.crawl_listings())
+    assert EVENT_URL in daemon.scheduler
+    assert [stored["link"] for stored in store.current_events()] == [EVENT_URL]
+    store.close()
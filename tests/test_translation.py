@@ -0,0 +1,36 @@
+import json
+import time
+
+from translation import TranslationCache
+
+
+def test_least_recently_used_translations_are_evicted(tmp_path):
+    cache = TranslationCache(tmp_path / "translations.json", max_entries=2)
+    cache.put("een", "en", "stub", "one")
+    cache.put("twee", "en", "stub", "two")
+    cache.put("drie", "en", "stub", "three")
+    cache.entries[cache.key("een", "en", "stub")]["used_at"] -= 10
+    cache.entries[cache.key("drie", "en", "stub")]["used_at"] -= 5
+    assert cache.get("een", "en", "stub") == "one"
+    cache.save()
+
+    reloaded = TranslationCache(tmp_path / "translations.json", max_entries=2)
+    assert reloaded.get("een", "en", "stub") == "one"
+    assert reloaded.get("twee", "en", "stub") == "two"
+    assert reloaded.get("drie", "en", "stub") is None
+
+
+def test_unused_translations_expire(tmp_path):
+    cache = TranslationCache(tmp_path / "translations.json", max_age_days=1)
+    cache.put("oud", "en", "stub", "old")
+    cache.entries[cache.key("oud", "en", "stub")]["used_at"] = time.time() - 2 * 24 * 3600
+    cache.put("nieuw", "en", "stub", "new")
+    cache.save()
+    assert cache.get("oud", "en", "stub") is None
+    assert cache.get("nieuw", "en", "stub") == "new"
+
+
+def test_reads_caches_written_before_eviction(tmp_path):
+    path = tmp_path / "translations.json"
+    path.write_text(json.dumps({TranslationCache.key("hallo", "en", "stub"): "hello"}))
+    assert TranslationCache(path).get("hallo", "en", "stub") == "hello"
@@ -0,0 +1,259 @@
+"""
+Cached, batched translation engine.
+
+Scraped titles and descriptions are translated through a pluggable backend.
+Results are kept in a persistent cache keyed by (text hash, target language,
+backend); translations that go unused for a while are evicted when it is
+saved. Concurrent requests are combined into batched backend calls that run
+in a worker thread, so they never block the event loop.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from pathlib import Path
+
+from metrics import METRICS
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BACKEND = "google"
+DEFAULT_CACHE_FILE = ".cache/translations.json"
+# Translations not used for this long are dropped; beyond the entry limit the least recently used go
+DEFAULT_MAX_AGE_DAYS = 90
+DEFAULT_MAX_ENTRIES = 20000
+
+# Batches are flushed when they reach either limit, or after the linger delay
+MAX_BATCH_CHARS = 4000
+MAX_BATCH_ITEMS = 20
+BATCH_LINGER_SECONDS = 0.05
+
+
+class TranslationBackend:
+    """Base class for translation backends."""
+
+    name = "base"
+
+    def translate_batch(self, texts: list[str], to_language: str) -> list[str]:
+        """Translate texts (blocking). Must return one result per input."""
+        raise NotImplementedError
+
+
+class TranslatorsBackend(TranslationBackend):
+    """Backend using one of the engines of the `translators` package."""
+
+    # Each batch is sent as one request with one input per line
+    separator = "\n"
+
+    def __init__(self, engine: str = DEFAULT_BACKEND):
+        self.name = engine
+        self.engine = engine
+
+    def _translate(self, text: str, to_language: str) -> str:
+        import translators as ts  # type: ignore
+
+        return ts.translate_text(text, translator=self.engine, to_language=to_language)
+
+    def translate_batch(self, texts, to_language):
+        if len(texts) > 1 and not any(self.separator in t for t in texts):
+            joined = self._translate(self.separator.join(texts), to_language)
+            parts = joined.split(self.separator)
+            if len(parts) == len(texts):
+                return [p.strip() for p in parts]
+            logger.info("Batched translation changed the line count; translating one by one.")
+        return [self._translate(t, to_language) for t in texts]
+
+
+class StubBackend(TranslationBackend):
+    """Offline backend that returns texts unchanged, with optional simulated latency."""
+
+    name = "stub"
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.calls = 0
+
+    def translate_batch(self, texts, to_language):
+        self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        return list(texts)
+
+
+def make_backend(name: str) -> TranslationBackend:
+    """Create a backend by name: "stub" or any `translators` engine (google, bing, ...)"""
+    if name == StubBackend.name:
+        return StubBackend()
+    return TranslatorsBackend(name)
+
+
+class TranslationCache:
+    """Persistent map of (text hash, target language, backend) to translated text, with LRU eviction."""
+
+    def __init__(self, path=DEFAULT_CACHE_FILE, max_age_days=DEFAULT_MAX_AGE_DAYS, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = Path(path)
+        self.max_age_seconds = max_age_days * 24 * 3600
+        self.max_entries = max_entries
+        # key -> {"translation": ..., "used_at": ...}
+        self.entries: dict[str, dict] = {}
+        self.dirty = False
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                self.entries = json.load(f)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable translation cache {self.path}: {e}")
+        # Caches written before eviction held bare strings; they count as used now
+        now = time.time()
+        for key, entry in self.entries.items():
+            if isinstance(entry, str):
+                self.entries[key] = {"translation": entry, "used_at": now}
+                self.dirty = True
+
+    @staticmethod
+    def key(text: str, to_language: str, backend: str) -> str:
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return f"{backend}:{to_language}:{digest}"
+
+    def get(self, text, to_language, backend):
+        entry = self.entries.get(self.key(text, to_language, backend))
+        if entry is None:
+            return None
+        entry["used_at"] = time.time()
+        self.dirty = True
+        return entry["translation"]
+
+    def put(self, text, to_language, backend, translation):
+        self.entries[self.key(text, to_language, backend)] = {"translation": translation, "used_at": time.time()}
+        self.dirty = True
+
+    def evict(self):
+        """Drop translations unused for max_age_days, then the least recently used beyond max_entries"""
+        cutoff = time.time() - self.max_age_seconds
+        expired = [key for key, entry in self.entries.items() if entry["used_at"] < cutoff]
+        for key in expired:
+            del self.entries[key]
+        overflow = len(self.entries) - self.max_entries
+        if overflow > 0:
+            oldest = sorted(self.entries, key=lambda key: self.entries[key]["used_at"])[:overflow]
+            for key in oldest:
+                del self.entries[key]
+        removed = len(expired) + max(0, overflow)
+        if removed:
+            self.dirty = True
+            logger.info(f"Translation cache: evicted {removed} entries ({len(self.entries)} kept)")
+
+    def save(self):
+        """Evict stale entries and write the cache to disk if anything changed"""
+        self.evict()
+        if not self.dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        self.dirty = False
+
+
+class Translator:
+    """Async front-end that caches, de-duplicates and batches translations.
+
+    Must be used from a single event loop.
+    """
+
+    def __init__(
+        self,
+        backend: TranslationBackend,
+        cache: TranslationCache | None = None,
+        to_language="en",
+        governor=None,
+    ):
+        self.backend = backend
+        # Optional OutboundGovernor; backend errors of any kind are retried through it
+        self.governor = governor
+        self.cache = cache
+        self.to_language = to_language
+        self.stats = {"cache_hits": 0, "translated": 0, "backend_calls": 0, "failed": 0}
+        self._pending: dict[str, asyncio.Future] = {}
+        self._batch: list[str] = []
+        self._batch_chars = 0
+        self._flush_handle = None
+        self._tasks: set[asyncio.Task] = set()
+
+    async def translate(self, text: str) -> str:
+        """Translate one string; on failure the original text is returned"""
+        if not text:
+            return text
+        if self.cache:
+            cached = self.cache.get(text, self.to_language, self.backend.name)
+            if cached is not None:
+                self.stats["cache_hits"] += 1
+                return cached
+
+        future = self._pending.get(text)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._pending[text] = future
+            self._enqueue(text)
+        return await future
+
+    def _enqueue(self, text):
+        self._batch.append(text)
+        self._batch_chars += len(text)
+        if len(self._batch) >= MAX_BATCH_ITEMS or self._batch_chars >= MAX_BATCH_CHARS:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(BATCH_LINGER_SECONDS, self._flush)
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._batch, self._batch_chars = self._batch, [], 0
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._run_batch(batch))
+            # Keep a reference so the task is not garbage-collected mid-flight
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, batch):
+        self.stats["backend_calls"] += 1
+        METRICS.add_bytes("translate", sum(len(text.encode("utf-8")) for text in batch))
+        try:
+            with METRICS.stage("translate"):
+                if self.governor:
+                    results = await self.governor.call(
+                        f"translate:{self.backend.name}",
+                        asyncio.to_thread, self.backend.translate_batch, batch, self.to_language,
+                        retry_on=(Exception,),
+                    )
+                else:
+                    results = await asyncio.to_thread(self.backend.translate_batch, batch, self.to_language)
+            if len(results) != len(batch):
+                raise ValueError(f"expected {len(batch)} results, got {len(results)}")
+        except Exception as e:
+            logger.warning(f"Translation of {len(batch)} texts via {self.backend.name} failed: {e}")
+            self.stats["failed"] += len(batch)
+            results = None
+
+        for index, text in enumerate(batch):
+            future = self._pending.pop(text)
+            if results is None:
+                future.set_result(text)
+                continue
+            self.stats["translated"] += 1
+            if self.cache:
+                self.cache.put(text, self.to_language, self.backend.name, results[index])
+            future.set_result(results[index])
+
+    def log_summary(self):
+        logger.info(
+            f"Translation ({self.backend.name}): {self.stats['cache_hits']} cache hits, "
+            f"{self.stats['translated']} translated in {self.stats['backend_calls']} calls, "
+            f"{self.stats['failed']} failed."
+        )